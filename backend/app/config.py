@@ -13,9 +13,37 @@ class Settings(BaseSettings):
     debug: bool = True
     host: str = "0.0.0.0"
     port: int = 8000
+    # Threads for blocking database work; each one keeps its own reader connection.
+    db_executor_workers: int = 8
+
+    # Ingestion pipeline: workers per stage, queue bound and database batch size.
+    ingest_stabilize_workers: int = 8
+    ingest_probe_workers: int = 4
+    ingest_organize_workers: int = 2
+    ingest_queue_size: int = 256
+    ingest_write_batch_size: int = 64
+    # Probe in this many processes instead of threads (0 = threads).
+    ingest_probe_processes: int = 0
+    ingest_probe_chunk_size: int = 16
+    # New files are ingested once no filesystem event has touched them for this long.
+    watcher_quiet_ms: int = 1000
+    # Files already handed over are remembered this long, up to this many.
+    watcher_processed_ttl_seconds: int = 24 * 3600
+    watcher_processed_max_size: int = 100_000
+    # Copy imports into the library instead of moving them; hardlink them
+    # instead when the library is on the same filesystem and this is on.
+    organize_copy_files: bool = False
+    organize_allow_hardlinks: bool = False
+
+    # Secret used to sign pagination cursors. Generated into app_data_dir if empty.
+    cursor_secret: str = ""
 
     # Feature flags
     enable_file_watcher: bool = True
+    # Catch up on import_dir and music_library_dir changes made while the server was down.
+    enable_startup_reconcile: bool = True
+    # Delete tracks whose file has gone; False only reports them.
+    reconcile_purge_missing: bool = True
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
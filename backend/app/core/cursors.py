@@ -0,0 +1,218 @@
+import base64
+import hashlib
+import hmac
+import os
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Cursor token layout (before base64url):
+#   version (1 byte) | shape id (4 bytes) | filter values | key values | HMAC
+# Each value list is a varint count followed by tagged values. The shape id
+# points at a CursorShape registered on the codec, so the ordering and the
+# filter columns never travel with the token, only their values do.
+
+CURSOR_VERSION = 1
+_MAC_SIZE = 12
+
+_TAG_NONE = 0
+_TAG_INT = 1
+_TAG_STR = 2
+_TAG_FLOAT = 3
+_TAG_TRUE = 4
+_TAG_FALSE = 5
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CursorShape:
+    """Everything about a paginated query that is fixed for its whole walk.
+
+    ``order_parameters`` are the (already validated) order parameter objects,
+    and ``search`` the (column, operator) pairs whose values ride in the token.
+    """
+
+    endpoint: str
+    order_parameters: Tuple[Any, ...]
+    search: Tuple[Tuple[str, str], ...] = ()
+    shape_id: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        digest = hashlib.blake2b(
+            repr((self.endpoint, self.order_parameters, self.search)).encode("utf-8"),
+            digest_size=4,
+        ).digest()
+        object.__setattr__(self, "shape_id", int.from_bytes(digest, "big"))
+
+
+@dataclass(frozen=True)
+class DecodedCursor:
+    shape: CursorShape
+    filter_values: List[Any]
+    key_values: List[Any]
+
+
+class CursorCodec:
+    def __init__(self, secret: bytes):
+        if not secret:
+            raise ValueError("Cursor secret must not be empty")
+        self.secret = secret
+        self.shapes: Dict[int, CursorShape] = {}
+
+    def register(self, shape: CursorShape) -> CursorShape:
+        existing = self.shapes.get(shape.shape_id)
+        if existing is not None and existing != shape:
+            raise ValueError(f"Cursor shape id collision for {shape}")
+        self.shapes[shape.shape_id] = shape
+        return shape
+
+    def encode(
+        self, shape: CursorShape, filter_values: List[Any], key_values: List[Any]
+    ) -> str:
+        self.register(shape)
+        body = bytearray()
+        body.append(CURSOR_VERSION)
+        body += shape.shape_id.to_bytes(4, "big")
+        _write_values(body, filter_values)
+        _write_values(body, key_values)
+        body += self._mac(bytes(body))
+        return base64.urlsafe_b64encode(bytes(body)).rstrip(b"=").decode("ascii")
+
+    def decode(self, token: str) -> DecodedCursor:
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (ValueError, TypeError):
+            raise InvalidCursorError("Cursor is not valid base64url")
+        # The decoder skips stray characters and ignores the unused low bits of
+        # the last character, so several tokens decode to the same bytes. Only
+        # the one encode() would produce is accepted.
+        if base64.urlsafe_b64encode(raw).rstrip(b"=") != token.encode("ascii"):
+            raise InvalidCursorError("Cursor is not canonical base64url")
+
+        if len(raw) < 1 + 4 + _MAC_SIZE:
+            raise InvalidCursorError("Cursor is too short")
+
+        body, mac = raw[:-_MAC_SIZE], raw[-_MAC_SIZE:]
+        if not hmac.compare_digest(mac, self._mac(body)):
+            raise InvalidCursorError("Cursor signature does not match")
+
+        if body[0] != CURSOR_VERSION:
+            raise InvalidCursorError(f"Unsupported cursor version {body[0]}")
+
+        shape = self.shapes.get(int.from_bytes(body[1:5], "big"))
+        if shape is None:
+            raise InvalidCursorError("Cursor refers to an unknown query shape")
+
+        try:
+            filter_values, offset = _read_values(body, 5)
+            key_values, offset = _read_values(body, offset)
+        except (IndexError, UnicodeDecodeError, struct.error):
+            raise InvalidCursorError("Cursor payload is malformed")
+        if offset != len(body):
+            raise InvalidCursorError("Cursor payload has trailing bytes")
+
+        return DecodedCursor(shape=shape, filter_values=filter_values, key_values=key_values)
+
+    def _mac(self, body: bytes) -> bytes:
+        return hmac.new(self.secret, body, hashlib.sha256).digest()[:_MAC_SIZE]
+
+
+def load_or_create_secret(secret_path: Path) -> bytes:
+    """Read the cursor signing secret, creating a random one on first start.
+
+    The file is created readable by its owner only.
+    """
+    if secret_path.exists():
+        return bytes.fromhex(secret_path.read_text().strip())
+
+    secret = os.urandom(32)
+    secret_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(secret_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another process created it first.
+        return bytes.fromhex(secret_path.read_text().strip())
+    with os.fdopen(fd, "w") as f:
+        f.write(secret.hex())
+    return secret
+
+
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def _write_values(out: bytearray, values: List[Any]):
+    _write_varint(out, len(values))
+    for value in values:
+        if value is None:
+            out.append(_TAG_NONE)
+        elif value is True:
+            out.append(_TAG_TRUE)
+        elif value is False:
+            out.append(_TAG_FALSE)
+        elif isinstance(value, int):
+            out.append(_TAG_INT)
+            # zigzag so small negative numbers stay small
+            _write_varint(out, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            out.append(_TAG_FLOAT)
+            out += struct.pack(">d", value)
+        elif isinstance(value, str):
+            encoded = value.encode("utf-8")
+            out.append(_TAG_STR)
+            _write_varint(out, len(encoded))
+            out += encoded
+        else:
+            raise TypeError(f"Cannot encode cursor value of type {type(value)}")
+
+
+def _read_values(data: bytes, offset: int) -> Tuple[List[Any], int]:
+    count, offset = _read_varint(data, offset)
+    values: List[Any] = []
+    for _ in range(count):
+        tag = data[offset]
+        offset += 1
+        if tag == _TAG_NONE:
+            values.append(None)
+        elif tag == _TAG_TRUE:
+            values.append(True)
+        elif tag == _TAG_FALSE:
+            values.append(False)
+        elif tag == _TAG_INT:
+            zigzag, offset = _read_varint(data, offset)
+            values.append((zigzag >> 1) ^ -(zigzag & 1))
+        elif tag == _TAG_FLOAT:
+            values.append(struct.unpack_from(">d", data, offset)[0])
+            offset += 8
+        elif tag == _TAG_STR:
+            length, offset = _read_varint(data, offset)
+            if offset + length > len(data):
+                raise IndexError("string runs past the end of the cursor")
+            values.append(data[offset : offset + length].decode("utf-8"))
+            offset += length
+        else:
+            raise IndexError(f"unknown cursor value tag {tag}")
+    return values, offset
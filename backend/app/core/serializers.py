@@ -0,0 +1,56 @@
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from app.models.track_meta_data import TrackMetaData
+
+# Same field order as TrackMetaData, so the output matches what
+# GetTracksResponse would serialize for the same rows.
+_METADATA_FIELDS = tuple(TrackMetaData.model_fields)
+
+
+def client_tracks_from_rows(rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+    """Build ClientTrack-shaped dicts straight from track rows, skipping model validation."""
+    if not rows:
+        return []
+
+    keys = rows[0].keys()
+    metadata_indexes = [(field, keys.index(field)) for field in _METADATA_FIELDS]
+    has_album_art_index = keys.index("has_album_art")
+    uuid_index = keys.index("uuid_id")
+    created_index = keys.index("created_at")
+    updated_index = keys.index("last_updated")
+
+    client_tracks = []
+    for row in rows:
+        metadata = {field: row[index] for field, index in metadata_indexes}
+        metadata["has_album_art"] = bool(row[has_album_art_index])
+        client_tracks.append(
+            {
+                "uuid_id": row[uuid_index],
+                "metadata": metadata,
+                "created_at": row[created_index],
+                "last_updated": row[updated_index],
+            }
+        )
+    return client_tracks
+
+
+def tracks_response_json(
+    rows: List[sqlite3.Row],
+    next_cursor: Optional[str],
+    total_count: Optional[int],
+) -> bytes:
+    """Serialize a GetTracksResponse body from raw track rows."""
+    # Same settings as starlette's JSONResponse.
+    return json.dumps(
+        {
+            "data": client_tracks_from_rows(rows),
+            "nextCursor": next_cursor,
+            "totalCount": total_count,
+        },
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
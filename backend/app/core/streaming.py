@@ -0,0 +1,121 @@
+import os
+import stat
+from pathlib import Path
+from typing import BinaryIO, Mapping, Optional
+
+import anyio
+from starlette.responses import JSONResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+class FileRangeResponse(Response):
+    """Send ``length`` bytes of a file, starting at ``offset``.
+
+    The file is opened before the response starts, so a file that has gone
+    since its stream info was read is a 404 rather than a started 200 with no
+    body.
+
+    ASGI apps never see the socket, so this cannot call os.sendfile itself.
+    Servers that offer the zero-copy extension can (uvicorn does not), and
+    whole files go through pathsend where it is offered. Otherwise each chunk
+    is read with os.pread on a worker thread and sent as a body message.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        headers = dict(headers or {})
+        if not any(key.lower() == "content-length" for key in headers):
+            headers["content-length"] = str(length)
+        super().__init__(
+            content=None, status_code=status_code, headers=headers, media_type=media_type
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            file = await anyio.to_thread.run_sync(self._open)
+        except OSError as e:
+            print(f"Could not open {self.path} to stream it. {e}")
+            not_found = JSONResponse(
+                {"detail": f"file path for the track is now dead. Path: {self.path}"},
+                status_code=404,
+            )
+            await not_found(scope, receive, send)
+            return
+
+        try:
+            # Stop reading as soon as the listener goes away.
+            async with anyio.create_task_group() as task_group:
+
+                async def send_file():
+                    await self._send_file(scope, send, file)
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(send_file)
+                while True:
+                    if (await receive())["type"] == "http.disconnect":
+                        task_group.cancel_scope.cancel()
+                        break
+        finally:
+            file.close()
+
+    def _open(self) -> BinaryIO:
+        file = open(self.path, "rb")
+        if not stat.S_ISREG(os.fstat(file.fileno()).st_mode):
+            file.close()
+            raise OSError(f"{self.path} is not a regular file")
+        return file
+
+    async def _send_file(self, scope: Scope, send: Send, file: BinaryIO) -> None:
+        extensions = scope.get("extensions") or {}
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+
+        if self.offset == 0 and self.status_code == 200 and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        if "http.response.zerocopysend" in extensions:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                }
+            )
+            return
+
+        fd = file.fileno()
+        offset = self.offset
+        remaining = self.length
+        while remaining:
+            chunk = await anyio.to_thread.run_sync(
+                os.pread, fd, min(self.chunk_size, remaining), offset
+            )
+            if not chunk:
+                # The file shrank underneath us; end the body early.
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send(
+                {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+            )
+        if remaining:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
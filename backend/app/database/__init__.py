@@ -5,9 +5,14 @@ from .database import (
     ArtistRowFilterParameter,
     Database,
     DatabaseContext,
+    FileSnapshot,
+    HashCandidate,
+    IngestJob,
     OrderParameter,
+    Page,
     RowFilterParameter,
     SearchEntityType,
     SearchParameter,
     SearchResults,
+    StreamInfo,
 )
@@ -1,9 +1,26 @@
+import json
+import os
 import sqlite3
+import threading
+import time
+import weakref
 from contextlib import contextmanager
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from enum import Flag, auto
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 from app.models.album import Album
 from app.models.artist import Artist
@@ -31,16 +48,25 @@ ALLOWED_METADATA_COLUMNS = [
 ]
 
 ALLOWED_TRACK_COLUMNS = ["uuid_id", "created_at", "last_updated"]
+NOT_NULL_TRACK_COLUMNS = {"uuid_id", "created_at", "last_updated", "has_album_art"}
 
 ALLOWED_ALBUM_COLUMNS = ["id", "name", "artist", "artist_id", "year", "is_single_grouping"]
 ALBUM_TEXT_COLUMNS = {"name", "artist"}
 ALBUM_INTEGER_COLUMNS = {"id", "artist_id", "year", "is_single_grouping"}
+NOT_NULL_ALBUM_COLUMNS = {"id", "artist", "artist_id", "is_single_grouping"}
 
 ALLOWED_ARTIST_COLUMNS = ["id", "name"]
 ARTIST_TEXT_COLUMNS = {"name"}
 
 ALLOWED_OPERATORS = ["=", ">=", "<=", "<", ">"]
 
+COUNT_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_MAX_ENTRIES = 128
+STREAM_INFO_CACHE_MAX_ENTRIES = 1024
+ID_CACHE_MAX_ENTRIES = 4096
+
+T = TypeVar("T")
+
 
 class SearchEntityType(Flag):
     TRACKS = auto()
@@ -55,6 +81,51 @@ class SearchResults:
     albums: List[Album]
 
 
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    items: List[T]
+    has_more: bool
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """What /tracks/{uuid_id}/stream needs. Size and mtime are None if the file is gone."""
+
+    file_path: Path
+    codec: Optional[str]
+    file_size: Optional[int]
+    mtime: Optional[float]
+
+
+@dataclass(frozen=True)
+class HashCandidate:
+    """A stored track whose file_hash starts with a given prefilter key."""
+
+    uuid_id: str
+    file_path: Path
+    file_hash: str
+
+
+class FileSnapshot(NamedTuple):
+    """A file as a reconciliation scan saw it. A tuple, because a scan makes
+    one per file in the library."""
+
+    path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class IngestJob:
+    """A file on its way into the library, as left by a previous run."""
+
+    source_path: Path
+    # discovered -> probed -> moved -> indexed
+    state: str
+    library_path: Optional[Path]
+    file_hash: Optional[str]
+
+
 @dataclass(frozen=True)
 class DatabaseContext:
     database_path: Path
@@ -172,37 +243,605 @@ def _row_to_track(row) -> Track:
     )
 
 
+# Tables added after databases were already out there. initialize() skips
+# existing databases, so these are created there rather than in init.sql.
+_ADDED_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS file_snapshots (
+    "path" TEXT PRIMARY KEY,
+    "size" INTEGER NOT NULL,
+    "mtime_ns" INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    "id" INTEGER PRIMARY KEY,
+    "source_path" TEXT NOT NULL,
+    "state" TEXT NOT NULL
+        CHECK ("state" IN ('discovered', 'probed', 'moved', 'indexed')),
+    "library_path" TEXT,
+    "file_hash" TEXT,
+    "updated_at" INTEGER NOT NULL DEFAULT (unixepoch())
+);
+
+-- One unfinished job per source file; indexed jobs are only kept until pruned.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingest_jobs_source
+    ON ingest_jobs("source_path") WHERE "state" != 'indexed';
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_library
+    ON ingest_jobs("library_path") WHERE "state" != 'indexed';
+"""
+
+# Aggregate columns added after the first release, for databases created
+# before them. Backfilled from trackmetadata when added.
+_AGGREGATE_COLUMNS_SQL = {
+    "artists": (
+        '"track_count" INTEGER NOT NULL DEFAULT 0',
+        '"total_duration" REAL NOT NULL DEFAULT 0',
+        '"max_year" INTEGER',
+    ),
+    "albums": (
+        '"track_count" INTEGER NOT NULL DEFAULT 0',
+        '"total_duration" REAL NOT NULL DEFAULT 0',
+        '"has_album_art" INTEGER NOT NULL DEFAULT 0 CHECK ("has_album_art" IN (0,1))',
+    ),
+}
+
+_BACKFILL_AGGREGATES_SQL = """
+UPDATE artists SET ("track_count", "total_duration", "max_year") = (
+    SELECT COUNT(*), COALESCE(SUM(tm.duration), 0), MAX(tm.year)
+    FROM trackmetadata tm WHERE tm.artist_id = artists.id
+);
+UPDATE albums SET ("track_count", "total_duration", "has_album_art") = (
+    SELECT COUNT(*), COALESCE(SUM(tm.duration), 0), COALESCE(MAX(tm.has_album_art), 0)
+    FROM trackmetadata tm WHERE tm.album_id = albums.id
+);
+"""
+
+# Indexes for the default list orderings, added after the first release and
+# created on existing databases as well as new ones.
+_ORDERING_INDEXES_SQL = {
+    # Default /albums ordering within an artist (year DESC nulls last, singles
+    # last, name nulls last).
+    "albums": (
+        "CREATE INDEX IF NOT EXISTS idx_albums_artist_order ON albums("
+        '"artist_id", "year" IS NULL, "year" DESC, "is_single_grouping", '
+        '"name" IS NULL, "name" COLLATE NOCASE)',
+    ),
+    # Default /tracks ordering, for the whole library and within an artist/album.
+    "trackmetadata": (
+        "CREATE INDEX IF NOT EXISTS idx_tm_default_order ON trackmetadata("
+        '"artist", "album", "disc_number", "track_number", "uuid_id")',
+        "CREATE INDEX IF NOT EXISTS idx_tm_album_order ON trackmetadata("
+        '"artist_id", "album_id", "artist", "album", "disc_number", "track_number", "uuid_id")',
+    ),
+}
+
+# Default /artists ordering. NOCASE folds the same ASCII range as LOWER(), so
+# this is as unique as name_lower; it is still checked on existing databases,
+# where a failing CREATE UNIQUE INDEX would fail initialize().
+_ARTISTS_NAME_NOCASE_INDEX_SQL = (
+    "CREATE {unique}INDEX IF NOT EXISTS idx_artists_name_nocase "
+    'ON artists("name" COLLATE NOCASE)'
+)
+
+_DUPLICATE_ARTIST_NAME_SQL = (
+    'SELECT "name" FROM artists GROUP BY "name" COLLATE NOCASE '
+    "HAVING COUNT(*) > 1 LIMIT 1"
+)
+
+_ARTIST_COLUMNS_SQL = "id, name, track_count, total_duration, max_year"
+_ALBUM_COLUMNS_SQL = (
+    'a.id, a.name, ar.name AS artist, a.artist_id, a."year", a.is_single_grouping, '
+    "a.track_count, a.total_duration, a.has_album_art"
+)
+
+_INSERT_TRACK_SQL = (
+    "INSERT INTO tracks (uuid_id, file_path, file_hash, created_at, last_updated) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+_INSERT_TRACKMETADATA_SQL = (
+    "INSERT INTO trackmetadata (track_id, uuid_id, title, artist, album, album_artist, "
+    'artist_id, album_id, "year", "date", genre, track_number, disc_number, codec, duration, '
+    "bitrate_kbps, sample_rate_hz, channels, has_album_art) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_INSERT_FTS_TRACK_SQL = (
+    "INSERT INTO fts_tracks(rowid, title, artist_name, album_name) VALUES (?, ?, ?, ?)"
+)
+
+
+def _add_aggregate_columns(conn):
+    added = False
+    for table, columns in _AGGREGATE_COLUMNS_SQL.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            continue
+        for column in columns:
+            if column.split()[0].strip('"') not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+                added = True
+    if added:
+        print("Backfilling artist and album aggregates")
+        conn.executescript(_BACKFILL_AGGREGATES_SQL)
+
+
+def _add_ordering_indexes(conn):
+    schema = {
+        (row["type"], row["name"])
+        for row in conn.execute("SELECT type, name FROM sqlite_master")
+    }
+    for table, statements in _ORDERING_INDEXES_SQL.items():
+        if ("table", table) in schema:
+            for statement in statements:
+                conn.execute(statement)
+
+    if ("table", "artists") not in schema or ("index", "idx_artists_name_nocase") in schema:
+        return
+    unique = "UNIQUE "
+    duplicate = conn.execute(_DUPLICATE_ARTIST_NAME_SQL).fetchone()
+    if duplicate is not None:
+        print(
+            f"Artist name {duplicate['name']!r} is not unique ignoring case, so "
+            "idx_artists_name_nocase is created non-unique"
+        )
+        unique = ""
+    conn.execute(_ARTISTS_NAME_NOCASE_INDEX_SQL.format(unique=unique))
+
+
+def _row_to_artist(row) -> Artist:
+    return Artist(
+        id=row["id"],
+        name=row["name"],
+        track_count=row["track_count"],
+        total_duration=row["total_duration"],
+        max_year=row["max_year"],
+    )
+
+
+def _row_to_album(row) -> Album:
+    return Album(
+        id=row["id"],
+        name=row["name"],
+        artist=row["artist"],
+        artist_id=row["artist_id"],
+        year=row["year"],
+        is_single_grouping=bool(row["is_single_grouping"]),
+        track_count=row["track_count"],
+        total_duration=row["total_duration"],
+        has_album_art=bool(row["has_album_art"]),
+    )
+
+
+def _effective_artist(metadata: TrackMetaData) -> Optional[str]:
+    if metadata.album_artist and metadata.album_artist.strip():
+        return metadata.album_artist.strip()
+    if metadata.artist and metadata.artist.strip():
+        return metadata.artist.strip()
+    return None
+
+
+def _stored_effective_artist(row) -> str:
+    """_effective_artist of a trackmetadata row, as stored in fts_tracks."""
+    for column in ("album_artist", "artist"):
+        if row[column] and row[column].strip():
+            return row[column].strip()
+    return ""
+
+
+def _album_name(metadata: TrackMetaData) -> Optional[str]:
+    if metadata.album is not None and metadata.album.strip() != "":
+        return metadata.album
+    return None
+
+
+def _track_row(track: Track) -> tuple:
+    return (
+        track.uuid_id,
+        str(track.file_path),
+        track.file_hash,
+        track.created_at,
+        track.last_updated,
+    )
+
+
+def _trackmetadata_row(
+    track: Track, track_db_id: int, artist_id: Optional[int], album_id: Optional[int]
+) -> tuple:
+    metadata = track.metadata
+    return (
+        track_db_id,
+        track.uuid_id,
+        metadata.title,
+        metadata.artist,
+        metadata.album,
+        metadata.album_artist,
+        artist_id,
+        album_id,
+        metadata.year,
+        metadata.date,
+        metadata.genre,
+        metadata.track_number,
+        metadata.disc_number,
+        metadata.codec,
+        metadata.duration,
+        metadata.bitrate_kbps,
+        metadata.sample_rate_hz,
+        metadata.channels,
+        metadata.has_album_art,
+    )
+
+
+def _aggregate_entry(track: Track, artist_id: Optional[int], album_id: Optional[int]) -> tuple:
+    """What a track adds to its artist's and album's aggregate columns."""
+    metadata = track.metadata
+    return (artist_id, album_id, metadata.duration, metadata.year, metadata.has_album_art)
+
+
+def _aggregate_deltas(entries: Sequence[tuple]) -> tuple[dict, dict]:
+    """Sum _aggregate_entry tuples per album and per artist.
+
+    Albums get [track count, duration, tracks with art] and artists
+    [track count, duration, max year].
+    """
+    albums: dict[int, list] = {}
+    artists: dict[int, list] = {}
+    for artist_id, album_id, duration, year, has_album_art in entries:
+        if album_id is not None:
+            album = albums.setdefault(album_id, [0, 0.0, 0])
+            album[0] += 1
+            album[1] += duration or 0.0
+            album[2] += 1 if has_album_art else 0
+        if artist_id is not None:
+            artist = artists.setdefault(artist_id, [0, 0.0, None])
+            artist[0] += 1
+            artist[1] += duration or 0.0
+            if year is not None and (artist[2] is None or artist[2] < year):
+                artist[2] = year
+    return albums, artists
+
+
+def _fts_track_row(
+    track: Track, track_db_id: int, effective_artist: Optional[str]
+) -> tuple:
+    return (
+        track_db_id,
+        track.metadata.title or "",
+        effective_artist or "",
+        _album_name(track.metadata) or "",
+    )
+
+
+class _ReaderSlot:
+    """Holds a thread's reader connection in the thread-local."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    reader_connections: int
+    reader_checkouts: int
+    writer_checkouts: int
+    writer_wait_seconds: float
+    writer_max_wait_seconds: float
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections for a single database file.
+
+    Every thread gets its own reader connection, closed when the thread
+    exits, and all writes go through one shared writer connection guarded by
+    a lock. Pragmas are applied once, when a connection is opened, instead of
+    on every query.
+    """
+
+    def __init__(self, database_path: Path):
+        self.database_path = database_path
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._busy_timeouts: dict[int, float] = {}
+
+        self._reader_checkouts = 0
+        self._writer_checkouts = 0
+        self._writer_wait_seconds = 0.0
+        self._writer_max_wait_seconds = 0.0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=timeout,
+            check_same_thread=False,
+            cached_statements=QUERY_CACHE_MAX_ENTRIES,
+        )
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+        except BaseException:
+            conn.close()
+            raise
+        conn.row_factory = sqlite3.Row
+        self._busy_timeouts[id(conn)] = timeout
+        return conn
+
+    def _set_busy_timeout(self, conn: sqlite3.Connection, timeout: float):
+        # Callers pass their own timeout per query, so only re-issue the
+        # pragma when it actually changes for this connection.
+        if self._busy_timeouts.get(id(conn)) != timeout:
+            conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+            self._busy_timeouts[id(conn)] = timeout
+
+    def reader(self, timeout: float = 5) -> sqlite3.Connection:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            conn = self._open(timeout)
+            slot = _ReaderSlot(conn)
+            # The thread-local, and so the slot, goes away when its thread
+            # exits; short-lived threads must not leave their reader open.
+            weakref.finalize(slot, self._release_reader, conn)
+            self._local.slot = slot
+            with self._readers_lock:
+                self._readers.append(conn)
+                self._reader_checkouts += 1
+            return conn
+
+        self._set_busy_timeout(slot.conn, timeout)
+        with self._readers_lock:
+            self._reader_checkouts += 1
+        return slot.conn
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        with self._readers_lock:
+            if conn in self._readers:
+                self._readers.remove(conn)
+        self._busy_timeouts.pop(id(conn), None)
+        conn.close()
+
+    @contextmanager
+    def writer(self, timeout: float = 5):
+        start = time.perf_counter()
+        if not self._writer_lock.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("timed out waiting for the writer connection")
+        waited = time.perf_counter() - start
+        try:
+            self._writer_checkouts += 1
+            self._writer_wait_seconds += waited
+            self._writer_max_wait_seconds = max(self._writer_max_wait_seconds, waited)
+            if self._writer is None:
+                self._writer = self._open(timeout)
+            else:
+                self._set_busy_timeout(self._writer, timeout)
+            yield self._writer
+        finally:
+            self._writer_lock.release()
+
+    def stats(self) -> PoolStats:
+        with self._readers_lock:
+            reader_connections = len(self._readers)
+            reader_checkouts = self._reader_checkouts
+        return PoolStats(
+            reader_connections=reader_connections,
+            reader_checkouts=reader_checkouts,
+            writer_checkouts=self._writer_checkouts,
+            writer_wait_seconds=self._writer_wait_seconds,
+            writer_max_wait_seconds=self._writer_max_wait_seconds,
+        )
+
+    def close(self):
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._busy_timeouts.clear()
+        self._local = threading.local()
+
+
+@dataclass(frozen=True)
+class QuerySlot:
+    """Placeholder for a bound value, naming where it comes from at bind time."""
+
+    source: str
+    index: int = 0
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    sql: str
+    slots: tuple[QuerySlot, ...]
+
+    def bind(self, sources: Dict[str, Sequence[Any]]) -> tuple:
+        return tuple(sources[slot.source][slot.index] for slot in self.slots)
+
+
+@dataclass(frozen=True)
+class QueryCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+
+class QueryCache:
+    """Bounded LRU of compiled SQL, keyed by query shape.
+
+    A shape is everything that changes the SQL text (columns, operators,
+    orderings and which filters or NULL cursor values are present), but not
+    the values themselves. Because the text is identical for every call of
+    one shape, sqlite3's per-connection statement cache can reuse the
+    prepared statement as well.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, CompiledQuery] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: tuple, compile_function: Callable[[], CompiledQuery]) -> CompiledQuery:
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return compiled
+            self._misses += 1
+
+        # Compiling raises ValueError for invalid shapes, which then never get cached.
+        compiled = compile_function()
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return compiled
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            return QueryCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass(frozen=True)
+class IdCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+
+class IdCache:
+    """Bounded LRU of artist and album ids, so every track of an album after
+    the first resolves them without a statement.
+
+    Keys are ("artist", name), ("album", artist_id, name) -> (id, year) and
+    ("single", artist_id, year). Only used by writers, which hold the single
+    writer connection. Entries are put only for work that is not rolled back,
+    and the whole cache is cleared whenever an artist or album is deleted or
+    a write transaction rolls back.
+    """
+
+    def __init__(self, max_entries: int = ID_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put_all(self, entries: Dict[tuple, Any]):
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> IdCacheStats:
+        with self._lock:
+            return IdCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class Database:
     def __init__(self, context: DatabaseContext):
         self.context = context
+        self.pool = ConnectionPool(context.database_path)
+        self._write_generation = 0
+        self._count_cache: dict[tuple, tuple[int, int]] = {}
+        self._query_cache = QueryCache()
+        self._id_cache = IdCache()
+        self._stream_info_cache: OrderedDict[str, StreamInfo] = OrderedDict()
+        self._stream_info_lock = threading.Lock()
 
     @contextmanager
     def _connection(self, *, commit: bool = False, timeout: float = 5):
-        conn = sqlite3.connect(self.context.database_path, timeout=timeout)
-        try:
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA foreign_keys=ON")
-            conn.row_factory = sqlite3.Row
-            yield conn
-            if commit:
+        if not commit:
+            yield self.pool.reader(timeout=timeout)
+            return
+
+        with self.pool.writer(timeout=timeout) as conn:
+            try:
+                yield conn
                 conn.commit()
-        except BaseException:
-            if commit:
+                self._write_generation += 1
+            except BaseException:
                 conn.rollback()
-            raise
-        finally:
-            conn.close()
+                # Ids resolved in the transaction may be gone with it.
+                self._id_cache.clear()
+                raise
+
+    def pool_stats(self) -> PoolStats:
+        return self.pool.stats()
+
+    def query_cache_stats(self) -> QueryCacheStats:
+        return self._query_cache.stats()
+
+    def id_cache_stats(self) -> IdCacheStats:
+        return self._id_cache.stats()
+
+    def close(self):
+        self.pool.close()
 
     def initialize(self) -> bool:
         # TODO: Create database migration logic when I actually need to migrate a database
         if self.context.database_path.exists():
             print("Database already exists, so skipping")
-            return True
+            try:
+                with self._connection(commit=True) as conn:
+                    conn.executescript(_ADDED_TABLES_SQL)
+                    _add_aggregate_columns(conn)
+                    _add_ordering_indexes(conn)
+                return True
+            except Exception as e:
+                print(f"Error initializing database: {e}")
+                return False
         try:
             with open(self.context.init_sql_path, "r") as f:
                 init_script = f.read()
             with self._connection(commit=True) as conn:
                 conn.executescript(init_script)
+                conn.executescript(_ADDED_TABLES_SQL)
+                _add_ordering_indexes(conn)
             return True
         except Exception as e:
             print(f"Error initializing database: {e}")
@@ -220,87 +859,187 @@ class Database:
                 metadata = track.metadata
 
                 # Determine effective artist: album_artist takes priority
-                effective_artist = None
-                if metadata.album_artist and metadata.album_artist.strip():
-                    effective_artist = metadata.album_artist.strip()
-                elif metadata.artist and metadata.artist.strip():
-                    effective_artist = metadata.artist.strip()
+                effective_artist = _effective_artist(metadata)
 
+                # Ids resolved here go into the cache once the track is in.
+                resolved: Dict[tuple, Any] = {}
                 artist_id = None
                 if effective_artist:
-                    artist_id = self._upsert_artist(conn, effective_artist)
+                    artist_id = self._upsert_artist(conn, effective_artist, resolved)
 
                 # Determine album type
-                album_name = metadata.album
-                has_album = album_name is not None and album_name.strip() != ""
+                album_name = _album_name(metadata)
                 album_id = None
 
                 if artist_id is not None and effective_artist is not None:
                     album_id = self._upsert_album(
-                        conn, album_name if has_album else None,
-                        artist_id, metadata.year, effective_artist,
+                        conn, album_name, artist_id, metadata.year, effective_artist, resolved,
                     )
 
                 # Insert track
-                tracks_entry = (
-                    track.uuid_id,
-                    str(track.file_path),
-                    track.file_hash,
-                    track.created_at,
-                    track.last_updated,
-                )
-                tracks_sql_query = (
-                    "INSERT INTO tracks (uuid_id, file_path, file_hash, created_at, last_updated) "
-                    "VALUES (?, ?, ?, ?, ?)"
-                )
-                temp = conn.cursor().execute(tracks_sql_query, tracks_entry)
+                temp = conn.cursor().execute(_INSERT_TRACK_SQL, _track_row(track))
                 track_db_id = temp.lastrowid
 
                 # Insert trackmetadata
-                trackmetadata_entry = (
-                    track_db_id,
-                    track.uuid_id,
-                    metadata.title,
-                    metadata.artist,
-                    metadata.album,
-                    metadata.album_artist,
-                    artist_id,
-                    album_id,
-                    metadata.year,
-                    metadata.date,
-                    metadata.genre,
-                    metadata.track_number,
-                    metadata.disc_number,
-                    metadata.codec,
-                    metadata.duration,
-                    metadata.bitrate_kbps,
-                    metadata.sample_rate_hz,
-                    metadata.channels,
-                    metadata.has_album_art,
+                conn.cursor().execute(
+                    _INSERT_TRACKMETADATA_SQL,
+                    _trackmetadata_row(track, track_db_id, artist_id, album_id),
                 )
-                trackmetadata_sql_query = (
-                    "INSERT INTO trackmetadata (track_id, uuid_id, title, artist, album, album_artist, "
-                    'artist_id, album_id, "year", "date", genre, track_number, disc_number, codec, duration, '
-                    "bitrate_kbps, sample_rate_hz, channels, has_album_art) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                self._add_to_aggregates(
+                    conn, [_aggregate_entry(track, artist_id, album_id)]
                 )
-                conn.cursor().execute(trackmetadata_sql_query, trackmetadata_entry)
 
                 # Insert into FTS for tracks
-                fts_title = metadata.title or ""
-                fts_artist = effective_artist or ""
-                fts_album = album_name if has_album else ""
                 conn.execute(
-                    "INSERT INTO fts_tracks(rowid, title, artist_name, album_name) VALUES (?, ?, ?, ?)",
-                    (track_db_id, fts_title, fts_artist, fts_album),
+                    _INSERT_FTS_TRACK_SQL,
+                    _fts_track_row(track, track_db_id, effective_artist),
                 )
+                self._id_cache.put_all(resolved)
 
+            self._forget_stream_info([track.uuid_id])
             return True
         except Exception as e:
             print(f"Failed to add track {track}. {e}")
             return False
 
-    def _upsert_artist(self, conn, effective_artist: str) -> int:
+    def add_tracks(
+        self, tracks: List[Track], chunk_size: int = 500, timeout: float = 5
+    ) -> List[bool]:
+        """Add many tracks, committing once per chunk of ``chunk_size`` tracks.
+
+        Returns one bool per input track, in order. A track that fails (empty
+        metadata, duplicate uuid/hash, ...) is reported as False without
+        rolling back the rest of its chunk.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        results: List[bool] = [False] * len(tracks)
+        for chunk_start in range(0, len(tracks), chunk_size):
+            chunk_indexes = [
+                i
+                for i in range(chunk_start, min(chunk_start + chunk_size, len(tracks)))
+                if not tracks[i].metadata.is_empty()
+            ]
+            if not chunk_indexes:
+                continue
+
+            try:
+                with self._connection(commit=True, timeout=timeout) as conn:
+                    conn.execute("BEGIN")
+                    conn.execute("SAVEPOINT add_tracks_chunk")
+                    try:
+                        self._insert_tracks(conn, [tracks[i] for i in chunk_indexes])
+                        conn.execute("RELEASE add_tracks_chunk")
+                        for i in chunk_indexes:
+                            results[i] = True
+                    except sqlite3.Error as e:
+                        # Something in the chunk is bad; retry row by row so the
+                        # good tracks still go in.
+                        print(f"Bulk insert failed, retrying tracks one by one. {e}")
+                        conn.execute("ROLLBACK TO add_tracks_chunk")
+                        conn.execute("RELEASE add_tracks_chunk")
+                        for i in chunk_indexes:
+                            results[i] = self._insert_track_isolated(conn, tracks[i])
+            except Exception as e:
+                print(f"Failed to add tracks chunk starting at {chunk_start}. {e}")
+                for i in chunk_indexes:
+                    results[i] = False
+
+        self._forget_stream_info([track.uuid_id for track in tracks])
+        return results
+
+    def _insert_track_isolated(self, conn, track: Track) -> bool:
+        conn.execute("SAVEPOINT add_tracks_row")
+        try:
+            self._insert_tracks(conn, [track])
+            conn.execute("RELEASE add_tracks_row")
+            return True
+        except sqlite3.Error as e:
+            print(f"Failed to add track {track}. {e}")
+            conn.execute("ROLLBACK TO add_tracks_row")
+            conn.execute("RELEASE add_tracks_row")
+            return False
+
+    def _insert_tracks(self, conn, tracks: List[Track]):
+        # Resolve each distinct artist and album once for the whole batch.
+        # Albums are upserted with the highest year seen in the batch, which
+        # leaves them in the same state as adding the tracks one at a time.
+        effective_artists = [_effective_artist(track.metadata) for track in tracks]
+
+        # Only cached if the whole batch goes in; the caller rolls it back otherwise.
+        resolved: Dict[tuple, Any] = {}
+        artist_ids: dict[str, int] = {}
+        for effective_artist in effective_artists:
+            if effective_artist and effective_artist not in artist_ids:
+                artist_ids[effective_artist] = self._upsert_artist(
+                    conn, effective_artist, resolved
+                )
+
+        album_keys: List[Optional[tuple]] = []
+        album_years: dict[tuple, Optional[int]] = {}
+        for track, effective_artist in zip(tracks, effective_artists):
+            if not effective_artist:
+                album_keys.append(None)
+                continue
+            album_name = _album_name(track.metadata)
+            year = track.metadata.year
+            if album_name is None:
+                key = (effective_artist, None, year)
+            else:
+                key = (effective_artist, album_name, None)
+            album_keys.append(key)
+            if key not in album_years:
+                album_years[key] = year
+            elif year is not None:
+                current = album_years[key]
+                album_years[key] = year if current is None else max(current, year)
+
+        album_ids: dict[tuple, int] = {}
+        for key, year in album_years.items():
+            effective_artist, album_name, _ = key
+            album_ids[key] = self._upsert_album(
+                conn, album_name, artist_ids[effective_artist], year, effective_artist, resolved
+            )
+
+        conn.executemany(_INSERT_TRACK_SQL, [_track_row(track) for track in tracks])
+
+        uuid_ids = [track.uuid_id for track in tracks]
+        placeholders = ", ".join("?" for _ in uuid_ids)
+        track_db_ids = {
+            row["uuid_id"]: row["id"]
+            for row in conn.execute(
+                f"SELECT id, uuid_id FROM tracks WHERE uuid_id IN ({placeholders})",
+                uuid_ids,
+            )
+        }
+
+        trackmetadata_rows = []
+        aggregate_entries = []
+        fts_rows = []
+        for track, effective_artist, key in zip(tracks, effective_artists, album_keys):
+            track_db_id = track_db_ids[track.uuid_id]
+            artist_id = artist_ids[effective_artist] if effective_artist else None
+            album_id = album_ids[key] if key is not None else None
+            trackmetadata_rows.append(
+                _trackmetadata_row(track, track_db_id, artist_id, album_id)
+            )
+            aggregate_entries.append(_aggregate_entry(track, artist_id, album_id))
+            fts_rows.append(_fts_track_row(track, track_db_id, effective_artist))
+
+        conn.executemany(_INSERT_TRACKMETADATA_SQL, trackmetadata_rows)
+        self._add_to_aggregates(conn, aggregate_entries)
+        conn.executemany(_INSERT_FTS_TRACK_SQL, fts_rows)
+        self._id_cache.put_all(resolved)
+
+    def _upsert_artist(self, conn, effective_artist: str, resolved: Dict[tuple, Any]) -> int:
+        """Id of effective_artist, inserting it if needed. Adds what it
+        resolved to ``resolved`` for the caller to cache."""
+        key = ("artist", effective_artist)
+        artist_id = self._id_cache.get(key)
+        if artist_id is not None:
+            return artist_id
+
         conn.execute(
             'INSERT OR IGNORE INTO artists ("name") VALUES (?)',
             (effective_artist,),
@@ -318,13 +1057,37 @@ class Database:
                 (artist_id, effective_artist),
             )
 
+        resolved[key] = artist_id
         return artist_id
 
     def _upsert_album(
-        self, conn, album_name: str | None, artist_id: int, year: int | None, effective_artist: str
+        self,
+        conn,
+        album_name: str | None,
+        artist_id: int,
+        year: int | None,
+        effective_artist: str,
+        resolved: Dict[tuple, Any],
     ) -> int:
+        """Id of the album, inserting it if needed. Adds what it resolved to
+        ``resolved`` for the caller to cache."""
         if album_name is not None:
             # Regular album
+            key = ("album", artist_id, album_name)
+            cached = self._id_cache.get(key)
+            if cached is not None:
+                album_id, album_year = cached
+                # Update year if new track's year is higher. The cached year
+                # can be behind (another spelling of the name raised it), so
+                # the database still gets the final say.
+                if year is not None and (album_year is None or album_year < year):
+                    conn.execute(
+                        "UPDATE albums SET year = ? WHERE id = ? AND (year IS NULL OR year < ?)",
+                        (year, album_id, year),
+                    )
+                    resolved[key] = (album_id, year)
+                return album_id
+
             conn.execute(
                 'INSERT OR IGNORE INTO albums ("name", "artist_id", "year", "is_single_grouping") '
                 "VALUES (?, ?, ?, 0)",
@@ -339,7 +1102,7 @@ class Database:
                 (year, album_name, artist_id, year),
             )
             row = conn.execute(
-                "SELECT id FROM albums WHERE name_lower = LOWER(?) AND artist_id = ? AND is_single_grouping = 0",
+                "SELECT id, year FROM albums WHERE name_lower = LOWER(?) AND artist_id = ? AND is_single_grouping = 0",
                 (album_name, artist_id),
             ).fetchone()
             album_id = row["id"]
@@ -349,8 +1112,14 @@ class Database:
                     "INSERT INTO fts_albums(rowid, name, artist_name) VALUES (?, ?, ?)",
                     (album_id, album_name, effective_artist),
                 )
+            resolved[key] = (album_id, row["year"])
         else:
             # Single grouping
+            key = ("single", artist_id, year)
+            album_id = self._id_cache.get(key)
+            if album_id is not None:
+                return album_id
+
             conn.execute(
                 'INSERT OR IGNORE INTO albums ("name", "artist_id", "year", "is_single_grouping") '
                 "VALUES (NULL, ?, ?, 1)",
@@ -368,209 +1137,447 @@ class Database:
                     "INSERT INTO fts_albums(rowid, name, artist_name) VALUES (?, ?, ?)",
                     (album_id, "", effective_artist),
                 )
+            resolved[key] = album_id
 
         return album_id
 
+    def _add_to_aggregates(self, conn, entries: Sequence[tuple]):
+        """Count inserted tracks into albums and artists, one UPDATE per album
+        and artist rather than per track."""
+        albums, artists = _aggregate_deltas(entries)
+        conn.executemany(
+            "UPDATE albums SET track_count = track_count + ?, "
+            "total_duration = total_duration + ?, "
+            "has_album_art = MAX(has_album_art, ?) WHERE id = ?",
+            [(count, duration, int(art > 0), album_id) for album_id, (count, duration, art) in albums.items()],
+        )
+        conn.executemany(
+            "UPDATE artists SET track_count = track_count + ?, "
+            "total_duration = total_duration + ?, "
+            "max_year = COALESCE(MAX(max_year, ?), max_year, ?) WHERE id = ?",
+            [
+                (count, duration, year, year, artist_id)
+                for artist_id, (count, duration, year) in artists.items()
+            ],
+        )
+
+    def _remove_from_aggregates(self, conn, entries: Sequence[tuple]):
+        """Take deleted tracks out of albums and artists. Runs after the
+        trackmetadata rows are gone, since has_album_art and max_year are
+        recomputed from what is left when a deleted track may have set them.
+        total_duration is recomputed too: subtracting floats leaves rounding
+        error behind that would build up with every delete."""
+        albums, artists = _aggregate_deltas(entries)
+        conn.executemany(
+            "UPDATE albums SET track_count = track_count - ?, total_duration = ("
+            "SELECT COALESCE(SUM(tm.duration), 0) FROM trackmetadata tm WHERE tm.album_id = albums.id"
+            ") WHERE id = ?",
+            [(count, album_id) for album_id, (count, _, _) in albums.items()],
+        )
+        conn.executemany(
+            "UPDATE albums SET has_album_art = EXISTS("
+            "SELECT 1 FROM trackmetadata tm WHERE tm.album_id = albums.id AND tm.has_album_art = 1"
+            ") WHERE id = ? AND track_count > 0",
+            [(album_id,) for album_id, (_, _, art) in albums.items() if art],
+        )
+        conn.executemany(
+            "UPDATE artists SET track_count = track_count - ?, total_duration = ("
+            "SELECT COALESCE(SUM(tm.duration), 0) FROM trackmetadata tm WHERE tm.artist_id = artists.id"
+            ") WHERE id = ?",
+            [(count, artist_id) for artist_id, (count, _, _) in artists.items()],
+        )
+        conn.executemany(
+            "UPDATE artists SET max_year = ("
+            "SELECT MAX(tm.year) FROM trackmetadata tm WHERE tm.artist_id = artists.id"
+            ") WHERE id = ? AND track_count > 0 AND max_year <= ?",
+            [
+                (artist_id, year)
+                for artist_id, (_, _, year) in artists.items()
+                if year is not None
+            ],
+        )
+
     def delete_track(self, uuid_id: str, timeout: float = 5) -> bool:
+        deleted = self.delete_tracks([uuid_id], timeout=timeout)
+        if deleted == 0:
+            print(f"Failed to delete track {uuid_id}. No rows deleted")
+        return bool(deleted)
+
+    def delete_tracks(self, uuid_ids: Sequence[str], timeout: float = 5) -> int | None:
+        """Delete tracks, and the albums and artists left without tracks, in
+        one transaction. Returns how many tracks were deleted; unknown uuids
+        are skipped.
+
+        The statement count does not grow with the number of tracks: the
+        aggregate columns are updated once per album and artist, the orphans
+        are the ones whose track_count dropped to 0, and the FTS 'delete'
+        commands are batched.
+        """
+        if not uuid_ids:
+            return 0
+        uuid_json = json.dumps(list(uuid_ids))
         try:
             with self._connection(commit=True, timeout=timeout) as conn:
                 # Fetch metadata before deletion for FTS cleanup
-                meta_row = conn.execute(
+                meta_rows = conn.execute(
                     "SELECT tm.track_id, tm.artist_id, tm.album_id, tm.title, "
-                    "tm.artist, tm.album, tm.album_artist "
-                    "FROM trackmetadata tm WHERE tm.uuid_id = ?",
-                    (uuid_id,),
-                ).fetchone()
-
-                if meta_row is None:
-                    raise ValueError("No rows deleted")
-
-                track_db_id = meta_row["track_id"]
-                artist_id = meta_row["artist_id"]
-                album_id = meta_row["album_id"]
-                fts_title = meta_row["title"] or ""
-
-                # Determine effective artist and album for FTS delete
-                effective_artist = ""
-                if meta_row["album_artist"] and meta_row["album_artist"].strip():
-                    effective_artist = meta_row["album_artist"].strip()
-                elif meta_row["artist"] and meta_row["artist"].strip():
-                    effective_artist = meta_row["artist"].strip()
-
-                fts_album = meta_row["album"] or ""
-
-                # Delete trackmetadata and tracks
+                    "tm.artist, tm.album, tm.album_artist, tm.duration, tm.year, "
+                    "tm.has_album_art "
+                    "FROM trackmetadata tm "
+                    "WHERE tm.uuid_id IN (SELECT value FROM json_each(?))",
+                    (uuid_json,),
+                ).fetchall()
+                if not meta_rows:
+                    return 0
+
+                conn.executemany(
+                    "INSERT INTO fts_tracks(fts_tracks, rowid, title, artist_name, album_name) "
+                    "VALUES('delete', ?, ?, ?, ?)",
+                    [
+                        (
+                            row["track_id"],
+                            row["title"] or "",
+                            _stored_effective_artist(row),
+                            row["album"] or "",
+                        )
+                        for row in meta_rows
+                    ],
+                )
+                track_json = json.dumps([row["track_id"] for row in meta_rows])
                 conn.execute(
-                    "DELETE FROM trackmetadata WHERE uuid_id = ?", (uuid_id,)
+                    "DELETE FROM trackmetadata WHERE track_id IN (SELECT value FROM json_each(?))",
+                    (track_json,),
                 )
-                conn.execute("DELETE FROM tracks WHERE uuid_id = ?", (uuid_id,))
-
-                # Delete from FTS for tracks
                 conn.execute(
-                    "INSERT INTO fts_tracks(fts_tracks, rowid, title, artist_name, album_name) "
-                    "VALUES('delete', ?, ?, ?, ?)",
-                    (track_db_id, fts_title, effective_artist, fts_album),
+                    "DELETE FROM tracks WHERE id IN (SELECT value FROM json_each(?))",
+                    (track_json,),
                 )
 
-                # Cleanup orphaned album
-                if album_id is not None:
-                    remaining = conn.execute(
-                        "SELECT COUNT(*) FROM trackmetadata WHERE album_id = ?",
-                        (album_id,),
-                    ).fetchone()[0]
-                    if remaining == 0:
-                        album_row = conn.execute(
-                            "SELECT name FROM albums WHERE id = ?", (album_id,)
-                        ).fetchone()
-                        album_name_for_fts = album_row["name"] or "" if album_row else ""
-                        conn.execute(
-                            "INSERT INTO fts_albums(fts_albums, rowid, name, artist_name) "
-                            "VALUES('delete', ?, ?, ?)",
-                            (album_id, album_name_for_fts, effective_artist),
-                        )
-                        conn.execute("DELETE FROM albums WHERE id = ?", (album_id,))
-
-                # Cleanup orphaned artist
-                if artist_id is not None:
-                    remaining = conn.execute(
-                        "SELECT COUNT(*) FROM trackmetadata WHERE artist_id = ?",
-                        (artist_id,),
-                    ).fetchone()[0]
-                    if remaining == 0:
-                        artist_row = conn.execute(
-                            "SELECT name FROM artists WHERE id = ?", (artist_id,)
-                        ).fetchone()
-                        artist_name_for_fts = artist_row["name"] if artist_row else ""
-                        conn.execute(
-                            "INSERT INTO fts_artists(fts_artists, rowid, name) "
-                            "VALUES('delete', ?, ?)",
-                            (artist_id, artist_name_for_fts),
-                        )
-                        conn.execute(
-                            "DELETE FROM artists WHERE id = ?", (artist_id,)
+                self._remove_from_aggregates(
+                    conn,
+                    [
+                        (
+                            row["artist_id"],
+                            row["album_id"],
+                            row["duration"],
+                            row["year"],
+                            row["has_album_art"],
                         )
+                        for row in meta_rows
+                    ],
+                )
 
-            return True
-        except Exception as e:
-            print(f"Failed to delete track {uuid_id}. {e}")
-            return False
+                # Cleanup orphaned albums, then artists: the ones the deleted
+                # tracks were counted in whose count is now 0.
+                album_json = json.dumps(
+                    list({row["album_id"] for row in meta_rows if row["album_id"] is not None})
+                )
+                orphaned_albums = conn.execute(
+                    "SELECT al.id, al.name, ar.name AS artist_name FROM albums al "
+                    "LEFT JOIN artists ar ON ar.id = al.artist_id "
+                    "WHERE al.id IN (SELECT value FROM json_each(?)) AND al.track_count = 0",
+                    (album_json,),
+                ).fetchall()
+                if orphaned_albums:
+                    conn.executemany(
+                        "INSERT INTO fts_albums(fts_albums, rowid, name, artist_name) "
+                        "VALUES('delete', ?, ?, ?)",
+                        [
+                            (row["id"], row["name"] or "", row["artist_name"] or "")
+                            for row in orphaned_albums
+                        ],
+                    )
+                    conn.execute(
+                        "DELETE FROM albums WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps([row["id"] for row in orphaned_albums]),),
+                    )
 
-    def get_tracks(
-        self,
-        search_parameters: List[SearchParameter] | None = None,
-        order_parameters: List[OrderParameter] | None = None,
-        row_filter_parameters: List[RowFilterParameter] | None = None,
-        artist_id: Optional[int] = None,
-        album_id: Optional[int] = None,
-        timeout: float = 5,
-        limit: int = 100,
-        offset: int = 0,
-    ) -> List[Track]:
-        if search_parameters is None:
-            search_parameters = []
-        if order_parameters is None:
-            order_parameters = []
-        if row_filter_parameters is None:
-            row_filter_parameters = []
-        if album_id is not None and artist_id is None:
-            raise ValueError("Cannot filter by album without artist")
+                artist_json = json.dumps(
+                    list({row["artist_id"] for row in meta_rows if row["artist_id"] is not None})
+                )
+                orphaned_artists = conn.execute(
+                    "SELECT ar.id, ar.name FROM artists ar "
+                    "WHERE ar.id IN (SELECT value FROM json_each(?)) AND ar.track_count = 0",
+                    (artist_json,),
+                ).fetchall()
+                if orphaned_artists:
+                    conn.executemany(
+                        "INSERT INTO fts_artists(fts_artists, rowid, name) "
+                        "VALUES('delete', ?, ?)",
+                        [(row["id"], row["name"]) for row in orphaned_artists],
+                    )
+                    conn.execute(
+                        "DELETE FROM artists WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps([row["id"] for row in orphaned_artists]),),
+                    )
 
-        if limit <= 0 or limit > 1000 or offset < 0:
-            print(
-                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_tracks"
-            )
-            raise ValueError
+                if orphaned_albums or orphaned_artists:
+                    self._id_cache.clear()
 
-        allowed_columns = set(ALLOWED_TRACK_COLUMNS + ALLOWED_METADATA_COLUMNS)
-        search_columns = set([param.column for param in search_parameters])
-        order_columns = set([order.column for order in order_parameters])
-        invalid_search_columns = search_columns - allowed_columns
-        invalid_order_columns = order_columns - allowed_columns
+            self._forget_stream_info(list(uuid_ids))
+            return len(meta_rows)
+        except Exception as e:
+            print(f"Failed to delete {len(uuid_ids)} tracks. {e}")
+            return None
 
-        if invalid_search_columns:
-            print(
-                f"columns {invalid_search_columns} are not allowed as a search parameter"
-            )
-            raise ValueError
+    def find_hash_candidates(
+        self, prefilter_key: str, timeout: float = 5
+    ) -> List[HashCandidate]:
+        """Tracks whose file_hash is prefilter_key, with or without a full digest.
 
-        if invalid_order_columns:
-            print(
-                f"columns {invalid_order_columns} are not allowed as a search parameter"
+        file_hash is either the key itself or "<key>:<digest>", so this is a
+        range scan on the file_hash UNIQUE index (';' sorts right after ':').
+        """
+        try:
+            with self._connection(timeout=timeout) as conn:
+                rows = conn.execute(
+                    "SELECT uuid_id, file_path, file_hash FROM tracks "
+                    "WHERE file_hash >= ? AND file_hash < ?",
+                    (prefilter_key, prefilter_key + ";"),
+                ).fetchall()
+        except Exception as e:
+            print(f"Failed to find hash candidates for {prefilter_key}. {e}")
+            return []
+
+        return [
+            HashCandidate(
+                uuid_id=row["uuid_id"],
+                file_path=Path(row["file_path"]),
+                file_hash=row["file_hash"],
             )
-            raise ValueError
+            for row in rows
+            if row["file_hash"] == prefilter_key
+            or row["file_hash"].startswith(prefilter_key + ":")
+        ]
 
-        search_query = (
-            "SELECT "
-            'tm.uuid_id, tm.title, tm.artist, tm.album, tm.album_artist, '
-            'tm.artist_id, tm.album_id, tm."year", '
-            'tm."date", tm.genre, tm.track_number, tm.disc_number, tm.codec, tm.duration, '
-            "tm.bitrate_kbps, tm.sample_rate_hz, tm.channels, tm.has_album_art, t.file_path, "
-            "t.file_hash, t.created_at, t.last_updated "
-            "FROM trackmetadata AS tm "
-            "JOIN tracks AS t ON "
-            " tm.uuid_id = t.uuid_id"
-        )
-        search_clauses = []
-        search_values: list = []
-
-        for param in search_parameters:
-            column = param.column
-            value = param.value
-            operator = param.operator
-            alias = alias_map(column)
-            if value is None:
-                search_clauses.append(f'{alias}."{column}" IS NULL')
-            else:
-                search_clauses.append(f'{alias}."{column}" {operator} ?')
-                search_values.append(value)
+    def set_file_hash(self, uuid_id: str, file_hash: str, timeout: float = 5) -> bool:
+        try:
+            with self._connection(commit=True, timeout=timeout) as conn:
+                cursor = conn.execute(
+                    "UPDATE tracks SET file_hash = ? WHERE uuid_id = ?",
+                    (file_hash, uuid_id),
+                )
+            return cursor.rowcount == 1
+        except Exception as e:
+            print(f"Failed to set file hash of {uuid_id}. {e}")
+            return False
 
-        if artist_id is not None:
-            search_clauses.append('tm."artist_id" = ?')
-            search_values.append(artist_id)
-        if album_id is not None:
-            search_clauses.append('tm."album_id" = ?')
-            search_values.append(album_id)
+    def get_track_file_paths(self, timeout: float = 5) -> Dict[str, str] | None:
+        """file_path -> uuid_id of every track."""
+        try:
+            with self._connection(timeout=timeout) as conn:
+                rows = conn.execute("SELECT uuid_id, file_path FROM tracks").fetchall()
+        except Exception as e:
+            print(f"Failed to get track file paths. {e}")
+            return None
+        return {row["file_path"]: row["uuid_id"] for row in rows}
 
-        if row_filter_parameters and order_parameters:
-            cursor_clause, cursor_values = filter_for_cursor(
-                row_filter_parameters, order_parameters
-            )
-            if cursor_clause:
-                search_clauses.append("(" + cursor_clause + ")")
-                search_values.extend(cursor_values)
+    def get_file_snapshot(
+        self, root: Path, timeout: float = 5
+    ) -> Dict[str, FileSnapshot] | None:
+        """The stored snapshot of every file under root, keyed by path."""
+        prefix = os.path.join(str(root), "")
+        try:
+            with self._connection(timeout=timeout) as conn:
+                # A range scan on the primary key: everything starting with prefix.
+                rows = conn.execute(
+                    "SELECT path, size, mtime_ns FROM file_snapshots "
+                    "WHERE path >= ? AND path < ?",
+                    (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+                ).fetchall()
+        except Exception as e:
+            print(f"Failed to get the file snapshot of {root}. {e}")
+            return None
+        return {row[0]: FileSnapshot(*row) for row in rows}
+
+    def update_file_snapshot(
+        self,
+        changed: Sequence[FileSnapshot],
+        removed: Sequence[str],
+        timeout: float = 5,
+    ) -> bool:
+        try:
+            with self._connection(commit=True, timeout=timeout) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_snapshots (path, size, mtime_ns) "
+                    "VALUES (?, ?, ?)",
+                    changed,
+                )
+                conn.executemany(
+                    "DELETE FROM file_snapshots WHERE path = ?",
+                    [(path,) for path in removed],
+                )
+            return True
+        except Exception as e:
+            print(f"Failed to update the file snapshot. {e}")
+            return False
 
-        if search_clauses:
-            search_query += " WHERE " + " AND ".join(search_clauses)
+    def add_ingest_jobs(self, source_paths: Sequence[str], timeout: float = 5) -> bool:
+        """Record new jobs as discovered. A path with an unfinished job is left alone."""
+        return self._write_ingest_jobs(
+            "INSERT INTO ingest_jobs (source_path, state) VALUES (?, 'discovered') "
+            "ON CONFLICT (source_path) WHERE state != 'indexed' DO NOTHING",
+            [(path,) for path in source_paths],
+            timeout,
+        )
 
-        order_clauses = []
+    def set_ingest_jobs_probed(
+        self, jobs: Sequence[Tuple[str, str | None, str | None]], timeout: float = 5
+    ) -> bool:
+        """(source_path, planned library_path, file_hash) for each probed job.
+
+        Creates the job if there is none yet (archive members start here).
+        Like every transition, this only moves a job forward, so replaying it
+        after a restart is harmless.
+        """
+        return self._write_ingest_jobs(
+            "INSERT INTO ingest_jobs (source_path, state, library_path, file_hash) "
+            "VALUES (?, 'probed', ?, ?) "
+            "ON CONFLICT (source_path) WHERE state != 'indexed' DO UPDATE SET "
+            "state = 'probed', library_path = excluded.library_path, "
+            "file_hash = excluded.file_hash, updated_at = unixepoch() "
+            "WHERE state IN ('discovered', 'probed')",
+            jobs,
+            timeout,
+        )
 
-        for order in order_parameters:
-            column = order.column
-            value = "ASC" if order.isAscending else "DESC"
-            alias = alias_map(column)
-            order_clauses.append(f'{alias}."{column}" {value.upper()}')
+    def set_ingest_jobs_moved(
+        self, jobs: Sequence[Tuple[str, str]], timeout: float = 5
+    ) -> bool:
+        """(source_path, library_path) for each job whose file is in the library."""
+        return self._write_ingest_jobs(
+            "UPDATE ingest_jobs SET state = 'moved', library_path = ?, "
+            "updated_at = unixepoch() "
+            "WHERE source_path = ? AND state IN ('discovered', 'probed')",
+            [(library_path, source_path) for source_path, library_path in jobs],
+            timeout,
+        )
 
-        if order_clauses:
-            search_query += " ORDER BY " + " , ".join(order_clauses)
+    def set_ingest_jobs_indexed(
+        self, library_paths: Sequence[str], timeout: float = 5
+    ) -> bool:
+        return self._write_ingest_jobs(
+            "UPDATE ingest_jobs SET state = 'indexed', updated_at = unixepoch() "
+            "WHERE library_path = ? AND state IN ('probed', 'moved')",
+            [(path,) for path in library_paths],
+            timeout,
+        )
 
-        search_query += " LIMIT " + str(limit) + " OFFSET " + str(offset)
+    def delete_ingest_jobs(self, source_paths: Sequence[str], timeout: float = 5) -> bool:
+        """Forget unfinished jobs that were dropped on purpose."""
+        return self._write_ingest_jobs(
+            "DELETE FROM ingest_jobs WHERE source_path = ? AND state != 'indexed'",
+            [(path,) for path in source_paths],
+            timeout,
+        )
 
+    def prune_ingest_jobs(self, timeout: float = 5) -> int:
+        """Delete indexed jobs. Returns how many, or -1 on failure."""
         try:
-            with self._connection(timeout=timeout) as conn:
-                rows = (
-                    conn.cursor().execute(search_query, tuple(search_values)).fetchall()
-                )
+            with self._connection(commit=True, timeout=timeout) as conn:
+                cursor = conn.execute("DELETE FROM ingest_jobs WHERE state = 'indexed'")
+            return cursor.rowcount
         except Exception as e:
-            print(
-                f"Failed to search database. search_parameters: {search_parameters}. Exception: {e}"
-            )
-            return []
+            print(f"Failed to prune ingest jobs. {e}")
+            return -1
 
-        tracks: List[Track] = [_row_to_track(row) for row in rows]
+    def get_unfinished_ingest_jobs(self, timeout: float = 5) -> List[IngestJob] | None:
+        try:
+            with self._connection(timeout=timeout) as conn:
+                rows = conn.execute(
+                    "SELECT source_path, state, library_path, file_hash "
+                    "FROM ingest_jobs WHERE state != 'indexed' ORDER BY id"
+                ).fetchall()
+        except Exception as e:
+            print(f"Failed to get unfinished ingest jobs. {e}")
+            return None
+        return [
+            IngestJob(
+                source_path=Path(row["source_path"]),
+                state=row["state"],
+                library_path=(
+                    Path(row["library_path"]) if row["library_path"] is not None else None
+                ),
+                file_hash=row["file_hash"],
+            )
+            for row in rows
+        ]
+
+    def _write_ingest_jobs(
+        self, sql: str, rows: Sequence[Sequence[Any]], timeout: float
+    ) -> bool:
+        if not rows:
+            return True
+        try:
+            with self._connection(commit=True, timeout=timeout) as conn:
+                conn.executemany(sql, rows)
+            return True
+        except Exception as e:
+            print(f"Failed to write {len(rows)} ingest jobs. {e}")
+            return False
 
-        return tracks
+    def get_stream_info(self, uuid_id: str, timeout: float = 5) -> StreamInfo | None:
+        """Primary-key lookup of a track's file for streaming, served from an LRU cache.
 
-    def get_tracks_count(
+        Returns None if there is no such track. A missing file is reported
+        with file_size None and is not cached.
+        """
+        cached = self.peek_stream_info(uuid_id)
+        if cached is not None:
+            return cached
+
+        generation = self._write_generation
+        try:
+            with self._connection(timeout=timeout) as conn:
+                row = conn.execute(
+                    "SELECT t.file_path, tm.codec FROM tracks AS t "
+                    "JOIN trackmetadata AS tm ON tm.track_id = t.id "
+                    "WHERE t.uuid_id = ?",
+                    (uuid_id,),
+                ).fetchone()
+        except Exception as e:
+            print(f"Failed to get stream info for {uuid_id}. {e}")
+            return None
+
+        if row is None:
+            return None
+
+        file_path = Path(row["file_path"])
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return StreamInfo(
+                file_path=file_path, codec=row["codec"], file_size=None, mtime=None
+            )
+
+        info = StreamInfo(
+            file_path=file_path,
+            codec=row["codec"],
+            file_size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+        )
+        with self._stream_info_lock:
+            # A write that landed while we were reading may have made this stale.
+            if generation == self._write_generation:
+                self._stream_info_cache[uuid_id] = info
+                if len(self._stream_info_cache) > STREAM_INFO_CACHE_MAX_ENTRIES:
+                    self._stream_info_cache.popitem(last=False)
+        return info
+
+    def peek_stream_info(self, uuid_id: str) -> StreamInfo | None:
+        """Cached stream info only; never touches the database or the filesystem."""
+        with self._stream_info_lock:
+            info = self._stream_info_cache.get(uuid_id)
+            if info is not None:
+                self._stream_info_cache.move_to_end(uuid_id)
+            return info
+
+    def _forget_stream_info(self, uuid_ids: List[str]):
+        with self._stream_info_lock:
+            for uuid_id in uuid_ids:
+                self._stream_info_cache.pop(uuid_id, None)
+
+    def get_tracks(
         self,
         search_parameters: List[SearchParameter] | None = None,
         order_parameters: List[OrderParameter] | None = None,
@@ -578,66 +1585,237 @@ class Database:
         artist_id: Optional[int] = None,
         album_id: Optional[int] = None,
         timeout: float = 5,
-    ) -> int | None:
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[Track]:
+        if limit <= 0 or limit > 1000 or offset < 0:
+            print(
+                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_tracks"
+            )
+            raise ValueError
+
+        tracks = self._select_tracks(
+            search_parameters=search_parameters,
+            order_parameters=order_parameters,
+            row_filter_parameters=row_filter_parameters,
+            artist_id=artist_id,
+            album_id=album_id,
+            timeout=timeout,
+            limit=limit,
+            offset=offset,
+        )
+        return tracks if tracks is not None else []
+
+    def get_tracks_page(
+        self,
+        search_parameters: List[SearchParameter] | None = None,
+        order_parameters: List[OrderParameter] | None = None,
+        row_filter_parameters: List[RowFilterParameter] | None = None,
+        artist_id: Optional[int] = None,
+        album_id: Optional[int] = None,
+        timeout: float = 5,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Page[Track] | None:
+        """Like get_tracks, but fetches one extra row to tell whether more pages exist."""
+        if limit <= 0 or limit > 1000 or offset < 0:
+            print(
+                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_tracks_page"
+            )
+            raise ValueError
+
+        tracks = self._select_tracks(
+            search_parameters=search_parameters,
+            order_parameters=order_parameters,
+            row_filter_parameters=row_filter_parameters,
+            artist_id=artist_id,
+            album_id=album_id,
+            timeout=timeout,
+            limit=limit + 1,
+            offset=offset,
+        )
+        if tracks is None:
+            return None
+        return Page(items=tracks[:limit], has_more=len(tracks) > limit)
+
+    def get_track_rows_page(
+        self,
+        search_parameters: List[SearchParameter] | None = None,
+        order_parameters: List[OrderParameter] | None = None,
+        row_filter_parameters: List[RowFilterParameter] | None = None,
+        artist_id: Optional[int] = None,
+        album_id: Optional[int] = None,
+        timeout: float = 5,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Page[sqlite3.Row] | None:
+        """Like get_tracks_page, but returns the raw sqlite3 rows instead of Track models.
+
+        Used by the /tracks endpoint to serialize pages without building and
+        validating a model per row.
+        """
+        if limit <= 0 or limit > 1000 or offset < 0:
+            print(
+                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_track_rows_page"
+            )
+            raise ValueError
+
+        rows = self._select_tracks(
+            search_parameters=search_parameters,
+            order_parameters=order_parameters,
+            row_filter_parameters=row_filter_parameters,
+            artist_id=artist_id,
+            album_id=album_id,
+            timeout=timeout,
+            limit=limit + 1,
+            offset=offset,
+            row_function=None,
+        )
+        if rows is None:
+            return None
+        return Page(items=rows[:limit], has_more=len(rows) > limit)
+
+    def _select_tracks(
+        self,
+        search_parameters: List[SearchParameter] | None,
+        order_parameters: List[OrderParameter] | None,
+        row_filter_parameters: List[RowFilterParameter] | None,
+        artist_id: Optional[int],
+        album_id: Optional[int],
+        timeout: float,
+        limit: int,
+        offset: int,
+        row_function: Callable[[sqlite3.Row], Any] | None = _row_to_track,
+    ) -> list | None:
         if search_parameters is None:
             search_parameters = []
         if order_parameters is None:
             order_parameters = []
         if row_filter_parameters is None:
             row_filter_parameters = []
-        if album_id is not None and artist_id is None:
-            raise ValueError("Cannot filter by album without artist")
 
-        search_query = (
-            "SELECT COUNT(*) FROM tracks as t "
-            "JOIN trackmetadata AS tm ON "
-            " t.uuid_id = tm.uuid_id"
+        compiled = self._query_cache.get(
+            (
+                "tracks",
+                _tracks_shape(
+                    search_parameters,
+                    order_parameters,
+                    row_filter_parameters,
+                    artist_id,
+                    album_id,
+                ),
+            ),
+            lambda: _compile_tracks_select(
+                search_parameters,
+                order_parameters,
+                row_filter_parameters,
+                artist_id,
+                album_id,
+            ),
+        )
+        values = compiled.bind(
+            _tracks_sources(
+                search_parameters, row_filter_parameters, artist_id, album_id
+            )
+            | {"limit": (limit,), "offset": (offset,)}
         )
 
-        search_clauses = []
-        search_values: list = []
+        try:
+            with self._connection(timeout=timeout) as conn:
+                rows = conn.cursor().execute(compiled.sql, values).fetchall()
+        except Exception as e:
+            print(
+                f"Failed to search database. search_parameters: {search_parameters}. Exception: {e}"
+            )
+            return None
 
-        for param in search_parameters:
-            column = param.column
-            value = param.value
-            operator = param.operator
-            alias = alias_map(column)
-            if value is None:
-                search_clauses.append(f'{alias}."{column}" IS NULL')
-            else:
-                search_clauses.append(f'{alias}."{column}" {operator} ?')
-                search_values.append(value)
+        if row_function is None:
+            return rows
+        return [row_function(row) for row in rows]
 
-        if artist_id is not None:
-            search_clauses.append('tm."artist_id" = ?')
-            search_values.append(artist_id)
-        if album_id is not None:
-            search_clauses.append('tm."album_id" = ?')
-            search_values.append(album_id)
+    def get_tracks_count(
+        self,
+        search_parameters: List[SearchParameter] | None = None,
+        order_parameters: List[OrderParameter] | None = None,
+        row_filter_parameters: List[RowFilterParameter] | None = None,
+        artist_id: Optional[int] = None,
+        album_id: Optional[int] = None,
+        timeout: float = 5,
+    ) -> int | None:
+        if search_parameters is None:
+            search_parameters = []
+        if order_parameters is None:
+            order_parameters = []
+        if row_filter_parameters is None:
+            row_filter_parameters = []
 
-        if row_filter_parameters and order_parameters:
-            cursor_clause, cursor_values = filter_for_cursor(
-                row_filter_parameters, order_parameters
+        compiled = self._query_cache.get(
+            (
+                "tracks_count",
+                _tracks_shape(
+                    search_parameters,
+                    order_parameters,
+                    row_filter_parameters,
+                    artist_id,
+                    album_id,
+                ),
+            ),
+            lambda: _compile_tracks_count(
+                search_parameters,
+                order_parameters,
+                row_filter_parameters,
+                artist_id,
+                album_id,
+            ),
+        )
+        values = compiled.bind(
+            _tracks_sources(
+                search_parameters, row_filter_parameters, artist_id, album_id
             )
-            if cursor_clause:
-                search_clauses.append("(" + cursor_clause + ")")
-                search_values.extend(cursor_values)
-
-        if search_clauses:
-            search_query += " WHERE " + " AND ".join(search_clauses)
+        )
 
         try:
             with self._connection(timeout=timeout) as conn:
-                count = int(
-                    conn.cursor()
-                    .execute(search_query, tuple(search_values))
-                    .fetchone()[0]
-                )
+                count = int(conn.cursor().execute(compiled.sql, values).fetchone()[0])
             return count
         except Exception as e:
             print(f"Failed to get count from database while executing query: {e}")
             return None
 
+    def get_tracks_total(
+        self,
+        search_parameters: List[SearchParameter] | None = None,
+        artist_id: Optional[int] = None,
+        album_id: Optional[int] = None,
+        timeout: float = 5,
+    ) -> int | None:
+        """Total tracks matching the filters, ignoring any cursor. Served from the count cache."""
+        key = ("tracks", tuple(search_parameters or []), artist_id, album_id)
+        return self._cached_count(
+            key,
+            lambda: self.get_tracks_count(
+                search_parameters=search_parameters,
+                artist_id=artist_id,
+                album_id=album_id,
+                timeout=timeout,
+            ),
+        )
+
+    def _cached_count(self, key: tuple, count_function: Callable[[], int | None]) -> int | None:
+        # Entries are tagged with the write generation they were computed at,
+        # so any commit through this Database makes them stale.
+        generation = self._write_generation
+        cached = self._count_cache.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        count = count_function()
+        if count is not None:
+            if len(self._count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+                self._count_cache.clear()
+            self._count_cache[key] = (generation, count)
+        return count
+
     def get_artists(
         self,
         order_parameters: List[ArtistOrderParameter] | None = None,
@@ -646,47 +1824,67 @@ class Database:
         offset: int = 0,
         timeout: float = 5,
     ) -> List[Artist] | None:
-        if order_parameters is None:
-            order_parameters = []
-        if row_filter_parameters is None:
-            row_filter_parameters = []
         if limit <= 0 or limit > 1000 or offset < 0:
             print(
                 f"Limit {limit} or Offset {offset} was set incorrectly for database.get_artists"
             )
             raise ValueError
-        parameters: list = []
 
-        query = "SELECT id, name FROM artists "
+        return self._select_artists(
+            order_parameters, row_filter_parameters, limit, offset, timeout
+        )
 
-        # Cursor filter
-        cursor_clause, cursor_values = filter_for_artist_cursor(
-            row_filter_parameters, order_parameters
+    def get_artists_page(
+        self,
+        order_parameters: List[ArtistOrderParameter] | None = None,
+        row_filter_parameters: List[ArtistRowFilterParameter] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        timeout: float = 5,
+    ) -> Page[Artist] | None:
+        """Like get_artists, but fetches one extra row to tell whether more pages exist."""
+        if limit <= 0 or limit > 1000 or offset < 0:
+            print(
+                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_artists_page"
+            )
+            raise ValueError
+
+        artists = self._select_artists(
+            order_parameters, row_filter_parameters, limit + 1, offset, timeout
         )
-        if cursor_clause:
-            query += f"WHERE {cursor_clause} "
-            parameters.extend(cursor_values)
-
-        # ORDER BY
-        order_parts: list[str] = []
-        for param in order_parameters:
-            col = param.column
-            direction = "ASC" if param.isAscending else "DESC"
-            collate = " COLLATE NOCASE" if col in ARTIST_TEXT_COLUMNS else ""
-            order_parts.append(f'"{col}"{collate} {direction}')
-
-        if order_parts:
-            query += "ORDER BY " + ", ".join(order_parts) + " "
-        else:
-            query += "ORDER BY name COLLATE NOCASE ASC "
+        if artists is None:
+            return None
+        return Page(items=artists[:limit], has_more=len(artists) > limit)
+
+    def _select_artists(
+        self,
+        order_parameters: List[ArtistOrderParameter] | None,
+        row_filter_parameters: List[ArtistRowFilterParameter] | None,
+        limit: int,
+        offset: int,
+        timeout: float,
+    ) -> List[Artist] | None:
+        if order_parameters is None:
+            order_parameters = []
+        if row_filter_parameters is None:
+            row_filter_parameters = []
 
-        query += "LIMIT ? OFFSET ?"
-        parameters.extend([limit, offset])
+        compiled = self._query_cache.get(
+            ("artists", _keyset_shape(order_parameters, row_filter_parameters)),
+            lambda: _compile_artists_select(order_parameters, row_filter_parameters),
+        )
+        values = compiled.bind(
+            {
+                "row": _param_values(row_filter_parameters),
+                "limit": (limit,),
+                "offset": (offset,),
+            }
+        )
 
         try:
             with self._connection(timeout=timeout) as conn:
-                rows = conn.cursor().execute(query, tuple(parameters)).fetchall()
-            return [Artist(id=row["id"], name=row["name"]) for row in rows]
+                rows = conn.cursor().execute(compiled.sql, values).fetchall()
+            return [_row_to_artist(row) for row in rows]
         except Exception as e:
             print(f"Error executing artist query: {e}")
             return None
@@ -701,27 +1899,29 @@ class Database:
             order_parameters = []
         if row_filter_parameters is None:
             row_filter_parameters = []
-        parameters: list = []
-
-        query = "SELECT COUNT(*) FROM artists "
 
-        cursor_clause, cursor_values = filter_for_artist_cursor(
-            row_filter_parameters, order_parameters
+        compiled = self._query_cache.get(
+            ("artists_count", _keyset_shape(order_parameters, row_filter_parameters)),
+            lambda: _compile_artists_count(order_parameters, row_filter_parameters),
         )
-        if cursor_clause:
-            query += f"WHERE {cursor_clause} "
-            parameters.extend(cursor_values)
+        values = compiled.bind({"row": _param_values(row_filter_parameters)})
 
         try:
             with self._connection(timeout=timeout) as conn:
                 artist_count = int(
-                    conn.cursor().execute(query, tuple(parameters)).fetchone()[0]
+                    conn.cursor().execute(compiled.sql, values).fetchone()[0]
                 )
             return artist_count
         except Exception as e:
             print(f"Unable to fetch artist counts. {e}")
             return None
 
+    def get_artists_total(self, timeout: float = 5) -> int | None:
+        """Total number of artists. Served from the count cache."""
+        return self._cached_count(
+            ("artists",), lambda: self.get_artists_count(timeout=timeout)
+        )
+
     def get_albums(
         self,
         artist_id: Optional[int] = None,
@@ -731,79 +1931,80 @@ class Database:
         offset: int = 0,
         timeout: float = 5,
     ) -> List[Album] | None:
-        if order_parameters is None:
-            order_parameters = []
-        if row_filter_parameters is None:
-            row_filter_parameters = []
         if limit <= 0 or limit > 1000 or offset < 0:
             print(
                 f"Limit {limit} or Offset {offset} was set incorrectly for database.get_albums"
             )
             raise ValueError
 
-        parameters: list = []
-
-        query = (
-            "SELECT a.id, a.name, ar.name AS artist, a.artist_id, "
-            'a."year", a.is_single_grouping '
-            "FROM albums a "
-            "JOIN artists ar ON a.artist_id = ar.id"
+        return self._select_albums(
+            artist_id, order_parameters, row_filter_parameters, limit, offset, timeout
         )
 
-        where_clauses: list[str] = []
-
-        if artist_id is not None:
-            where_clauses.append("a.artist_id = ?")
-            parameters.append(artist_id)
+    def get_albums_page(
+        self,
+        artist_id: Optional[int] = None,
+        order_parameters: List[AlbumOrderParameter] | None = None,
+        row_filter_parameters: List[AlbumRowFilterParameter] | None = None,
+        limit: int = 100,
+        offset: int = 0,
+        timeout: float = 5,
+    ) -> Page[Album] | None:
+        """Like get_albums, but fetches one extra row to tell whether more pages exist."""
+        if limit <= 0 or limit > 1000 or offset < 0:
+            print(
+                f"Limit {limit} or Offset {offset} was set incorrectly for database.get_albums_page"
+            )
+            raise ValueError
 
-        # Cursor filter
-        cursor_clause, cursor_values = filter_for_album_cursor(
-            row_filter_parameters, order_parameters
+        albums = self._select_albums(
+            artist_id, order_parameters, row_filter_parameters, limit + 1, offset, timeout
         )
-        if cursor_clause:
-            where_clauses.append(f"({cursor_clause})")
-            parameters.extend(cursor_values)
-
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-
-        # ORDER BY
-        order_parts: list[str] = []
-        for param in order_parameters:
-            col = param.column
-            col_ref = _album_col_ref(col)
-            direction = "ASC" if param.isAscending else "DESC"
-            collate = " COLLATE NOCASE" if col in ALBUM_TEXT_COLUMNS else ""
-            if param.nullsLast:
-                order_parts.append(f'{col_ref} IS NULL ASC')
-            order_parts.append(f'{col_ref}{collate} {direction}')
+        if albums is None:
+            return None
+        return Page(items=albums[:limit], has_more=len(albums) > limit)
 
-        if order_parts:
-            query += " ORDER BY " + ", ".join(order_parts)
+    def _select_albums(
+        self,
+        artist_id: Optional[int],
+        order_parameters: List[AlbumOrderParameter] | None,
+        row_filter_parameters: List[AlbumRowFilterParameter] | None,
+        limit: int,
+        offset: int,
+        timeout: float,
+    ) -> List[Album] | None:
+        if order_parameters is None:
+            order_parameters = []
+        if row_filter_parameters is None:
+            row_filter_parameters = []
 
-        query += " LIMIT ? OFFSET ?"
-        parameters.extend([limit, offset])
+        compiled = self._query_cache.get(
+            (
+                "albums",
+                artist_id is not None,
+                _keyset_shape(order_parameters, row_filter_parameters),
+            ),
+            lambda: _compile_albums_select(
+                artist_id, order_parameters, row_filter_parameters
+            ),
+        )
+        values = compiled.bind(
+            {
+                "artist_id": (artist_id,),
+                "row": _param_values(row_filter_parameters),
+                "limit": (limit,),
+                "offset": (offset,),
+            }
+        )
 
         try:
             with self._connection(timeout=timeout) as conn:
-                album_rows = (
-                    conn.cursor().execute(query, tuple(parameters)).fetchall()
-                )
+                album_rows = conn.cursor().execute(compiled.sql, values).fetchall()
         except Exception as e:
             print(f"Failed to retrieve albums: {e}")
             return None
 
-        return [
-            Album(
-                id=row["id"],
-                name=row["name"],
-                artist=row["artist"],
-                artist_id=row["artist_id"],
-                year=row["year"] if row["year"] is not None else None,
-                is_single_grouping=bool(row["is_single_grouping"]),
-            )
-            for row in album_rows
-        ]
+        return [_row_to_album(row) for row in album_rows]
 
     def get_albums_count(
         self,
@@ -817,39 +2018,42 @@ class Database:
         if row_filter_parameters is None:
             row_filter_parameters = []
 
-        parameters: list = []
-
-        query = (
-            "SELECT COUNT(*) FROM albums a "
-            "JOIN artists ar ON a.artist_id = ar.id"
+        compiled = self._query_cache.get(
+            (
+                "albums_count",
+                artist_id is not None,
+                _keyset_shape(order_parameters, row_filter_parameters),
+            ),
+            lambda: _compile_albums_count(
+                artist_id, order_parameters, row_filter_parameters
+            ),
         )
-
-        where_clauses: list[str] = []
-
-        if artist_id is not None:
-            where_clauses.append("a.artist_id = ?")
-            parameters.append(artist_id)
-
-        cursor_clause, cursor_values = filter_for_album_cursor(
-            row_filter_parameters, order_parameters
+        values = compiled.bind(
+            {
+                "artist_id": (artist_id,),
+                "row": _param_values(row_filter_parameters),
+            }
         )
-        if cursor_clause:
-            where_clauses.append(f"({cursor_clause})")
-            parameters.extend(cursor_values)
-
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
 
         try:
             with self._connection(timeout=timeout) as conn:
                 album_count = int(
-                    conn.cursor().execute(query, tuple(parameters)).fetchone()[0]
+                    conn.cursor().execute(compiled.sql, values).fetchone()[0]
                 )
             return album_count
         except Exception as e:
             print(f"Failed to retrieve album counts: {e}")
             return None
 
+    def get_albums_total(
+        self, artist_id: Optional[int] = None, timeout: float = 5
+    ) -> int | None:
+        """Total albums, optionally for one artist. Served from the count cache."""
+        return self._cached_count(
+            ("albums", artist_id),
+            lambda: self.get_albums_count(artist_id=artist_id, timeout=timeout),
+        )
+
     def get_search_results(
         self,
         query: str,
@@ -905,17 +2109,14 @@ class Database:
                         artist_ids = [r["rowid"] for r in artist_rows]
                         placeholders = ", ".join("?" for _ in artist_ids)
                         full_rows = conn.execute(
-                            f"SELECT id, name FROM artists WHERE id IN ({placeholders})",
+                            f"SELECT {_ARTIST_COLUMNS_SQL} FROM artists WHERE id IN ({placeholders})",
                             tuple(artist_ids),
                         ).fetchall()
                         id_order = {aid: i for i, aid in enumerate(artist_ids)}
                         full_rows_sorted = sorted(
                             full_rows, key=lambda r: id_order.get(r["id"], 999)
                         )
-                        result_artists = [
-                            Artist(id=r["id"], name=r["name"])
-                            for r in full_rows_sorted
-                        ]
+                        result_artists = [_row_to_artist(r) for r in full_rows_sorted]
 
                 if SearchEntityType.ALBUMS in return_types:
                     album_rows = conn.execute(
@@ -926,8 +2127,7 @@ class Database:
                         album_ids = [r["rowid"] for r in album_rows]
                         placeholders = ", ".join("?" for _ in album_ids)
                         full_rows = conn.execute(
-                            "SELECT a.id, a.name, ar.name AS artist, a.artist_id, "
-                            'a."year", a.is_single_grouping '
+                            f"SELECT {_ALBUM_COLUMNS_SQL} "
                             "FROM albums a "
                             "JOIN artists ar ON a.artist_id = ar.id "
                             f"WHERE a.id IN ({placeholders})",
@@ -937,17 +2137,7 @@ class Database:
                         full_rows_sorted = sorted(
                             full_rows, key=lambda r: id_order.get(r["id"], 999)
                         )
-                        result_albums = [
-                            Album(
-                                id=r["id"],
-                                name=r["name"],
-                                artist=r["artist"],
-                                artist_id=r["artist_id"],
-                                year=r["year"],
-                                is_single_grouping=bool(r["is_single_grouping"]),
-                            )
-                            for r in full_rows_sorted
-                        ]
+                        result_albums = [_row_to_album(r) for r in full_rows_sorted]
 
         except Exception as e:
             print(f"Search failed: {e}")
@@ -966,71 +2156,408 @@ def prepare_fts_query(raw_query: str) -> str:
 
 
 def alias_map(column: str) -> str:
-    if column in ALLOWED_METADATA_COLUMNS:
+    # uuid_id lives on both tables; using trackmetadata's copy lets the
+    # default ordering be served entirely by idx_tm_default_order.
+    if column in ALLOWED_METADATA_COLUMNS or column == "uuid_id":
         return "tm"
     else:
         return "t"
 
 
-# Sort-key cursor pagination logic.
-# This cursor logic is linked to the frontend's getTrackPage() / getAlbumTrackPage()
-# in frontend/lib/database/database.dart — keep them in sync.
-def filter_for_cursor(
-    row_filter_list: List[RowFilterParameter],
+# Query compilation. Each _compile_* function builds the SQL for one query
+# shape with QuerySlot placeholders standing in for the values, so the result
+# can be cached in Database._query_cache and rebound on every call.
+
+
+def _slotted(params: list, source: str) -> list:
+    """Swap each non-NULL parameter value for a QuerySlot into ``source``."""
+    return [
+        param if param.value is None else replace(param, value=QuerySlot(source, i))
+        for i, param in enumerate(params)
+    ]
+
+
+def _param_values(params: list) -> list:
+    return [param.value for param in params]
+
+
+def _keyset_shape(order_parameters: list, row_filter_parameters: list) -> tuple:
+    return (
+        tuple(order_parameters),
+        tuple((param.column, param.value is None) for param in row_filter_parameters),
+    )
+
+
+def _tracks_shape(
+    search_parameters: List[SearchParameter],
     order_parameters: List[OrderParameter],
-) -> tuple[str, List[str]]:
-    columns = [param.column for param in row_filter_list]
+    row_filter_parameters: List[RowFilterParameter],
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> tuple:
+    return (
+        tuple(
+            (param.column, param.operator, param.value is None)
+            for param in search_parameters
+        ),
+        _keyset_shape(order_parameters, row_filter_parameters),
+        artist_id is not None,
+        album_id is not None,
+    )
+
+
+def _tracks_sources(
+    search_parameters: List[SearchParameter],
+    row_filter_parameters: List[RowFilterParameter],
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> Dict[str, Sequence[Any]]:
+    return {
+        "search": _param_values(search_parameters),
+        "row": _param_values(row_filter_parameters),
+        "artist_id": (artist_id,),
+        "album_id": (album_id,),
+    }
+
+
+def _compile_tracks_where(
+    search_parameters: List[SearchParameter],
+    order_parameters: List[OrderParameter],
+    row_filter_parameters: List[RowFilterParameter],
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> tuple[str, List[QuerySlot]]:
+    clauses, slots = _tracks_where(
+        _slotted(search_parameters, "search"),
+        order_parameters,
+        _slotted(row_filter_parameters, "row"),
+        QuerySlot("artist_id") if artist_id is not None else None,
+        QuerySlot("album_id") if album_id is not None else None,
+    )
+    if not clauses:
+        return "", slots
+    return " WHERE " + " AND ".join(clauses), slots
+
+
+def _compile_tracks_select(
+    search_parameters: List[SearchParameter],
+    order_parameters: List[OrderParameter],
+    row_filter_parameters: List[RowFilterParameter],
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> CompiledQuery:
     allowed_columns = set(ALLOWED_TRACK_COLUMNS + ALLOWED_METADATA_COLUMNS)
-    input_columns = set(columns)
-    invalid_search_columns = input_columns - allowed_columns
+    search_columns = set([param.column for param in search_parameters])
+    order_columns = set([order.column for order in order_parameters])
+    invalid_search_columns = search_columns - allowed_columns
+    invalid_order_columns = order_columns - allowed_columns
 
     if invalid_search_columns:
-        raise ValueError("Invalid columns input to filter for cursor")
+        print(f"columns {invalid_search_columns} are not allowed as a search parameter")
+        raise ValueError
+
+    if invalid_order_columns:
+        print(f"columns {invalid_order_columns} are not allowed as a search parameter")
+        raise ValueError
+
+    search_query = (
+        "SELECT "
+        "tm.uuid_id, tm.title, tm.artist, tm.album, tm.album_artist, "
+        'tm.artist_id, tm.album_id, tm."year", '
+        'tm."date", tm.genre, tm.track_number, tm.disc_number, tm.codec, tm.duration, '
+        "tm.bitrate_kbps, tm.sample_rate_hz, tm.channels, tm.has_album_art, t.file_path, "
+        "t.file_hash, t.created_at, t.last_updated "
+        "FROM trackmetadata AS tm "
+        "JOIN tracks AS t ON "
+        " tm.uuid_id = t.uuid_id"
+    )
+    where, slots = _compile_tracks_where(
+        search_parameters, order_parameters, row_filter_parameters, artist_id, album_id
+    )
+    search_query += where
 
-    if len(set(columns)) != len(columns):
-        raise ValueError("Filtering by row requires all unique columns")
+    order_clauses = []
+    for order in order_parameters:
+        column = order.column
+        value = "ASC" if order.isAscending else "DESC"
+        alias = alias_map(column)
+        order_clauses.append(f'{alias}."{column}" {value.upper()}')
 
-    order_columns = [op.column for op in order_parameters]
-    if columns != order_columns:
-        raise ValueError(
-            "row_filter_parameters columns must match order_parameters columns"
+    if order_clauses:
+        search_query += " ORDER BY " + " , ".join(order_clauses)
+
+    search_query += " LIMIT ? OFFSET ?"
+    slots += [QuerySlot("limit"), QuerySlot("offset")]
+
+    return CompiledQuery(sql=search_query, slots=tuple(slots))
+
+
+def _compile_tracks_count(
+    search_parameters: List[SearchParameter],
+    order_parameters: List[OrderParameter],
+    row_filter_parameters: List[RowFilterParameter],
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> CompiledQuery:
+    search_query = (
+        "SELECT COUNT(*) FROM tracks as t "
+        "JOIN trackmetadata AS tm ON "
+        " t.uuid_id = tm.uuid_id"
+    )
+    where, slots = _compile_tracks_where(
+        search_parameters, order_parameters, row_filter_parameters, artist_id, album_id
+    )
+    return CompiledQuery(sql=search_query + where, slots=tuple(slots))
+
+
+def _compile_artists_where(
+    order_parameters: List[ArtistOrderParameter],
+    row_filter_parameters: List[ArtistRowFilterParameter],
+) -> tuple[str, List[QuerySlot]]:
+    cursor_clause, slots = filter_for_artist_cursor(
+        _slotted(row_filter_parameters, "row"), order_parameters
+    )
+    if not cursor_clause:
+        return "", []
+    return f"WHERE {cursor_clause} ", slots
+
+
+def _compile_artists_select(
+    order_parameters: List[ArtistOrderParameter],
+    row_filter_parameters: List[ArtistRowFilterParameter],
+) -> CompiledQuery:
+    query = f"SELECT {_ARTIST_COLUMNS_SQL} FROM artists "
+    where, slots = _compile_artists_where(order_parameters, row_filter_parameters)
+    query += where
+
+    order_parts: list[str] = []
+    for param in order_parameters:
+        col = param.column
+        direction = "ASC" if param.isAscending else "DESC"
+        collate = " COLLATE NOCASE" if col in ARTIST_TEXT_COLUMNS else ""
+        order_parts.append(f'"{col}"{collate} {direction}')
+
+    if order_parts:
+        query += "ORDER BY " + ", ".join(order_parts) + " "
+    else:
+        query += "ORDER BY name COLLATE NOCASE ASC "
+
+    query += "LIMIT ? OFFSET ?"
+    slots += [QuerySlot("limit"), QuerySlot("offset")]
+
+    return CompiledQuery(sql=query, slots=tuple(slots))
+
+
+def _compile_artists_count(
+    order_parameters: List[ArtistOrderParameter],
+    row_filter_parameters: List[ArtistRowFilterParameter],
+) -> CompiledQuery:
+    where, slots = _compile_artists_where(order_parameters, row_filter_parameters)
+    return CompiledQuery(sql="SELECT COUNT(*) FROM artists " + where, slots=tuple(slots))
+
+
+def _compile_albums_where(
+    artist_id: Optional[int],
+    order_parameters: List[AlbumOrderParameter],
+    row_filter_parameters: List[AlbumRowFilterParameter],
+) -> tuple[str, List[QuerySlot]]:
+    where_clauses, slots = _albums_where(
+        QuerySlot("artist_id") if artist_id is not None else None,
+        order_parameters,
+        _slotted(row_filter_parameters, "row"),
+    )
+    if not where_clauses:
+        return "", slots
+    return " WHERE " + " AND ".join(where_clauses), slots
+
+
+def _compile_albums_select(
+    artist_id: Optional[int],
+    order_parameters: List[AlbumOrderParameter],
+    row_filter_parameters: List[AlbumRowFilterParameter],
+) -> CompiledQuery:
+    # CROSS JOIN pins artists as the outer loop so the artist-first
+    # ordering walks idx_artists_name_nocase and then idx_albums_artist_order
+    # per artist, without a temp B-tree sort.
+    query = (
+        f"SELECT {_ALBUM_COLUMNS_SQL} "
+        "FROM artists ar "
+        "CROSS JOIN albums a ON a.artist_id = ar.id"
+    )
+    where, slots = _compile_albums_where(
+        artist_id, order_parameters, row_filter_parameters
+    )
+    query += where
+
+    order_parts: list[str] = []
+    for param in order_parameters:
+        col = param.column
+        col_ref = _album_col_ref(col)
+        direction = "ASC" if param.isAscending else "DESC"
+        collate = " COLLATE NOCASE" if col in ALBUM_TEXT_COLUMNS else ""
+        if param.nullsLast and col not in NOT_NULL_ALBUM_COLUMNS:
+            order_parts.append(f"{col_ref} IS NULL ASC")
+        order_parts.append(f"{col_ref}{collate} {direction}")
+
+    if order_parts:
+        query += " ORDER BY " + ", ".join(order_parts)
+
+    query += " LIMIT ? OFFSET ?"
+    slots += [QuerySlot("limit"), QuerySlot("offset")]
+
+    return CompiledQuery(sql=query, slots=tuple(slots))
+
+
+def _compile_albums_count(
+    artist_id: Optional[int],
+    order_parameters: List[AlbumOrderParameter],
+    row_filter_parameters: List[AlbumRowFilterParameter],
+) -> CompiledQuery:
+    query = "SELECT COUNT(*) FROM albums a JOIN artists ar ON a.artist_id = ar.id"
+    where, slots = _compile_albums_where(
+        artist_id, order_parameters, row_filter_parameters
+    )
+    return CompiledQuery(sql=query + where, slots=tuple(slots))
+
+
+def _tracks_where(
+    search_parameters: List[SearchParameter] | None,
+    order_parameters: List[OrderParameter] | None,
+    row_filter_parameters: List[RowFilterParameter] | None,
+    artist_id: Optional[int],
+    album_id: Optional[int],
+) -> tuple[List[str], list]:
+    if album_id is not None and artist_id is None:
+        raise ValueError("Cannot filter by album without artist")
+
+    search_clauses: List[str] = []
+    search_values: list = []
+
+    for param in search_parameters or []:
+        column = param.column
+        value = param.value
+        operator = param.operator
+        alias = alias_map(column)
+        if value is None:
+            search_clauses.append(f'{alias}."{column}" IS NULL')
+        else:
+            search_clauses.append(f'{alias}."{column}" {operator} ?')
+            search_values.append(value)
+
+    if artist_id is not None:
+        search_clauses.append('tm."artist_id" = ?')
+        search_values.append(artist_id)
+    if album_id is not None:
+        search_clauses.append('tm."album_id" = ?')
+        search_values.append(album_id)
+
+    if row_filter_parameters and order_parameters:
+        cursor_clause, cursor_values = filter_for_cursor(
+            row_filter_parameters, order_parameters
         )
+        if cursor_clause:
+            search_clauses.append("(" + cursor_clause + ")")
+            search_values.extend(cursor_values)
+
+    return search_clauses, search_values
+
+
+def _albums_where(
+    artist_id: Optional[int],
+    order_parameters: List[AlbumOrderParameter],
+    row_filter_parameters: List[AlbumRowFilterParameter],
+) -> tuple[List[str], list]:
+    where_clauses: List[str] = []
+    parameters: list = []
+
+    if artist_id is not None:
+        where_clauses.append("a.artist_id = ?")
+        parameters.append(artist_id)
+
+    # Cursor filter
+    cursor_clause, cursor_values = filter_for_album_cursor(
+        row_filter_parameters, order_parameters
+    )
+    if cursor_clause:
+        where_clauses.append(f"({cursor_clause})")
+        parameters.extend(cursor_values)
+
+    return where_clauses, parameters
+
+
+@dataclass(frozen=True)
+class KeysetColumn:
+    """One sort key of a keyset (cursor) predicate.
+
+    ``col_ref`` is the SQL column expression, ``value`` the cursor value for it
+    and ``param`` the placeholder used to bind that value.
+    """
+
+    col_ref: str
+    value: Optional[str]
+    isAscending: bool = True
+    nullsLast: bool = False
+    nullable: bool = True
+    collate: str = ""
+    param: str = "?"
+
+
+def keyset_predicate(keys: List[KeysetColumn]) -> tuple[str, List[str]]:
+    """Build the WHERE predicate selecting rows that sort after the cursor.
+
+    When the NULL semantics allow it this is a single row-value comparison
+    such as ``(a, b, c) > (?, ?, ?)``, which SQLite can answer with a range
+    scan on a matching composite index. Otherwise it falls back to the
+    equivalent OR-of-ANDs expansion.
+    """
+    if _can_use_row_value(keys):
+        op = ">" if keys[0].isAscending else "<"
+        left = ", ".join(f"{key.col_ref}{key.collate}" for key in keys)
+        right = ", ".join(key.param for key in keys)
+        return (f"({left}) {op} ({right})", [key.value for key in keys])
 
     constraints: List[str] = []
     values: List[str] = []
 
-    for depth in range(len(row_filter_list)):
+    for depth in range(len(keys)):
         equality_parts: List[str] = []
         equality_values: List[str] = []
 
-        for i in range(depth):
-            alias = alias_map(row_filter_list[i].column)
-            col = row_filter_list[i].column
-            value = row_filter_list[i].value
-            if value is None:
-                equality_parts.append(f'{alias}."{col}" IS NULL')
+        for key in keys[:depth]:
+            if key.value is None:
+                equality_parts.append(f"{key.col_ref} IS NULL")
             else:
-                equality_parts.append(f'{alias}."{col}" = ?')
-                equality_values.append(value)
+                equality_parts.append(f"{key.col_ref}{key.collate} = {key.param}")
+                equality_values.append(key.value)
 
-        alias = alias_map(row_filter_list[depth].column)
-        col = row_filter_list[depth].column
-        cursor_value = row_filter_list[depth].value
+        key = keys[depth]
+        # nullsLast changes nothing for a column that can't hold NULLs.
+        nulls_last = key.nullsLast and key.nullable
 
-        if cursor_value is None:
-            # NULL: for ASC, any non-null value comes after NULL; for DESC, nothing is less than NULL
-            if order_parameters[depth].isAscending:
-                final_part = f'{alias}."{col}" IS NOT NULL'
+        if key.value is None:
+            if nulls_last:
+                # NULLs sort last: nothing comes after NULL
+                continue
+            elif key.isAscending:
+                # NULLs sort first (default): any non-null comes after NULL
+                final_part = f"{key.col_ref} IS NOT NULL"
             else:
-                # Skip this depth entirely — no rows can be "less than" NULL
+                # DESC with NULLs first: nothing is "less than" NULL
                 continue
             all_parts = equality_parts + [final_part]
             all_values = equality_values
         else:
-            op = ">" if order_parameters[depth].isAscending else "<"
-            final_part = f'{alias}."{col}" {op} ?'
+            op = ">" if key.isAscending else "<"
+            if nulls_last:
+                # Non-NULL cursor with nullsLast: greater values OR NULLs come after
+                final_part = (
+                    f"({key.col_ref}{key.collate} {op} {key.param} "
+                    f"OR {key.col_ref} IS NULL)"
+                )
+            else:
+                final_part = f"{key.col_ref}{key.collate} {op} {key.param}"
             all_parts = equality_parts + [final_part]
-            all_values = equality_values + [cursor_value]
+            all_values = equality_values + [key.value]
 
         if len(all_parts) == 1:
             constraints.append(all_parts[0])
@@ -1041,7 +2568,73 @@ def filter_for_cursor(
     if not constraints:
         return ("", values)
 
-    return (" OR ".join(constraints), values)
+    predicate = " OR ".join(constraints)
+
+    # Every row after the cursor shares or passes the first key's value, so
+    # a redundant bound on it lets SQLite seek instead of scanning.
+    first = keys[0]
+    if first.value is not None and not first.nullable:
+        bound_op = ">=" if first.isAscending else "<="
+        predicate = (
+            f"{first.col_ref}{first.collate} {bound_op} {first.param} "
+            f"AND ({predicate})"
+        )
+        values = [first.value] + values
+
+    return (predicate, values)
+
+
+def _can_use_row_value(keys: List[KeysetColumn]) -> bool:
+    # A row-value comparison evaluates to NULL as soon as it reaches a NULL
+    # element, which drops that row. That is only right when the row really
+    # sorts before the cursor, i.e. the column is ascending with NULLs first.
+    # Mixed directions can't be expressed as one comparison at all.
+    if not keys:
+        return False
+    if len({key.isAscending for key in keys}) != 1:
+        return False
+    for key in keys:
+        if key.value is None:
+            return False
+        if key.nullable and (key.nullsLast or not key.isAscending):
+            return False
+    return True
+
+
+# Sort-key cursor pagination logic.
+# This cursor logic is linked to the frontend's getTrackPage() / getAlbumTrackPage()
+# in frontend/lib/database/database.dart — keep them in sync.
+def filter_for_cursor(
+    row_filter_list: List[RowFilterParameter],
+    order_parameters: List[OrderParameter],
+) -> tuple[str, List[str]]:
+    columns = [param.column for param in row_filter_list]
+    allowed_columns = set(ALLOWED_TRACK_COLUMNS + ALLOWED_METADATA_COLUMNS)
+    input_columns = set(columns)
+    invalid_search_columns = input_columns - allowed_columns
+
+    if invalid_search_columns:
+        raise ValueError("Invalid columns input to filter for cursor")
+
+    if len(set(columns)) != len(columns):
+        raise ValueError("Filtering by row requires all unique columns")
+
+    order_columns = [op.column for op in order_parameters]
+    if columns != order_columns:
+        raise ValueError(
+            "row_filter_parameters columns must match order_parameters columns"
+        )
+
+    keys = [
+        KeysetColumn(
+            col_ref=f'{alias_map(param.column)}."{param.column}"',
+            value=param.value,
+            isAscending=order.isAscending,
+            nullable=param.column not in NOT_NULL_TRACK_COLUMNS,
+        )
+        for param, order in zip(row_filter_list, order_parameters)
+    ]
+    return keyset_predicate(keys)
 
 
 def _album_col_ref(col: str) -> str:
@@ -1082,66 +2675,19 @@ def filter_for_album_cursor(
             "row_filter_parameters columns must match order_parameters columns"
         )
 
-    constraints: List[str] = []
-    values: List[str] = []
-
-    for depth in range(len(row_filter_list)):
-        equality_parts: List[str] = []
-        equality_values: List[str] = []
-
-        for i in range(depth):
-            col = row_filter_list[i].column
-            value = row_filter_list[i].value
-            col_ref = _album_col_ref(col)
-            collate = " COLLATE NOCASE" if col in ALBUM_TEXT_COLUMNS else ""
-            param = "CAST(? AS INTEGER)" if col in ALBUM_INTEGER_COLUMNS else "?"
-            if value is None:
-                equality_parts.append(f'{col_ref} IS NULL')
-            else:
-                equality_parts.append(f'{col_ref}{collate} = {param}')
-                equality_values.append(value)
-
-        col = row_filter_list[depth].column
-        col_ref = _album_col_ref(col)
-        cursor_value = row_filter_list[depth].value
-        nulls_last = order_parameters[depth].nullsLast
-        collate = " COLLATE NOCASE" if col in ALBUM_TEXT_COLUMNS else ""
-        param = "CAST(? AS INTEGER)" if col in ALBUM_INTEGER_COLUMNS else "?"
-
-        if cursor_value is None:
-            if nulls_last:
-                # NULLs sort last: nothing comes after NULL
-                continue
-            elif order_parameters[depth].isAscending:
-                # NULLs sort first (default): any non-null comes after NULL
-                final_part = f'{col_ref} IS NOT NULL'
-            else:
-                # DESC with NULLs first: nothing is "less than" NULL
-                continue
-            all_parts = equality_parts + [final_part]
-            all_values = equality_values
-        else:
-            op = ">" if order_parameters[depth].isAscending else "<"
-            if nulls_last:
-                # Non-NULL cursor with nullsLast: greater values OR NULLs come after
-                final_part = f'({col_ref}{collate} {op} {param} OR {col_ref} IS NULL)'
-                all_parts = equality_parts + [final_part]
-                all_values = equality_values + [cursor_value]
-            else:
-                final_part = f'{col_ref}{collate} {op} {param}'
-                all_parts = equality_parts + [final_part]
-                all_values = equality_values + [cursor_value]
-
-        if len(all_parts) == 1:
-            constraints.append(all_parts[0])
-        else:
-            constraints.append("(" + " AND ".join(all_parts) + ")")
-        values.extend(all_values)
-
-    if not constraints:
-        return ("", values)
-
-    return (" OR ".join(constraints), values)
+    keys = [
+        KeysetColumn(
+            col_ref=_album_col_ref(param.column),
+            value=param.value,
+            isAscending=order.isAscending,
+            nullsLast=order.nullsLast,
+            nullable=param.column not in NOT_NULL_ALBUM_COLUMNS,
+            collate=" COLLATE NOCASE" if param.column in ALBUM_TEXT_COLUMNS else "",
+            param="CAST(? AS INTEGER)" if param.column in ALBUM_INTEGER_COLUMNS else "?",
+        )
+        for param, order in zip(row_filter_list, order_parameters)
+    ]
+    return keyset_predicate(keys)
 
 
 def filter_for_artist_cursor(
@@ -1167,47 +2713,14 @@ def filter_for_artist_cursor(
             "row_filter_parameters columns must match order_parameters columns"
         )
 
-    constraints: List[str] = []
-    values: List[str] = []
-
-    for depth in range(len(row_filter_list)):
-        equality_parts: List[str] = []
-        equality_values: List[str] = []
-
-        for i in range(depth):
-            col = row_filter_list[i].column
-            value = row_filter_list[i].value
-            collate = " COLLATE NOCASE" if col in ARTIST_TEXT_COLUMNS else ""
-            if value is None:
-                equality_parts.append(f'"{col}" IS NULL')
-            else:
-                equality_parts.append(f'"{col}"{collate} = ?')
-                equality_values.append(value)
-
-        col = row_filter_list[depth].column
-        cursor_value = row_filter_list[depth].value
-        collate = " COLLATE NOCASE" if col in ARTIST_TEXT_COLUMNS else ""
-
-        if cursor_value is None:
-            if order_parameters[depth].isAscending:
-                final_part = f'"{col}" IS NOT NULL'
-            else:
-                continue
-            all_parts = equality_parts + [final_part]
-            all_values = equality_values
-        else:
-            op = ">" if order_parameters[depth].isAscending else "<"
-            final_part = f'"{col}"{collate} {op} ?'
-            all_parts = equality_parts + [final_part]
-            all_values = equality_values + [cursor_value]
-
-        if len(all_parts) == 1:
-            constraints.append(all_parts[0])
-        else:
-            constraints.append("(" + " AND ".join(all_parts) + ")")
-        values.extend(all_values)
-
-    if not constraints:
-        return ("", values)
-
-    return (" OR ".join(constraints), values)
+    keys = [
+        KeysetColumn(
+            col_ref=f'"{param.column}"',
+            value=param.value,
+            isAscending=order.isAscending,
+            nullable=False,
+            collate=" COLLATE NOCASE" if param.column in ARTIST_TEXT_COLUMNS else "",
+        )
+        for param, order in zip(row_filter_list, order_parameters)
+    ]
+    return keyset_predicate(keys)
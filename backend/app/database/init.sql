@@ -1,7 +1,12 @@
+-- The track_count, total_duration, max_year and has_album_art columns of
+-- artists and albums aggregate their tracks; the Database keeps them current.
 CREATE TABLE IF NOT EXISTS artists (
     "id" INTEGER PRIMARY KEY,
     "name" TEXT NOT NULL,
-    "name_lower" TEXT NOT NULL GENERATED ALWAYS AS (LOWER("name")) STORED UNIQUE
+    "name_lower" TEXT NOT NULL GENERATED ALWAYS AS (LOWER("name")) STORED UNIQUE,
+    "track_count" INTEGER NOT NULL DEFAULT 0,
+    "total_duration" REAL NOT NULL DEFAULT 0,
+    "max_year" INTEGER
 );
 
 CREATE INDEX IF NOT EXISTS idx_artists_name_lower ON artists("name_lower");
@@ -13,6 +18,9 @@ CREATE TABLE IF NOT EXISTS albums (
     "artist_id" INTEGER NOT NULL,
     "year" INTEGER,
     "is_single_grouping" INTEGER NOT NULL DEFAULT 0 CHECK ("is_single_grouping" IN (0,1)),
+    "track_count" INTEGER NOT NULL DEFAULT 0,
+    "total_duration" REAL NOT NULL DEFAULT 0,
+    "has_album_art" INTEGER NOT NULL DEFAULT 0 CHECK ("has_album_art" IN (0,1)),
     FOREIGN KEY ("artist_id") REFERENCES artists("id")
 );
 
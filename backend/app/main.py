@@ -1,13 +1,27 @@
-import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from dataclasses import asdict
+from email.utils import formatdate
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Callable, List, Optional, TypeVar, cast
+
 
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 
 from app.config import settings
+from app.core.cursors import (
+    CursorCodec,
+    CursorShape,
+    DecodedCursor,
+    InvalidCursorError,
+    load_or_create_secret,
+)
+from app.core.serializers import tracks_response_json
+from app.core.streaming import FileRangeResponse
 from app.database import (
     AlbumOrderParameter,
     AlbumRowFilterParameter,
@@ -28,15 +42,21 @@ from app.models import (
     GetArtistsResponse,
     GetSearchResponse,
     GetTracksResponse,
-    Track,
 )
 from app.services import (
+    DedupContext,
+    Deduplicator,
     FileWatcher,
-    Ingestor,
-    IngestorContext,
+    IngestionPipeline,
+    IngestJobsContext,
     Organizer,
     OrganizerContext,
+    ReconcileContext,
+    Reconciler,
+    PipelineContext,
 )
+from app.services.file_watcher import ProcessedPaths, can_open_for_read
+from app.services.metadata import probe_file
 
 
 @asynccontextmanager
@@ -50,13 +70,86 @@ async def lifespan(app: FastAPI):
 # TODO: Dependency inject depends on get_database into api endpoints (and make the new function needed for this)
 app = FastAPI(lifespan=lifespan)
 
+DEFAULT_TRACK_ORDER = (
+    OrderParameter(column="artist", isAscending=True),
+    OrderParameter(column="album", isAscending=True),
+    OrderParameter(column="disc_number", isAscending=True),
+    OrderParameter(column="track_number", isAscending=True),
+    OrderParameter(column="uuid_id", isAscending=True),
+)
+NEWER_THAN_SEARCH = ("last_updated", ">")
+OLDER_THAN_SEARCH = ("last_updated", "<=")
+
+ARTIST_ALBUM_ORDER = (
+    AlbumOrderParameter(column="year", isAscending=False, nullsLast=True),
+    AlbumOrderParameter(column="is_single_grouping", isAscending=True),
+    AlbumOrderParameter(column="name", isAscending=True, nullsLast=True),
+)
+LIBRARY_ALBUM_ORDER = (
+    AlbumOrderParameter(column="artist", isAscending=True, nullsLast=True),
+) + ARTIST_ALBUM_ORDER
+
+DEFAULT_ARTIST_ORDER = (ArtistOrderParameter(column="name", isAscending=True),)
+
+
+T = TypeVar("T")
+
+
+async def run_blocking(function: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database (or serialization) call on the bounded database executor.
+
+    Endpoints are async so they never hold a threadpool thread while waiting
+    on the network; only the actual SQLite work occupies one of the
+    db_executor_workers threads.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        app.state.db_executor, partial(function, *args, **kwargs)
+    )
+
+
+def build_cursor_codec(secret: bytes) -> CursorCodec:
+    """Codec with the default query shapes registered, so cursors survive restarts."""
+    codec = CursorCodec(secret)
+    for search in [
+        (),
+        (NEWER_THAN_SEARCH,),
+        (OLDER_THAN_SEARCH,),
+        (NEWER_THAN_SEARCH, OLDER_THAN_SEARCH),
+    ]:
+        codec.register(CursorShape("tracks", DEFAULT_TRACK_ORDER, search))
+    codec.register(CursorShape("albums", ARTIST_ALBUM_ORDER))
+    codec.register(CursorShape("albums", LIBRARY_ALBUM_ORDER))
+    codec.register(CursorShape("artists", DEFAULT_ARTIST_ORDER))
+    return codec
+
+
+def decode_cursor(cursor: str, endpoint: str) -> DecodedCursor:
+    codec: CursorCodec = app.state.cursor_codec
+    try:
+        decoded = codec.decode(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    if decoded.shape.endpoint != endpoint:
+        raise HTTPException(
+            status_code=400, detail=f"Cursor does not belong to /{endpoint}"
+        )
+    if len(decoded.key_values) != len(decoded.shape.order_parameters):
+        raise HTTPException(status_code=400, detail="Cursor has the wrong key count")
+    return decoded
+
 
 def startup_event():
     # Set app.state classes to be None
     app.state.database = None
     app.state.organizer = None
-    app.state.ingestor = None
+    app.state.ingestion_pipeline = None
     app.state.file_watcher = None
+    app.state.reconciler = None
+    app.state.cursor_codec = None
+    app.state.db_executor = ThreadPoolExecutor(
+        max_workers=settings.db_executor_workers, thread_name_prefix="db"
+    )
 
     settings.app_data_dir.mkdir(parents=True, exist_ok=True)
     settings.music_library_dir.mkdir(parents=True, exist_ok=True)
@@ -64,6 +157,12 @@ def startup_event():
 
     print(f"app data dir: {settings.app_data_dir}")
 
+    if settings.cursor_secret:
+        cursor_secret = settings.cursor_secret.encode("utf-8")
+    else:
+        cursor_secret = load_or_create_secret(settings.app_data_dir / "cursor_secret")
+    app.state.cursor_codec = build_cursor_codec(cursor_secret)
+
     # Set up database
     database_path = settings.app_data_dir / "database" / "database.db"
     database_path.parent.mkdir(parents=True, exist_ok=True)
@@ -80,38 +179,110 @@ def startup_event():
         organizer_context = OrganizerContext(
             music_library_dir=settings.music_library_dir,
             should_organize_files=True,
-            should_copy_files=False,
+            should_copy_files=settings.organize_copy_files,
             add_to_database=app.state.database.add_track,
+            allow_hardlinks=settings.organize_allow_hardlinks,
         )
 
         organizer = Organizer(ctx=organizer_context)
         app.state.organizer = organizer
         workspace_dir = settings.app_data_dir / "workspace"
         workspace_dir.mkdir(parents=True, exist_ok=True)
-        ingestor_context = IngestorContext(
+        deduplicator = Deduplicator(
+            ctx=DedupContext(
+                find_hash_candidates=app.state.database.find_hash_candidates,
+                set_file_hash=app.state.database.set_file_hash,
+            )
+        )
+        pipeline_context = PipelineContext(
             workspace_dir=workspace_dir,
-            organize_function=app.state.organizer.organize_file,
+            deduplicator=deduplicator,
+            jobs=IngestJobsContext(
+                add_jobs=database.add_ingest_jobs,
+                set_probed=database.set_ingest_jobs_probed,
+                set_moved=database.set_ingest_jobs_moved,
+                set_indexed=database.set_ingest_jobs_indexed,
+                delete_jobs=database.delete_ingest_jobs,
+                get_unfinished=database.get_unfinished_ingest_jobs,
+                prune=database.prune_ingest_jobs,
+                get_track_file_paths=database.get_track_file_paths,
+            ),
+            destination_function=app.state.organizer.destination_for,
+            # The watcher only hands over files that have gone quiet.
+            wait_until_ready=can_open_for_read,
+            probe_function=probe_file,
+            place_function=app.state.organizer.place_probed_file,
+            sync_function=app.state.organizer.sync_placements,
+            remove_sources_function=app.state.organizer.remove_placed_sources,
+            write_function=app.state.database.add_tracks,
+            stabilize_workers=settings.ingest_stabilize_workers,
+            probe_workers=settings.ingest_probe_workers,
+            organize_workers=settings.ingest_organize_workers,
+            queue_size=settings.ingest_queue_size,
+            write_batch_size=settings.ingest_write_batch_size,
+            probe_processes=settings.ingest_probe_processes,
+            probe_chunk_size=settings.ingest_probe_chunk_size,
         )
 
-        ingestor = Ingestor(ctx=ingestor_context)
-        app.state.ingestor = ingestor
+        ingestion_pipeline = IngestionPipeline(ctx=pipeline_context)
+        ingestion_pipeline.start()
+        app.state.ingestion_pipeline = ingestion_pipeline
+        # resume() blocks while the pipeline is full, so keep it off startup.
+        threading.Thread(
+            target=ingestion_pipeline.resume, name="ingest-resume", daemon=True
+        ).start()
 
         file_watcher = FileWatcher(
-            import_dir=settings.import_dir, on_file=app.state.ingestor.ingest_file
+            import_dir=settings.import_dir,
+            on_file=ingestion_pipeline.submit,
+            quiet_seconds=settings.watcher_quiet_ms / 1000,
+            processed=ProcessedPaths(
+                max_size=settings.watcher_processed_max_size,
+                ttl_seconds=settings.watcher_processed_ttl_seconds,
+            ),
         )
 
         file_watcher.start_file_watcher()
         app.state.file_watcher = file_watcher
 
+        if settings.enable_startup_reconcile:
+            # Started after the watcher, so nothing lands in between unseen.
+            reconciler = Reconciler(
+                ctx=ReconcileContext(
+                    import_dir=settings.import_dir,
+                    music_library_dir=settings.music_library_dir,
+                    get_file_snapshot=database.get_file_snapshot,
+                    update_file_snapshot=database.update_file_snapshot,
+                    get_track_file_paths=database.get_track_file_paths,
+                    delete_tracks=database.delete_tracks,
+                    submit=ingestion_pipeline.submit,
+                    purge_missing=settings.reconcile_purge_missing,
+                )
+            )
+            reconciler.start()
+            app.state.reconciler = reconciler
+
 
 def shutdown_event():
     watcher = getattr(app.state, "file_watcher", None)
     if watcher:
         watcher.stop_file_watcher()
 
+    ingestion_pipeline = getattr(app.state, "ingestion_pipeline", None)
+    if ingestion_pipeline:
+        ingestion_pipeline.stop()
+
+    db_executor = getattr(app.state, "db_executor", None)
+    if db_executor:
+        db_executor.shutdown(wait=True)
+
+    database = getattr(app.state, "database", None)
+    if database:
+        database.close()
+
 
 @app.get("/tracks", response_model=GetTracksResponse)
-def get_tracks(
+async def get_tracks(
     cursor: Optional[str] = None,
     limit: int = Query(500, ge=1, le=1000),
     offset: int = Query(0, ge=0),
@@ -119,19 +290,15 @@ def get_tracks(
     album_id: Optional[int] = None,
     newer_than: Optional[int] = None,
     older_than: Optional[int] = None,
+    include_total: bool = False,
 ):
     database: Database = cast(Database, app.state.database)
 
     search_parameters: List[SearchParameter]
     order_parameters: List[OrderParameter]
+    row_filter_parameters: List[RowFilterParameter]
     if not cursor:
-        order_parameters = [
-            OrderParameter(column="artist", isAscending=True),
-            OrderParameter(column="album", isAscending=True),
-            OrderParameter(column="disc_number", isAscending=True),
-            OrderParameter(column="track_number", isAscending=True),
-            OrderParameter(column="uuid_id", isAscending=True),
-        ]
+        order_parameters = list(DEFAULT_TRACK_ORDER)
         search_parameters = []
         row_filter_parameters = []
         if newer_than:
@@ -148,65 +315,36 @@ def get_tracks(
             )
 
     else:
-        try:
-            decoded = json.loads(cursor)
-        except json.JSONDecodeError:
+        decoded = decode_cursor(cursor, "tracks")
+        shape = decoded.shape
+        if len(decoded.filter_values) != len(shape.search) + 2:
             raise HTTPException(
-                status_code=400, detail="Cursor could not be decoded for json"
-            )
-        if not isinstance(decoded, dict):
-            raise HTTPException(
-                status_code=400, detail="Cursor did not decode to a dict"
-            )
-
-        cursor_dict: Dict[str, Any] = decoded
-
-        if not cursor_dict:
-            raise HTTPException(
-                status_code=400, detail="Cursor could not be decoded for json"
+                status_code=400, detail="Cursor has the wrong filter count"
             )
 
-        valid_cursor_keys = sorted(
-            [
-                "order_parameters",
-                "row_filter_parameters",
-                "search_parameters",
-                "artist_id",
-                "album_id",
+        try:
+            order_parameters = list(shape.order_parameters)
+            search_parameters = [
+                SearchParameter(column=column, operator=operator, value=value)
+                for (column, operator), value in zip(
+                    shape.search, decoded.filter_values
+                )
             ]
-        )
-        if sorted(cursor_dict.keys()) != valid_cursor_keys:
-            raise HTTPException(
-                status_code=400, detail="Invalid dictionary keys for the cursor_dict"
-            )
-
-        order_parameters = [
-            OrderParameter(**item) for item in cursor_dict["order_parameters"]
-        ]
-        search_parameters = [
-            SearchParameter(**item) for item in cursor_dict["search_parameters"]
-        ]
-        row_filter_parameters = [
-            RowFilterParameter(**item) for item in cursor_dict["row_filter_parameters"]
-        ]
-        artist_id = cursor_dict["artist_id"]
-        album_id = cursor_dict["album_id"]
-
-    remaining_track_count = database.get_tracks_count(
-        search_parameters=search_parameters,
-        order_parameters=order_parameters,
-        row_filter_parameters=row_filter_parameters,
-        artist_id=artist_id,
-        album_id=album_id,
-    )
-    if remaining_track_count is None:
-        raise HTTPException(
-            status_code=500, detail="Unable to get count of remaining tracks"
-        )
-    if remaining_track_count == 0 or offset >= remaining_track_count:
-        return GetTracksResponse(data=[], nextCursor=None)
-
-    gotten_tracks = database.get_tracks(
+            row_filter_parameters = [
+                RowFilterParameter(
+                    column=param.column,
+                    value=str(value) if value is not None else None,
+                )
+                for param, value in zip(order_parameters, decoded.key_values)
+            ]
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        artist_id, album_id = decoded.filter_values[-2:]
+
+    # Rows are serialized directly; building a Track and ClientTrack per row
+    # and validating the response model dominated large pages.
+    page = await run_blocking(
+        database.get_track_rows_page,
         search_parameters=search_parameters,
         order_parameters=order_parameters,
         row_filter_parameters=row_filter_parameters,
@@ -215,39 +353,46 @@ def get_tracks(
         limit=limit,
         offset=offset,
     )
+    if page is None:
+        raise HTTPException(status_code=500, detail="Unable to fetch tracks")
+
+    total_count = None
+    if include_total:
+        total_count = await run_blocking(
+            database.get_tracks_total,
+            search_parameters=search_parameters,
+            artist_id=artist_id,
+            album_id=album_id,
+        )
+        if total_count is None:
+            raise HTTPException(
+                status_code=500, detail="Unable to get count of tracks"
+            )
 
-    client_track_list = [ClientTrack.from_track(track=track) for track in gotten_tracks]
-    if len(client_track_list) == remaining_track_count:
+    if not page.has_more:
         nextCursor = None
     else:
-        last_track: ClientTrack = client_track_list[-1]
-
-        new_row_filter_parameters: List[RowFilterParameter] = []
-        for order_param in order_parameters:
-            col = order_param.column
-            # Linked to allowed track columns in database.py.
-            if col in ["uuid_id", "created_at", "last_updated"]:
-                raw_value = getattr(last_track, col)
-            else:
-                raw_value = getattr(last_track.metadata, col)
-            value = str(raw_value) if raw_value is not None else None
-            new_row_filter_parameters.append(
-                RowFilterParameter(column=col, value=value)
-            )
+        last_row = page.items[-1]
+        # Order columns are all selected by the tracks query, see database.py.
+        key_values: List[Any] = [
+            last_row[order_param.column] for order_param in order_parameters
+        ]
 
-        nextCursor = json.dumps(
-            {
-                "order_parameters": [asdict(param) for param in order_parameters],
-                "row_filter_parameters": [
-                    asdict(param) for param in new_row_filter_parameters
-                ],
-                "search_parameters": [asdict(param) for param in search_parameters],
-                "artist_id": artist_id,
-                "album_id": album_id,
-            }
+        shape = CursorShape(
+            endpoint="tracks",
+            order_parameters=tuple(order_parameters),
+            search=tuple((p.column, p.operator) for p in search_parameters),
+        )
+        nextCursor = app.state.cursor_codec.encode(
+            shape,
+            [p.value for p in search_parameters] + [artist_id, album_id],
+            key_values,
         )
 
-    return GetTracksResponse(data=client_track_list, nextCursor=nextCursor)
+    content = await run_blocking(
+        tracks_response_json, page.items, nextCursor, total_count
+    )
+    return Response(content=content, media_type="application/json")
 
 
 _CODEC_MIME: dict[str, str] = {
@@ -263,39 +408,39 @@ _CODEC_MIME: dict[str, str] = {
 
 
 @app.get("/tracks/{uuid_id}/stream")
-def stream_track(uuid_id: str, request: Request):
-    CHUNK_SIZE = 1024 * 1024
-    search_parameters = [SearchParameter(column="uuid_id", operator="=", value=uuid_id)]
-    track_list: List[Track] = app.state.database.get_tracks(
-        search_parameters=search_parameters
-    )
-    if len(track_list) <= 0:
+async def stream_track(uuid_id: str, request: Request):
+    database: Database = cast(Database, app.state.database)
+    # Players seek with many Range requests; once cached, those skip both
+    # the database and the executor hop.
+    info = database.peek_stream_info(uuid_id)
+    if info is None:
+        info = await run_blocking(database.get_stream_info, uuid_id)
+    if info is None:
         raise HTTPException(
             status_code=404, detail=f"Could not find track with uuid: {uuid_id}"
         )
-    track: Track = track_list[0]
-    file_path = track.file_path
-    if not file_path.exists():
+    file_path = info.file_path
+    if info.file_size is None or info.mtime is None:
         raise HTTPException(
             status_code=404,
             detail=f"file path for the track is now dead. Path: {file_path}",
         )
-    file_size = file_path.stat().st_size
+    file_size = info.file_size
+    media_type = _CODEC_MIME.get(info.codec or "", f"audio/{info.codec}")
+    last_modified = formatdate(info.mtime, usegmt=True)
     range_header = request.headers.get("range")
 
     if not range_header:
-
-        def iterfile():
-            with file_path.open("rb") as f:
-                while chunk := f.read(CHUNK_SIZE):
-                    yield chunk
-
-        return StreamingResponse(
-            iterfile(),
-            media_type=_CODEC_MIME.get(
-                track.metadata.codec or "", f"audio/{track.metadata.codec}"
-            ),
-            headers={"Accept-ranges": "bytes", "Content-length": str(file_size)},
+        return FileRangeResponse(
+            file_path,
+            offset=0,
+            length=file_size,
+            media_type=media_type,
+            headers={
+                "Accept-ranges": "bytes",
+                "Content-length": str(file_size),
+                "Last-modified": last_modified,
+            },
         )
 
     try:
@@ -321,34 +466,27 @@ def stream_track(uuid_id: str, request: Request):
 
     content_length = end - start + 1
 
-    def iter_range():
-        with file_path.open("rb") as f:
-            f.seek(start)
-            remaining_bytes = content_length
-            while remaining_bytes:
-                chunk = f.read(min(CHUNK_SIZE, remaining_bytes))
-                remaining_bytes -= len(chunk)
-                yield chunk
-
-    return StreamingResponse(
-        iter_range(),
+    return FileRangeResponse(
+        file_path,
+        offset=start,
+        length=content_length,
         status_code=206,
-        media_type=_CODEC_MIME.get(
-            track.metadata.codec or "", f"audio/{track.metadata.codec}"
-        ),
+        media_type=media_type,
         headers={
             "Accept-ranges": "bytes",
             "Content-range": f"bytes {start}-{end}/{file_size}",
             "Content-length": str(content_length),
+            "Last-modified": last_modified,
         },
     )
 
 
 @app.get("/artists", response_model=GetArtistsResponse)
-def get_artists(
+async def get_artists(
     cursor: Optional[str] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    include_total: bool = False,
 ):
     database: Database = cast(Database, app.state.database)
 
@@ -356,87 +494,64 @@ def get_artists(
     row_filter_parameters: List[ArtistRowFilterParameter]
 
     if not cursor:
-        order_parameters = [
-            ArtistOrderParameter(column="name", isAscending=True),
-        ]
+        order_parameters = list(DEFAULT_ARTIST_ORDER)
         row_filter_parameters = []
     else:
+        decoded = decode_cursor(cursor, "artists")
+        order_parameters = list(decoded.shape.order_parameters)
         try:
-            decoded = json.loads(cursor)
-        except json.JSONDecodeError:
-            raise HTTPException(
-                status_code=400, detail="Cursor could not be decoded as JSON"
-            )
-        if not isinstance(decoded, dict):
-            raise HTTPException(
-                status_code=400, detail="Cursor did not decode to a dict"
-            )
-
-        cursor_dict: Dict[str, Any] = decoded
-        valid_cursor_keys = sorted(["order_parameters", "row_filter_parameters"])
-        if sorted(cursor_dict.keys()) != valid_cursor_keys:
-            raise HTTPException(
-                status_code=400, detail="Invalid dictionary keys for the cursor"
-            )
-
-        order_parameters = [
-            ArtistOrderParameter(**item) for item in cursor_dict["order_parameters"]
-        ]
-        row_filter_parameters = [
-            ArtistRowFilterParameter(**item)
-            for item in cursor_dict["row_filter_parameters"]
-        ]
-
-    remaining_count = database.get_artists_count(
-        order_parameters=order_parameters,
-        row_filter_parameters=row_filter_parameters,
-    )
-    if remaining_count is None:
-        raise HTTPException(
-            status_code=500, detail="Unable to get count of remaining artists"
-        )
-
-    if remaining_count == 0 or offset >= remaining_count:
-        return GetArtistsResponse(data=[], nextCursor=None)
+            row_filter_parameters = [
+                ArtistRowFilterParameter(column=param.column, value=value)
+                for param, value in zip(order_parameters, decoded.key_values)
+            ]
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
 
-    returned_artists = database.get_artists(
+    page = await run_blocking(
+        database.get_artists_page,
         order_parameters=order_parameters,
         row_filter_parameters=row_filter_parameters,
         limit=limit,
         offset=offset,
     )
 
-    if returned_artists is None:
+    if page is None:
         raise HTTPException(
             status_code=500, detail="Unable to fetch artists from the database"
         )
 
-    if len(returned_artists) == remaining_count:
+    total_count = None
+    if include_total:
+        total_count = await run_blocking(database.get_artists_total)
+        if total_count is None:
+            raise HTTPException(
+                status_code=500, detail="Unable to get count of artists"
+            )
+
+    returned_artists = page.items
+
+    if not page.has_more:
         nextCursor = None
     else:
         last_artist = returned_artists[-1]
-        new_row_filter_parameters = [
-            ArtistRowFilterParameter(column="name", value=last_artist.name),
-        ]
-
-        nextCursor = json.dumps(
-            {
-                "order_parameters": [asdict(param) for param in order_parameters],
-                "row_filter_parameters": [
-                    asdict(param) for param in new_row_filter_parameters
-                ],
-            }
+        nextCursor = app.state.cursor_codec.encode(
+            CursorShape(endpoint="artists", order_parameters=tuple(order_parameters)),
+            [],
+            [getattr(last_artist, param.column) for param in order_parameters],
         )
 
-    return GetArtistsResponse(data=returned_artists, nextCursor=nextCursor)
+    return GetArtistsResponse(
+        data=returned_artists, nextCursor=nextCursor, totalCount=total_count
+    )
 
 
 @app.get("/albums", response_model=GetAlbumsResponse)
-def get_albums(
+async def get_albums(
     cursor: Optional[str] = None,
     limit: int = Query(500, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     artist_id: Optional[int] = None,
+    include_total: bool = False,
 ):
     database: Database = cast(Database, app.state.database)
 
@@ -445,61 +560,31 @@ def get_albums(
 
     if not cursor:
         if artist_id is not None:
-            order_parameters = [
-                AlbumOrderParameter(column="year", isAscending=False, nullsLast=True),
-                AlbumOrderParameter(column="is_single_grouping", isAscending=True),
-                AlbumOrderParameter(column="name", isAscending=True, nullsLast=True),
-            ]
+            order_parameters = list(ARTIST_ALBUM_ORDER)
         else:
-            order_parameters = [
-                AlbumOrderParameter(column="artist", isAscending=True, nullsLast=True),
-                AlbumOrderParameter(column="year", isAscending=False, nullsLast=True),
-                AlbumOrderParameter(column="is_single_grouping", isAscending=True),
-                AlbumOrderParameter(column="name", isAscending=True, nullsLast=True),
-            ]
+            order_parameters = list(LIBRARY_ALBUM_ORDER)
         row_filter_parameters = []
     else:
-        try:
-            decoded = json.loads(cursor)
-        except json.JSONDecodeError:
-            raise HTTPException(
-                status_code=400, detail="Cursor could not be decoded as JSON"
-            )
-        if not isinstance(decoded, dict):
-            raise HTTPException(
-                status_code=400, detail="Cursor did not decode to a dict"
-            )
-
-        cursor_dict: Dict[str, Any] = decoded
-        valid_cursor_keys = sorted(
-            ["order_parameters", "row_filter_parameters", "artist_id"]
-        )
-        if sorted(cursor_dict.keys()) != valid_cursor_keys:
+        decoded = decode_cursor(cursor, "albums")
+        if len(decoded.filter_values) != 1:
             raise HTTPException(
-                status_code=400, detail="Invalid dictionary keys for the cursor"
+                status_code=400, detail="Cursor has the wrong filter count"
             )
+        order_parameters = list(decoded.shape.order_parameters)
+        try:
+            row_filter_parameters = [
+                AlbumRowFilterParameter(
+                    column=param.column,
+                    value=str(value) if value is not None else None,
+                )
+                for param, value in zip(order_parameters, decoded.key_values)
+            ]
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        artist_id = decoded.filter_values[0]
 
-        order_parameters = [
-            AlbumOrderParameter(**item) for item in cursor_dict["order_parameters"]
-        ]
-        row_filter_parameters = [
-            AlbumRowFilterParameter(**item)
-            for item in cursor_dict["row_filter_parameters"]
-        ]
-        artist_id = cursor_dict["artist_id"]
-
-    remaining_count = database.get_albums_count(
-        artist_id=artist_id,
-        order_parameters=order_parameters,
-        row_filter_parameters=row_filter_parameters,
-    )
-    if remaining_count is None:
-        raise HTTPException(status_code=500, detail="Unable to get count")
-
-    if remaining_count == 0 or offset >= remaining_count:
-        return GetAlbumsResponse(data=[], nextCursor=None)
-
-    returned_albums: List[Album] | None = database.get_albums(
+    page = await run_blocking(
+        database.get_albums_page,
         artist_id=artist_id,
         order_parameters=order_parameters,
         row_filter_parameters=row_filter_parameters,
@@ -507,50 +592,53 @@ def get_albums(
         offset=offset,
     )
 
-    if returned_albums is None:
+    if page is None:
         raise HTTPException(
             status_code=500,
             detail="Unable to fetch albums from the backends database",
         )
 
-    if len(returned_albums) == remaining_count:
+    total_count = None
+    if include_total:
+        total_count = await run_blocking(
+            database.get_albums_total, artist_id=artist_id
+        )
+        if total_count is None:
+            raise HTTPException(status_code=500, detail="Unable to get count")
+
+    returned_albums: List[Album] = page.items
+
+    if not page.has_more:
         nextCursor = None
     else:
         last_album: Album = returned_albums[-1]
-        new_row_filter_parameters: List[AlbumRowFilterParameter] = []
+        key_values: List[Any] = []
         for order_param in order_parameters:
             col = order_param.column
-            raw_value: Any
             if col == "name":
-                raw_value = last_album.name
+                key_values.append(last_album.name)
             elif col == "artist":
-                raw_value = last_album.artist
+                key_values.append(last_album.artist)
             elif col == "year":
-                raw_value = last_album.year
+                key_values.append(last_album.year)
             elif col == "is_single_grouping":
-                raw_value = 1 if last_album.is_single_grouping else 0
+                key_values.append(1 if last_album.is_single_grouping else 0)
             else:
-                raw_value = None
-            value = str(raw_value) if raw_value is not None else None
-            new_row_filter_parameters.append(
-                AlbumRowFilterParameter(column=col, value=value)
-            )
+                key_values.append(None)
 
-        nextCursor = json.dumps(
-            {
-                "order_parameters": [asdict(param) for param in order_parameters],
-                "row_filter_parameters": [
-                    asdict(param) for param in new_row_filter_parameters
-                ],
-                "artist_id": artist_id,
-            }
+        nextCursor = app.state.cursor_codec.encode(
+            CursorShape(endpoint="albums", order_parameters=tuple(order_parameters)),
+            [artist_id],
+            key_values,
         )
 
-    return GetAlbumsResponse(data=returned_albums, nextCursor=nextCursor)
+    return GetAlbumsResponse(
+        data=returned_albums, nextCursor=nextCursor, totalCount=total_count
+    )
 
 
 @app.get("/search", response_model=GetSearchResponse)
-def search(
+async def search(
     q: str = Query(..., min_length=1),
     types: str = Query("tracks,artists,albums"),
     limit: int = Query(10, ge=1, le=50),
@@ -570,7 +658,8 @@ def search(
     if not return_types:
         raise HTTPException(status_code=400, detail="No valid types specified")
 
-    results = database.get_search_results(
+    results = await run_blocking(
+        database.get_search_results,
         query=q,
         return_types=return_types,
         limit_per_type=limit,
@@ -583,6 +672,35 @@ def search(
     )
 
 
+@app.get("/ingestion/stats")
+async def get_ingestion_stats():
+    """Per-stage throughput and queue depth of the ingestion pipeline, plus dedup
+    counts, the size of the watcher's processed-file memory, how files were
+    placed into the library and the database connection pool."""
+    file_watcher: FileWatcher | None = app.state.file_watcher
+    watcher = asdict(file_watcher.processed.stats()) if file_watcher is not None else None
+    organizer: Organizer | None = app.state.organizer
+    placement = asdict(organizer.placement_stats()) if organizer is not None else None
+    database = asdict(app.state.database.pool_stats())
+    ingestion_pipeline: IngestionPipeline | None = app.state.ingestion_pipeline
+    if ingestion_pipeline is None:
+        return {
+            "stages": [],
+            "dedup": None,
+            "watcher": watcher,
+            "placement": placement,
+            "database": database,
+        }
+    deduplicator = ingestion_pipeline.ctx.deduplicator
+    return {
+        "stages": [asdict(stats) for stats in ingestion_pipeline.stats()],
+        "dedup": asdict(deduplicator.stats()) if deduplicator is not None else None,
+        "watcher": watcher,
+        "placement": placement,
+        "database": database,
+    }
+
+
 @app.get("/")
 def read_root():
     return {"message": "Healthy"}
@@ -9,3 +9,6 @@ class Album(BaseModel):
     artist_id: int
     year: Optional[int] = None
     is_single_grouping: bool = False
+    track_count: int = 0
+    total_duration: float = 0.0
+    has_album_art: bool = False
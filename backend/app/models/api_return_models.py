@@ -8,16 +8,19 @@ from .album import Album
 class GetTracksResponse(BaseModel):
     data: List[ClientTrack]
     nextCursor: Optional[str] = None
+    totalCount: Optional[int] = None
 
 
 class GetArtistsResponse(BaseModel):
     data: List[Artist]
     nextCursor: Optional[str] = None
+    totalCount: Optional[int] = None
 
 
 class GetAlbumsResponse(BaseModel):
     data: List[Album]
     nextCursor: Optional[str] = None
+    totalCount: Optional[int] = None
 
 
 class GetSearchResponse(BaseModel):
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class Artist(BaseModel):
     id: int
     name: str
+    track_count: int = 0
+    total_duration: float = 0.0
+    max_year: Optional[int] = None
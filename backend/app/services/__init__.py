@@ -1,3 +1,5 @@
 from .file_watcher import FileWatcher
-from .ingestion import IngestorContext, Ingestor
-from .organizer import OrganizerContext, Organizer
\ No newline at end of file
+from .organizer import OrganizerContext, Organizer
+from .pipeline import IngestionPipeline, IngestJobsContext, PipelineContext, StageStats
+from .dedup import DedupContext, Deduplicator, DedupStats
+from .reconcile import ReconcileContext, Reconciler, ReconcileStats
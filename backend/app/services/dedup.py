@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.database import HashCandidate
+
+# tracks.file_hash holds one of
+#   b2:<size>:<prefilter digest>                  only the prefilter was needed
+#   b2:<size>:<prefilter digest>:<full digest>    a prefilter collision happened
+# The prefilter digest covers the first and last PARTIAL_HASH_BYTES, so it is
+# cheap even for big files. Since every form starts with the prefilter key,
+# the UNIQUE index on file_hash doubles as the prefilter index (a range scan),
+# and the full digest is only computed, for both files, when two files share
+# a key.
+
+HASH_PREFIX = "b2"
+PARTIAL_HASH_BYTES = 64 * 1024
+FULL_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def prefilter_key(file_path: Path) -> str:
+    """Size plus a digest of the first and last PARTIAL_HASH_BYTES."""
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(size - PARTIAL_HASH_BYTES)
+            digest.update(f.read(PARTIAL_HASH_BYTES))
+        elif size > PARTIAL_HASH_BYTES:
+            digest.update(f.read())
+    return f"{HASH_PREFIX}:{size}:{digest.hexdigest()}"
+
+
+def full_digest(file_path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(file_path, "rb") as f:
+        while chunk := f.read(FULL_HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_file_hash(file_hash: str) -> tuple[str, str | None]:
+    """(prefilter key, full digest or None) of a stored file_hash."""
+    parts = file_hash.split(":")
+    if len(parts) == 4:
+        return ":".join(parts[:3]), parts[3]
+    return file_hash, None
+
+
+@dataclass(frozen=True)
+class DedupContext:
+    find_hash_candidates: Callable[[str], List[HashCandidate]]
+    set_file_hash: Callable[[str, str], bool]
+
+
+@dataclass(frozen=True)
+class DedupStats:
+    checked: int
+    duplicates: int
+    full_hashes: int
+
+
+class Deduplicator:
+    """Decides the file_hash of incoming files and spots duplicates.
+
+    Files with the same prefilter key are checked one at a time: a key is
+    claimed by the first file and the next one waits until release() is
+    called for it, which the pipeline does once the first file is in the
+    database (or has been dropped). That way two copies arriving together
+    still see each other.
+    """
+
+    def __init__(self, ctx: DedupContext):
+        self.ctx = ctx
+        self._lock = threading.Lock()
+        self._claims: Dict[str, threading.Event] = {}
+        self._checked = 0
+        self._duplicates = 0
+        self._full_hashes = 0
+
+    def file_hash_for(self, file_path: Path) -> str | None:
+        """The file_hash to store for file_path, or None if it is a duplicate.
+
+        On a non-None result the prefilter key stays claimed until release().
+        """
+        key = prefilter_key(file_path)
+        while True:
+            with self._lock:
+                claim = self._claims.get(key)
+                if claim is None:
+                    self._claims[key] = threading.Event()
+                    self._checked += 1
+                    break
+            claim.wait()
+
+        try:
+            candidates = self.ctx.find_hash_candidates(key)
+            if not candidates:
+                return key
+
+            digest = self._full_digest(file_path)
+            for candidate in candidates:
+                candidate_digest = self._candidate_digest(key, candidate)
+                if candidate_digest == digest:
+                    print(f"{file_path} is a duplicate of {candidate.file_path}")
+                    with self._lock:
+                        self._duplicates += 1
+                    self.release(key)
+                    return None
+            return f"{key}:{digest}"
+        except BaseException:
+            self.release(key)
+            raise
+
+    def release(self, file_hash: str | None):
+        if file_hash is None:
+            return
+        key, _ = split_file_hash(file_hash)
+        with self._lock:
+            claim = self._claims.pop(key, None)
+        if claim is not None:
+            claim.set()
+
+    def stats(self) -> DedupStats:
+        with self._lock:
+            return DedupStats(
+                checked=self._checked,
+                duplicates=self._duplicates,
+                full_hashes=self._full_hashes,
+            )
+
+    def _full_digest(self, file_path: Path) -> str:
+        digest = full_digest(file_path)
+        with self._lock:
+            self._full_hashes += 1
+        return digest
+
+    def _candidate_digest(self, key: str, candidate: HashCandidate) -> str | None:
+        _, digest = split_file_hash(candidate.file_hash)
+        if digest is not None:
+            return digest
+        try:
+            digest = self._full_digest(candidate.file_path)
+        except OSError as e:
+            print(f"Could not hash library file {candidate.file_path}. {e}")
+            return None
+        # Store it, so the library file is read in full at most once.
+        self.ctx.set_file_hash(candidate.uuid_id, f"{key}:{digest}")
+        return digest
@@ -1,34 +1,266 @@
+import math
 import os
+import threading
 import time
+from collections import OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Dict, List, Set, Tuple
 
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
 
+# A closed-after-write event (inotify IN_CLOSE_WRITE) means the writer is
+# done, so the path only has to stay quiet for this long instead.
+CLOSED_QUIET_SECONDS = 0.05
+
+
+@dataclass(frozen=True)
+class ProcessedPathsStats:
+    size: int
+    max_size: int
+    ttl_seconds: float
+    evicted: int
+
+
+class ProcessedPaths:
+    """Files the watcher has already handed over, so repeated events are ignored.
+
+    Entries are keyed by (path, inode, mtime), so a new file that reuses a
+    name is not mistaken for the old one. They expire after ttl_seconds, and
+    the oldest go first once there are max_size of them, so memory stays flat
+    however long the watcher runs.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl_seconds: float = 24 * 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Insertion order is also expiry order: every entry gets the same TTL.
+        self._seen: OrderedDict[Tuple[Path, int | None, int | None], float] = (
+            OrderedDict()
+        )
+        self._evicted = 0
+
+    def __contains__(self, path: Path) -> bool:
+        key = self._key(path)
+        with self._lock:
+            self._expire(time.monotonic())
+            return key in self._seen
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._seen)
+
+    def add(self, path: Path) -> bool:
+        """Remember path. Returns False if this very file was already there."""
+        key = self._key(path)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._seen:
+                return False
+            self._seen[key] = now
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+                self._evicted += 1
+            return True
+
+    def stats(self) -> ProcessedPathsStats:
+        with self._lock:
+            self._expire(time.monotonic())
+            return ProcessedPathsStats(
+                size=len(self._seen),
+                max_size=self.max_size,
+                ttl_seconds=self.ttl_seconds,
+                evicted=self._evicted,
+            )
+
+    def _key(self, path: Path) -> Tuple[Path, int | None, int | None]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Gone already; the path alone is the best key there is.
+            return path, None, None
+        return path, stat.st_ino, stat.st_mtime_ns
+
+    def _expire(self, now: float):
+        while self._seen:
+            oldest = next(iter(self._seen.values()))
+            if now - oldest < self.ttl_seconds:
+                return
+            self._seen.popitem(last=False)
+            self._evicted += 1
+
+
+class QuietTimer:
+    """Hands paths to on_ready in batches once they have been quiet for a while.
+
+    Every touch() pushes the path's deadline back. Deadlines live on a timer
+    wheel: slots keyed by tick number, each holding the paths due at that
+    tick. A single thread turns the wheel every tick_seconds, so waiting
+    costs nothing per path, and a re-touched path is left in its old slot
+    and skipped there instead of being searched for.
+    """
+
+    def __init__(
+        self,
+        quiet_seconds: float,
+        on_ready: Callable[[List[Path]], None],
+        tick_seconds: float | None = None,
+    ):
+        self.quiet_seconds = quiet_seconds
+        self.on_ready = on_ready
+        self.tick_seconds = tick_seconds or max(quiet_seconds / 4, 0.01)
+        self._lock = threading.Lock()
+        self._deadlines: Dict[Path, int] = {}
+        self._wheel: Dict[int, Set[Path]] = defaultdict(set)
+        # The first slot the wheel has not turned past yet.
+        self._next_tick = self._elapsed_ticks()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def touch(self, path: Path, quiet_seconds: float | None = None):
+        if quiet_seconds is None:
+            quiet_seconds = self.quiet_seconds
+        deadline = math.ceil((time.monotonic() + quiet_seconds) / self.tick_seconds)
+        with self._lock:
+            # Never behind the wheel, or the path would sit in a turned slot.
+            deadline = max(deadline, self._next_tick)
+            if self._deadlines.get(path) == deadline:
+                return
+            self._deadlines[path] = deadline
+            self._wheel[deadline].add(path)
+
+    def forget(self, path: Path):
+        with self._lock:
+            self._deadlines.pop(path, None)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._deadlines)
+
+    def _elapsed_ticks(self) -> int:
+        return math.floor(time.monotonic() / self.tick_seconds)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="file-watcher-timer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop turning the wheel. Paths that are still waiting are dropped."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(
+            max(0.0, self._next_tick * self.tick_seconds - time.monotonic())
+        ):
+            ready = []
+            with self._lock:
+                now = self._elapsed_ticks()
+                for tick in range(self._next_tick, now + 1):
+                    for path in self._wheel.pop(tick, ()):
+                        # Touched again since: it sits in a later slot too.
+                        if self._deadlines.get(path) == tick:
+                            del self._deadlines[path]
+                            ready.append(path)
+                self._next_tick = max(self._next_tick, now + 1)
+            if not ready:
+                continue
+            try:
+                self.on_ready(ready)
+            except Exception as e:
+                print(f"Failed to hand over {len(ready)} quiet files. {e}")
+
+
 class FileWatcher(FileSystemEventHandler):
-    def __init__(self, import_dir: Path, on_file: Callable[[Path], bool]):
+    def __init__(
+        self,
+        import_dir: Path,
+        on_file: Callable[[Path], bool | None],
+        wait_for_stable: bool = True,
+        quiet_seconds: float | None = None,
+        processed: ProcessedPaths | None = None,
+    ):
+        """With wait_for_stable=False, new paths go straight to on_file and the
+        callee (e.g. the IngestionPipeline) is responsible for stabilizing them.
+
+        With quiet_seconds, created/modified/closed/moved events are coalesced
+        instead: a path goes to on_file once no event has touched it for
+        quiet_seconds (CLOSED_QUIET_SECONDS after a close-after-write), and
+        nothing polls the file. wait_for_stable is ignored then.
+        """
         self.import_dir = import_dir
         self.on_file = on_file
+        self.wait_for_stable = wait_for_stable
         self.observer = None
-        self.executor = ThreadPoolExecutor(max_workers=8)
-        # Track already-seen paths to avoid double-processing duplicate FS events.
-        self.processed: set[Path] = set()
+        self.quiet_timer = (
+            QuietTimer(quiet_seconds, self.handle_quiet_files)
+            if quiet_seconds is not None
+            else None
+        )
+        self.executor = (
+            ThreadPoolExecutor(max_workers=8)
+            if wait_for_stable and self.quiet_timer is None
+            else None
+        )
+        # Track already-seen files to avoid double-processing duplicate FS events.
+        self.processed = processed if processed is not None else ProcessedPaths()
 
     def on_created(self, event):
         if event.is_directory:
             return
 
         path = Path(os.fsdecode(event.src_path))
-        if path in self.processed:
+        if self.quiet_timer is not None:
+            self.quiet_timer.touch(path)
+            return
+        if not self.processed.add(path):
             return
 
-        self.processed.add(path)
+        if self.executor is None:
+            self.on_file(path)
+            return
         self.executor.submit(self.process_file_after_stable, path)
 
+    def on_modified(self, event):
+        if event.is_directory or self.quiet_timer is None:
+            return
+        self.quiet_timer.touch(Path(os.fsdecode(event.src_path)))
+
+    def on_closed(self, event):
+        if event.is_directory or self.quiet_timer is None:
+            return
+        self.quiet_timer.touch(
+            Path(os.fsdecode(event.src_path)), quiet_seconds=CLOSED_QUIET_SECONDS
+        )
+
+    def on_deleted(self, event):
+        if event.is_directory or self.quiet_timer is None:
+            return
+        self.quiet_timer.forget(Path(os.fsdecode(event.src_path)))
+
+    def on_moved(self, event):
+        # Copy tools like rsync write to a temporary name and rename at the end.
+        if event.is_directory or self.quiet_timer is None:
+            return
+        self.quiet_timer.forget(Path(os.fsdecode(event.src_path)))
+        self.quiet_timer.touch(Path(os.fsdecode(event.dest_path)))
+
     def start_file_watcher(self):
+        if self.quiet_timer is not None:
+            self.quiet_timer.start()
         if self.observer is None or not self.observer.is_alive():
             self.observer = Observer()
             self.observer.schedule(self, str(self.import_dir), recursive=True)
@@ -41,11 +273,18 @@ class FileWatcher(FileSystemEventHandler):
             self.observer.join()
             self.observer = None
             print("File watcher stopped")
+        if self.quiet_timer is not None:
+            self.quiet_timer.stop()
 
     def handle_new_file(self, path: Path):
         # print(f"Handling new file {path}")
         self.on_file(path)
 
+    def handle_quiet_files(self, paths: List[Path]):
+        for path in paths:
+            if self.processed.add(path):
+                self.handle_new_file(path)
+
     def process_file_after_stable(self, path: Path) -> bool:
         # print(f"Processing file {path} after stable")
         if not wait_until_ready(path):
@@ -1,51 +1,9 @@
 from pathlib import Path
 from app.core.media_types import AUDIO_EXTENSIONS, ARCHIVE_EXTENSIONS
-from dataclasses import dataclass
 from typing import Callable
 import libarchive
 import shutil
-import subprocess
-import json
 
-@dataclass(frozen=True)
-class IngestorContext:
-    workspace_dir: Path
-    organize_function: Callable[[Path], bool]
-
-# TODO: make organize_function actually be called from context, rather than lazily patching
-class Ingestor:
-    def __init__(self, ctx: IngestorContext):
-        self.ctx = ctx
-        self.organize_function = ctx.organize_function
-
-    def ingest_file(self, file_path: Path) -> bool:
-        if is_archive(file_path):
-            extract_dir = extract_archive(file_path, self.ctx.workspace_dir)
-
-            if extract_dir is None:
-                return False
-            
-            for path in extract_dir.rglob("*"):
-                if not path.is_file():
-                    continue
-
-                if not is_music_file(path):
-                    continue
-
-                if not does_music_pass_quick_check(path):
-                    continue
-
-                self.organize_function(path)
-            return True
-
-        if not is_music_file(file_path):
-            return False
-        if not does_music_pass_quick_check(file_path):
-            return False
-        
-        self.organize_function(file_path)
-        return True
-        
 def is_music_file(file_path: Path) -> bool:
     return file_path.suffix.lower() in AUDIO_EXTENSIONS
 
@@ -55,55 +13,6 @@ def is_archive(file_path: Path) -> bool:
     name = file_path.name.lower()
     return any(name.endswith(ext) for ext in ARCHIVE_EXTENSIONS)
 
-def does_music_pass_quick_check(file_path: Path) -> bool:
-    try:
-        completed_process = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-select_streams",
-                "a",
-                "-hide_banner",
-                "-show_entries",
-                "stream=codec_type",
-                "-read_intervals",
-                "0%+#20",
-                "-of",
-                "json",
-                str(file_path),
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            check=False,
-        )
-    except FileNotFoundError:
-        print("ffprobe not found")
-        return False
-    except OSError:
-        return False
-
-    if completed_process.returncode != 0:
-        return False
-
-    try:
-        output = json.loads(completed_process.stdout or "")
-    except json.JSONDecodeError:
-        return False
-
-    if not isinstance(output, dict):
-        return False
-
-    streams = output.get("streams", [])
-    if not isinstance(streams, list):
-        return False
-
-    for stream in streams:
-        if isinstance(stream, dict) and stream.get("codec_type") == "audio":
-            return True
-    return False
-
 # TODO: Create propper directory path naming scheme
 def handle_extract_path(extract_path: Path) -> Path:
     try:
@@ -113,38 +22,50 @@ def handle_extract_path(extract_path: Path) -> Path:
         return handle_extract_path(extract_path)
     return extract_path
 
-# TODO: Do not assume disk usage allows to extract archive
-def extract_archive(archive_path: Path, base_dir: Path) -> Path | None:
+def stream_archive(
+    archive_path: Path, base_dir: Path, on_member: Callable[[Path], None]
+) -> bool:
+    """Extract only the audio members of an archive, one at a time.
+
+    Members are filtered on their pathname before any bytes are written, so
+    non-audio members never touch the disk. Each audio member is handed to
+    on_member as soon as it is fully written, while the rest of the archive is
+    still being read. If on_member blocks (e.g. on a full pipeline queue), so
+    does extraction, which keeps the workspace from filling up.
+
+    Returns False if the archive could not be read. Members already handed to
+    on_member stay where they are; the member being written is removed.
+    """
     extract_dir = handle_extract_path(base_dir / archive_path.name.split(".", 1)[0])
+    resolved_extract_dir = extract_dir.resolve()
+    handed_over = 0
+    partial_path: Path | None = None
     try:
         with libarchive.file_reader(str(archive_path)) as archive:
             for entry in archive:
-                
-                # Only allow files and directories
-                if not (entry.isfile or entry.isdir):
+                if not entry.isfile or not is_music_file(Path(entry.pathname)):
                     continue
 
-                target = extract_dir / entry.pathname
-                entry_path = target.resolve()
-
-                if not entry_path.is_relative_to(extract_dir.resolve()):
+                entry_path = (extract_dir / entry.pathname).resolve()
+                if not entry_path.is_relative_to(resolved_extract_dir):
                     raise ValueError("Path traversal detected")
-                
-                if entry.isdir:
-                    entry_path.mkdir(parents=True, exist_ok=True)
-                    continue
 
-                # Regular file
                 entry_path.parent.mkdir(parents=True, exist_ok=True)
-
+                partial_path = entry_path
                 with open(entry_path, "wb") as f:
                     for block in entry.get_blocks():
                         f.write(block)
-                    print(f"Extracted file: {entry_path}")
-        
-        return extract_dir
-    
+                partial_path = None
+
+                on_member(entry_path)
+                handed_over += 1
+
+        return True
+
     except Exception as e:
-        shutil.rmtree(extract_dir, ignore_errors=True)
-        print(f"Error extracting archive: {e}")
-        return None
\ No newline at end of file
+        if partial_path is not None:
+            partial_path.unlink(missing_ok=True)
+        if handed_over == 0:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+        print(f"Error streaming archive {archive_path}: {e}")
+        return False
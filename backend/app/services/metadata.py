@@ -1,15 +1,93 @@
 import json
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, NamedTuple
 
 from app.models.track_meta_data import TrackMetaData
+from app.services.tag_reader import read_probe_data
 
 # TODO: Handle non printable characters in metadata (remember the UniBe@t thingy where there were windows /r/n invisible characters...)
 # TODO: possible search database to see if artist/album already exists? and match capitalization? might be confusing...
 
 
+@dataclass(frozen=True)
+class ProbedFile:
+    """An audio file together with the metadata from its one probe.
+
+    The pipeline's probe stage produces these and hands them to the
+    Organizer, so a file is never probed twice on its way into the library.
+    """
+
+    file_path: Path
+    metadata: TrackMetaData
+    # Set by the pipeline's hash stage; see app/services/dedup.py.
+    file_hash: str | None = None
+
+
+def probe_file(file_path: Path) -> ProbedFile | None:
+    """Probe a file once. None means it has no usable audio stream."""
+    metadata = get_track_metadata(file_path)
+    if metadata is None:
+        return None
+    return ProbedFile(file_path=file_path, metadata=metadata)
+
+
+class ProbeRecord(NamedTuple):
+    """A probe result flattened to plain values.
+
+    This is what crosses the process boundary when probing runs in a
+    ProcessPoolExecutor; it pickles to a small tuple, unlike the Pydantic
+    models.
+    """
+
+    file_path: str
+    title: str | None
+    artist: str | None
+    album: str | None
+    album_artist: str | None
+    year: int | None
+    date: str | None
+    genre: str | None
+    track_number: int | None
+    disc_number: int | None
+    codec: str | None
+    duration: float
+    bitrate_kbps: float
+    sample_rate_hz: int
+    channels: int
+    has_album_art: bool
+
+
+def probe_records(file_paths: List[str]) -> List[ProbeRecord | None]:
+    """Probe a chunk of files, one record (or None) per path, in order."""
+    records: List[ProbeRecord | None] = []
+    for file_path in file_paths:
+        metadata = get_track_metadata(Path(file_path))
+        if metadata is None:
+            records.append(None)
+            continue
+        records.append(
+            ProbeRecord(
+                file_path,
+                *(getattr(metadata, name) for name in ProbeRecord._fields[1:]),
+            )
+        )
+    return records
+
+
+def probed_file_from_record(record: ProbeRecord) -> ProbedFile:
+    values = record._asdict()
+    file_path = values.pop("file_path")
+    return ProbedFile(file_path=Path(file_path), metadata=TrackMetaData(**values))
+
+
 def get_track_metadata(file_path: Path) -> TrackMetaData | None:
-    json_data = ffprobe_for_metadata(file_path)
+    # The in-process reader covers the common containers; anything it cannot
+    # parse still goes through ffprobe.
+    json_data = read_probe_data(file_path)
+    if json_data is None:
+        json_data = ffprobe_for_metadata(file_path)
     if json_data is None:
         return None
     metadata = build_track_metadata(json_data)
@@ -1,13 +1,11 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Callable, List
 
 from app.models.track import Track
 from app.models.track_meta_data import TrackMetaData
-from app.services.metadata import get_track_metadata
-
-# TODO: implement copy_file
-# TODO: do not assume that move destination is on the same filesystem as the source aka atomic rename for moving
+from app.services.metadata import ProbedFile, get_track_metadata
+from app.services.placement import FilePlacer, KnownDirectories, PlacementStats
 
 # For now, organization is as follows:
 # If a song has an artist it will go somewhere in music_library_dir / artist
@@ -21,6 +19,9 @@ class OrganizerContext:
     should_organize_files: bool
     should_copy_files: bool
     add_to_database: Callable[[Track], bool]
+    # Copy mode hardlinks into the library when it can, instead of copying.
+    # The import and the library copy are then the same file.
+    allow_hardlinks: bool = False
 
     def __post_init__(self):
         if not self.should_organize_files and self.should_copy_files:
@@ -33,68 +34,113 @@ class OrganizerContext:
 class Organizer:
     def __init__(self, ctx: OrganizerContext):
         self.ctx = ctx
+        # Shared by every placement, so an album's directory is created once.
+        self.directories = KnownDirectories()
+        self.placer = FilePlacer(
+            keep_sources=ctx.should_copy_files,
+            allow_hardlinks=ctx.allow_hardlinks,
+            directories=self.directories,
+        )
 
     def organize_file(self, file_path: Path) -> bool:
-        if not self.ctx.should_organize_files:
-            raise NotImplementedError(
-                "Organizer does not support in place organization yet"
-            )
-
-        if self.ctx.should_copy_files:
-            raise NotImplementedError("Organizer does not support copying yet")
+        """Probe and organize a file that has not been through the pipeline."""
+        self._check_supported()
 
-        # Case: Organizing and Moving (not copying)
         trackmetadata = get_track_metadata(file_path=file_path)
 
-        if trackmetadata is None or trackmetadata.is_empty():
+        if trackmetadata is None:
             print(f"{file_path} does not result in a TrackMetaData")
             return False
 
-        destination_dir = create_destination_dir(
-            trackmetadata=trackmetadata, root_dir=self.ctx.music_library_dir
+        return self.organize_probed_file(
+            ProbedFile(file_path=file_path, metadata=trackmetadata)
         )
 
-        destination_dir.mkdir(parents=True, exist_ok=True)
+    def organize_probed_file(self, probed_file: ProbedFile) -> bool:
+        track = self.place_probed_file(probed_file)
+        if track is None:
+            return False
+        self.sync_placements()
 
-        destination_path = destination_dir / file_path.name
+        self.ctx.add_to_database(track)
+        self.remove_placed_sources([probed_file.file_path])
 
-        was_moved = move_file(file_path=file_path, destination_path=destination_path)
+        return True
 
-        if not was_moved:
-            return False
+    def place_probed_file(self, probed_file: ProbedFile) -> Track | None:
+        """Move or copy a probed file into the library without touching the
+        database.
+
+        Returns the Track to store, so callers can batch the database writes.
+        The file is durable once sync_placements() returns.
+        """
+        self._check_supported()
+
+        file_path = probed_file.file_path
+        trackmetadata = probed_file.metadata
+
+        if trackmetadata.is_empty():
+            print(f"{file_path} does not result in a TrackMetaData")
+            return None
+
+        destination_path = self.destination_for(probed_file)
+
+        # Already placed, e.g. by a run that stopped before the database write.
+        if file_path == destination_path:
+            return Track(
+                file_path=destination_path,
+                metadata=trackmetadata,
+                file_hash=probed_file.file_hash,
+            )
 
-        track = Track(
-            file_path=destination_path, metadata=trackmetadata, file_hash=None
+        if not self.placer.place(file_path, destination_path):
+            return None
+
+        return Track(
+            file_path=destination_path,
+            metadata=trackmetadata,
+            file_hash=probed_file.file_hash,
         )
 
-        self.ctx.add_to_database(track)
+    def destination_for(self, probed_file: ProbedFile) -> Path:
+        """Where place_probed_file puts probed_file."""
+        destination_dir = create_destination_dir(
+            trackmetadata=probed_file.metadata, root_dir=self.ctx.music_library_dir
+        )
+        return destination_dir / probed_file.file_path.name
 
-        return True
+    def sync_placements(self):
+        """Make the files placed since the last call durable; one directory
+        fsync per destination album, however many tracks went into it."""
+        self.placer.sync()
 
+    def remove_placed_sources(self, sources: List[Path]):
+        """Remove the sources of files that were copied to move them, once
+        where they went is recorded."""
+        self.placer.remove_sources(sources)
 
-def move_file(file_path: Path, destination_path: Path) -> bool:
-    if not file_path.is_file():
-        return False
-    # Currently only supporting atomic move, so if file exists, return false
-    if destination_path.exists():
-        print(f"Destination {destination_path} already exists.")
-        return False
+    def placement_stats(self) -> PlacementStats:
+        return self.placer.stats()
 
-    parent = destination_path.parent
+    def _check_supported(self):
+        if not self.ctx.should_organize_files:
+            raise NotImplementedError(
+                "Organizer does not support in place organization yet"
+            )
 
-    if parent.exists() and not parent.is_dir():
-        print(f"Destination parent is not a directory: {parent}")
-        return False
 
-    try:
-        parent.mkdir(parents=True, exist_ok=True)
-        # Fails if moving to a different filesystem, since it is an atomic move
-        file_path.replace(destination_path)
-        return True
-    except (PermissionError, FileExistsError, OSError) as e:
-        print(f"Exception trying to move {file_path} to {destination_path}: {e}")
+def move_file(file_path: Path, destination_path: Path) -> bool:
+    if not file_path.is_file():
         return False
 
+    # Renames on the same filesystem, copies and then unlinks across them.
+    # Never replaces destination_path, and creates its parent if needed.
+    placer = FilePlacer(keep_sources=False)
+    was_moved = placer.place(file_path, destination_path)
+    placer.sync()
+    placer.remove_sources([file_path])
+    return was_moved
+
 
 def create_destination_dir(trackmetadata: TrackMetaData, root_dir: Path) -> Path:
     destination_dir = root_dir
@@ -0,0 +1,585 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from app.database import IngestJob
+from app.models.track import Track
+from app.services.dedup import Deduplicator
+from app.services.ingestion import is_archive, is_music_file, stream_archive
+from app.services.metadata import (
+    ProbedFile,
+    ProbeRecord,
+    probe_records,
+    probed_file_from_record,
+)
+
+# Ingestion runs as a chain of stages, each with its own worker threads and a
+# bounded input queue:
+#
+#   discover -> stabilize -> hash -> probe -> organize -> write
+#
+# discover drops paths that are neither audio files nor archives. stabilize
+# waits for the file to stop changing, and streams archives: each audio member
+# goes on as soon as it is written, and non-audio members are never
+# extracted. hash asks the Deduplicator for the file's file_hash and drops
+# duplicates before they are probed or moved. organize moves the file into the
+# library, and write adds the resulting tracks to the database in batches.
+#
+# A full queue blocks whoever is putting into it, so a slow stage pushes back
+# all the way up to the file watcher instead of growing memory.
+#
+# With probe_processes > 0 the probe stage hands chunks of paths to a
+# ProcessPoolExecutor instead of probing on its own threads, so tag parsing is
+# not capped at one core by the GIL. Results come back as ProbeRecord tuples.
+#
+# With jobs set, every file also has a row in a durable job table, moving
+# through discovered -> probed -> moved -> indexed:
+#
+#   discovered  discover records submitted paths, stabilize archive members
+#   probed      organize records the planned library path, before moving
+#   moved       organize records where the file ended up
+#   indexed     write records that the track is in the database
+#
+# Files dropped on purpose (duplicates, unreadable files) lose their job.
+# discover, organize and write take their items in batches, so each batch
+# costs one transaction per transition rather than one per file. resume()
+# picks up whatever a previous run left unfinished.
+
+_STOP = object()
+# How long the probe stage waits for a chunk to fill in process mode.
+PROBE_CHUNK_WAIT = 0.05
+# How long discover and organize wait for a batch of jobs to fill.
+JOB_BATCH_WAIT = 0.05
+# Indexed jobs are deleted after this many, so the table stays small.
+JOB_PRUNE_EVERY = 1024
+
+
+@dataclass(frozen=True)
+class IngestJobsContext:
+    add_jobs: Callable[[Sequence[str]], bool]
+    set_probed: Callable[[Sequence[Tuple[str, str | None, str | None]]], bool]
+    set_moved: Callable[[Sequence[Tuple[str, str]]], bool]
+    set_indexed: Callable[[Sequence[str]], bool]
+    delete_jobs: Callable[[Sequence[str]], bool]
+    get_unfinished: Callable[[], List[IngestJob] | None]
+    prune: Callable[[], int]
+    get_track_file_paths: Callable[[], Dict[str, str] | None]
+
+
+@dataclass(frozen=True)
+class PipelineContext:
+    workspace_dir: Path
+    wait_until_ready: Callable[[Path], bool]
+    probe_function: Callable[[Path], ProbedFile | None]
+    place_function: Callable[[ProbedFile], Track | None]
+    write_function: Callable[[List[Track]], List[bool]]
+    # None skips duplicate detection; every file gets file_hash None.
+    deduplicator: Deduplicator | None = None
+    # None keeps no durable record of what is in flight.
+    jobs: IngestJobsContext | None = None
+    # Where place_function will put a probed file. With jobs, it is recorded
+    # before the move, so a crash between the move and the database write
+    # can be resumed.
+    destination_function: Callable[[ProbedFile], Path] | None = None
+    # Makes everything place_function did durable. Called once per organize
+    # batch, before the batch counts as moved; None when placing is durable.
+    sync_function: Callable[[], None] | None = None
+    # Removes the sources place_function copied rather than moved. Called
+    # with each organize batch's sources once the batch counts as moved, so
+    # a source is never gone before its job says where the file went.
+    remove_sources_function: Callable[[List[Path]], None] | None = None
+    discover_workers: int = 1
+    stabilize_workers: int = 8
+    hash_workers: int = 4
+    probe_workers: int = 4
+    organize_workers: int = 2
+    queue_size: int = 256
+    write_batch_size: int = 64
+    # How long the writer waits for a batch to fill before writing what it has.
+    write_batch_wait: float = 0.2
+    # 0 probes on probe_workers threads with probe_function. Anything else
+    # probes in that many processes with probe_chunk_function instead, which
+    # must be picklable (a module level function).
+    probe_processes: int = 0
+    probe_chunk_size: int = 16
+    probe_chunk_function: Callable[[List[str]], List[ProbeRecord | None]] = (
+        probe_records
+    )
+
+    def __post_init__(self):
+        for name in (
+            "discover_workers",
+            "stabilize_workers",
+            "hash_workers",
+            "probe_workers",
+            "organize_workers",
+            "queue_size",
+            "write_batch_size",
+            "probe_chunk_size",
+        ):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"{name} must be positive")
+        if self.probe_processes < 0:
+            raise ValueError("probe_processes must not be negative")
+
+
+@dataclass(frozen=True)
+class StageStats:
+    name: str
+    workers: int
+    queue_depth: int
+    queue_capacity: int
+    processed: int
+    failed: int
+    busy_seconds: float
+    items_per_second: float
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        queue_size: int,
+        handle: Callable[[Any], bool] | None,
+    ):
+        self.name = name
+        self.workers = workers
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handle = handle
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def start(self, run: Callable[["_Stage"], None]):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=run, args=(self,), name=f"ingest-{self.name}-{index}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def record(self, count: int, failed: int, busy_seconds: float):
+        with self.lock:
+            self.processed += count
+            self.failed += failed
+            self.busy_seconds += busy_seconds
+
+    def stats(self, elapsed: float) -> StageStats:
+        with self.lock:
+            return StageStats(
+                name=self.name,
+                workers=self.workers,
+                queue_depth=self.queue.qsize(),
+                queue_capacity=self.queue.maxsize,
+                processed=self.processed,
+                failed=self.failed,
+                busy_seconds=self.busy_seconds,
+                items_per_second=self.processed / elapsed if elapsed > 0 else 0.0,
+            )
+
+
+class IngestionPipeline:
+    def __init__(self, ctx: PipelineContext):
+        self.ctx = ctx
+        # discover, organize and write take batches instead of single items.
+        self.discover = _Stage("discover", ctx.discover_workers, ctx.queue_size, None)
+        self.stabilize = _Stage(
+            "stabilize", ctx.stabilize_workers, ctx.queue_size, self._stabilize
+        )
+        self.hash = _Stage("hash", ctx.hash_workers, ctx.queue_size, self._hash)
+        # In process mode the probe threads only dispatch chunks; two per
+        # process keep every process busy while the other chunk is in transit.
+        probe_threads = ctx.probe_processes * 2 if ctx.probe_processes else ctx.probe_workers
+        self.probe = _Stage("probe", probe_threads, ctx.queue_size, self._probe)
+        self.organize = _Stage("organize", ctx.organize_workers, ctx.queue_size, None)
+        self.write = _Stage("write", 1, ctx.queue_size, None)
+        self.stages = [
+            self.discover,
+            self.stabilize,
+            self.hash,
+            self.probe,
+            self.organize,
+            self.write,
+        ]
+
+        # Items somewhere in the pipeline, so callers can wait for it to drain.
+        self._pending = 0
+        self._pending_changed = threading.Condition()
+        self._started_at: float | None = None
+        self._probe_pool: ProcessPoolExecutor | None = None
+        self._indexed_since_prune = 0
+        # file_hash -> the path of the file holding its dedup claim. Resumed
+        # jobs carry a file_hash they never claimed, and must not release
+        # another file's claim on it.
+        self._claims: Dict[str, Path] = {}
+        self._claims_lock = threading.Lock()
+        # A batch holds items taken off a queue, so keep it no bigger than one.
+        self._job_batch_size = min(ctx.write_batch_size, ctx.queue_size)
+
+    def start(self):
+        if self._started_at is not None:
+            return
+        self._started_at = time.monotonic()
+        self.discover.start(self._run_discover)
+        for stage in (self.stabilize, self.hash):
+            stage.start(self._run_stage)
+        self.organize.start(self._run_organize)
+        if self.ctx.probe_processes:
+            # spawn, not fork: the parent has running threads (and maybe an
+            # event loop) that must not be copied half-way through a lock.
+            self._probe_pool = ProcessPoolExecutor(
+                max_workers=self.ctx.probe_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self.probe.start(self._run_probe_chunks)
+        else:
+            self.probe.start(self._run_stage)
+        self.write.start(self._run_writer)
+
+    def stop(self):
+        """Finish the queued work, then stop every worker."""
+        if self._started_at is None:
+            return
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
+            stage.threads.clear()
+            if stage is self.probe and self._probe_pool is not None:
+                self._probe_pool.shutdown(wait=True)
+                self._probe_pool = None
+        self._started_at = None
+
+    def submit(self, path: Path):
+        """Queue a path for ingestion. Blocks while the discover queue is full."""
+        self._put(self.discover, path)
+
+    def resume(self) -> int:
+        """Requeue the jobs a previous run left unfinished. Returns how many.
+
+        A job whose source file is still there starts over; dedup makes that
+        safe even if part of it was done, and a copy the previous run already
+        placed counts as placed. A job whose file was already moved
+        is probed where it is and written, unless its track made it into the
+        database before the restart.
+        """
+        jobs = self.ctx.jobs
+        if jobs is None:
+            return 0
+        jobs.prune()
+        unfinished = jobs.get_unfinished()
+        if not unfinished:
+            return 0
+
+        track_paths = None
+        resumed = 0
+        for job in unfinished:
+            if job.state != "moved" and job.source_path.exists():
+                self.submit(job.source_path)
+                resumed += 1
+                continue
+            if job.library_path is None or not job.library_path.exists():
+                print(f"Dropping ingestion of {job.source_path}, the file is gone")
+                jobs.delete_jobs([str(job.source_path)])
+                continue
+
+            if track_paths is None:
+                track_paths = jobs.get_track_file_paths() or {}
+            if str(job.library_path) in track_paths:
+                jobs.set_indexed([str(job.library_path)])
+                continue
+            # Placing a file that is already at its destination is a no-op.
+            self._put(self.probe, (job.library_path, job.file_hash))
+            resumed += 1
+        print(f"Resumed {resumed} ingestion jobs")
+        return resumed
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until everything submitted so far has left the pipeline."""
+        with self._pending_changed:
+            return self._pending_changed.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self) -> List[StageStats]:
+        elapsed = (
+            time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        )
+        return [stage.stats(elapsed) for stage in self.stages]
+
+    def _put(self, stage: _Stage, item: Any):
+        with self._pending_changed:
+            self._pending += 1
+        stage.queue.put(item)
+
+    def _done(self, count: int = 1):
+        with self._pending_changed:
+            self._pending -= count
+            if self._pending == 0:
+                self._pending_changed.notify_all()
+
+    def _run_stage(self, stage: _Stage):
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            started = time.perf_counter()
+            try:
+                ok = stage.handle(item)
+            except Exception as e:
+                print(f"Ingestion stage {stage.name} failed on {item}. {e}")
+                ok = False
+            stage.record(1, 0 if ok else 1, time.perf_counter() - started)
+            self._done()
+
+    def _take_batch(self, stage: _Stage, size: int, wait: float) -> Tuple[List[Any], bool]:
+        """Block for one item, then take up to size items arriving within wait.
+
+        Returns (batch, whether a stop marker was taken).
+        """
+        item = stage.queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + wait
+        while len(batch) < size:
+            try:
+                item = stage.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run_probe_chunks(self, stage: _Stage):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._take_batch(
+                stage, self.ctx.probe_chunk_size, PROBE_CHUNK_WAIT
+            )
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                records = self._probe_pool.submit(
+                    self.ctx.probe_chunk_function, [str(path) for path, _ in batch]
+                ).result()
+            except Exception as e:
+                print(f"Ingestion stage {stage.name} failed on a chunk of {len(batch)}. {e}")
+                records = [None] * len(batch)
+
+            failed = 0
+            for (path, file_hash), record in zip(batch, records):
+                if record is None:
+                    self._release(file_hash, path)
+                    self._drop(path)
+                    failed += 1
+                    continue
+                probed_file = probed_file_from_record(record)
+                self._put(self.organize, replace(probed_file, file_hash=file_hash))
+            stage.record(len(batch), failed, time.perf_counter() - started)
+            self._done(len(batch))
+
+    def _run_writer(self, stage: _Stage):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._take_batch(
+                stage, self.ctx.write_batch_size, self.ctx.write_batch_wait
+            )
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = self.ctx.write_function(batch)
+            except Exception as e:
+                print(f"Ingestion stage {stage.name} failed on a batch of {len(batch)}. {e}")
+                results = [False] * len(batch)
+            # Written or not, later copies may now look these hashes up.
+            for track in batch:
+                self._release(track.file_hash, track.file_path)
+            # Failed writes stay moved, so the next resume() tries again.
+            self._set_indexed(
+                [str(track.file_path) for track, ok in zip(batch, results) if ok]
+            )
+            failed = sum(1 for result in results if not result)
+            stage.record(len(batch), failed, time.perf_counter() - started)
+            self._done(len(batch))
+
+    def _run_discover(self, stage: _Stage):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._take_batch(
+                stage, self._job_batch_size, JOB_BATCH_WAIT
+            )
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            kept = [path for path in batch if is_music_file(path) or is_archive(path)]
+            if self.ctx.jobs is not None:
+                self.ctx.jobs.add_jobs([str(path) for path in kept])
+            for path in kept:
+                self._put(self.stabilize, path)
+            stage.record(len(batch), len(batch) - len(kept), time.perf_counter() - started)
+            self._done(len(batch))
+
+    def _run_organize(self, stage: _Stage):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._take_batch(
+                stage, self._job_batch_size, JOB_BATCH_WAIT
+            )
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            jobs = self.ctx.jobs
+            if jobs is not None:
+                jobs.set_probed([self._planned(probed_file) for probed_file in batch])
+
+            moved: List[Tuple[ProbedFile, Track]] = []
+            for probed_file in batch:
+                track = None
+                try:
+                    track = self.ctx.place_function(probed_file)
+                except Exception as e:
+                    print(f"Ingestion stage {stage.name} failed on {probed_file.file_path}. {e}")
+                if track is None:
+                    self._release(probed_file.file_hash, probed_file.file_path)
+                    self._drop(probed_file.file_path)
+                    continue
+                self._move_claim(probed_file.file_hash, probed_file.file_path, track.file_path)
+                moved.append((probed_file, track))
+            if moved and self.ctx.sync_function is not None:
+                self.ctx.sync_function()
+            if jobs is not None:
+                jobs.set_moved(
+                    [
+                        (str(probed_file.file_path), str(track.file_path))
+                        for probed_file, track in moved
+                    ]
+                )
+            if moved and self.ctx.remove_sources_function is not None:
+                self.ctx.remove_sources_function(
+                    [probed_file.file_path for probed_file, _ in moved]
+                )
+            for _, track in moved:
+                self._put(self.write, track)
+            stage.record(len(batch), len(batch) - len(moved), time.perf_counter() - started)
+            self._done(len(batch))
+
+    def _stabilize(self, path: Path) -> bool:
+        if not self.ctx.wait_until_ready(path):
+            self._drop(path)
+            return False
+        if not is_archive(path):
+            self._put(self.hash, path)
+            return True
+
+        # Members get their jobs before they are handed on, in batches, and
+        # the archive's job is only dropped once every member has one.
+        members: List[Path] = []
+        streamed = stream_archive(
+            path,
+            self.ctx.workspace_dir,
+            lambda member: self._add_member(members, member),
+        )
+        self._flush_members(members)
+        self._drop(path)
+        return streamed
+
+    def _add_member(self, members: List[Path], member: Path):
+        if self.ctx.jobs is None:
+            self._put(self.hash, member)
+            return
+        members.append(member)
+        if len(members) >= self._job_batch_size:
+            self._flush_members(members)
+
+    def _flush_members(self, members: List[Path]):
+        if not members:
+            return
+        self.ctx.jobs.add_jobs([str(member) for member in members])
+        for member in members:
+            self._put(self.hash, member)
+        members.clear()
+
+    def _hash(self, path: Path) -> bool:
+        if self.ctx.deduplicator is None:
+            self._put(self.probe, (path, None))
+            return True
+
+        file_hash = self.ctx.deduplicator.file_hash_for(path)
+        if file_hash is None:
+            # A duplicate is skipped on purpose, so it does not count as a failure.
+            self._drop(path)
+            return True
+        with self._claims_lock:
+            self._claims[file_hash] = path
+        self._put(self.probe, (path, file_hash))
+        return True
+
+    def _probe(self, item: Tuple[Path, str | None]) -> bool:
+        path, file_hash = item
+        probed_file = None
+        try:
+            probed_file = self.ctx.probe_function(path)
+        finally:
+            if probed_file is None:
+                self._release(file_hash, path)
+                self._drop(path)
+        if probed_file is None:
+            return False
+        self._put(self.organize, replace(probed_file, file_hash=file_hash))
+        return True
+
+    def _planned(self, probed_file: ProbedFile) -> Tuple[str, str | None, str | None]:
+        destination = None
+        if self.ctx.destination_function is not None:
+            try:
+                destination = str(self.ctx.destination_function(probed_file))
+            except Exception as e:
+                print(f"Could not plan a destination for {probed_file.file_path}. {e}")
+        return str(probed_file.file_path), destination, probed_file.file_hash
+
+    def _release(self, file_hash: str | None, path: Path):
+        """Release the dedup claim on file_hash if the file at path holds it."""
+        if self.ctx.deduplicator is None or file_hash is None:
+            return
+        with self._claims_lock:
+            if self._claims.get(file_hash) != path:
+                return
+            del self._claims[file_hash]
+        self.ctx.deduplicator.release(file_hash)
+
+    def _move_claim(self, file_hash: str | None, source: Path, destination: Path):
+        with self._claims_lock:
+            if file_hash is not None and self._claims.get(file_hash) == source:
+                self._claims[file_hash] = destination
+
+    def _drop(self, path: Path):
+        if self.ctx.jobs is not None:
+            self.ctx.jobs.delete_jobs([str(path)])
+
+    def _set_indexed(self, library_paths: List[str]):
+        jobs = self.ctx.jobs
+        if jobs is None or not library_paths:
+            return
+        jobs.set_indexed(library_paths)
+        with self._pending_changed:
+            self._indexed_since_prune += len(library_paths)
+            prune = self._indexed_since_prune >= JOB_PRUNE_EVERY
+            if prune:
+                self._indexed_since_prune = 0
+        if prune:
+            jobs.prune()
@@ -0,0 +1,368 @@
+import errno
+import fcntl
+import os
+import stat
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Iterable, Set
+
+# Files get into the library the cheapest way that works:
+#
+#   rename    same filesystem, moving
+#   hardlink  same filesystem, copying, if allowed (source and library then
+#             share the file, so editing one edits the other)
+#   reflink   copy-on-write clone (btrfs, xfs), copying or moving across
+#             mount points of the same filesystem
+#   copy      copy_file_range, falling back to sendfile, then read/write
+#
+# Nothing is checked before it is done: files are linked into place, which
+# fails atomically when the destination exists, and destination directories
+# are created once and remembered until placing into one fails. Copies are
+# written to a temporary name next to the destination, fsynced, and linked
+# into place, so the destination never holds a partial file. Directory fsyncs
+# are left to sync(), which does each destination directory (one per album)
+# once per batch. The sources of cross-device moves are only removed by
+# remove_sources(), once the caller has recorded where the files went.
+
+# ioctl number of FICLONE from linux/fs.h.
+FICLONE = 0x40049409
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+KNOWN_DIRECTORIES_MAX_SIZE = 4096
+# link() failing with these means the filesystem has no hardlinks.
+NO_HARDLINK_ERRNOS = (errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP, errno.ENOSYS)
+# copy_file_range and sendfile failing with these mean that way of copying is
+# not supported between the two files.
+COPY_FALLBACK_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+class PlaceMethod(Enum):
+    RENAME = "rename"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    COPY = "copy"
+
+
+@dataclass(frozen=True)
+class PlacementStats:
+    renamed: int
+    hardlinked: int
+    reflinked: int
+    copied: int
+    failed: int
+    directory_syncs: int
+    directories_created: int
+
+
+class KnownDirectories:
+    """Directories known to exist, so placing a whole album creates its
+    directory once. Bounded; least recently used ones are forgotten first."""
+
+    def __init__(self, max_size: int = KNOWN_DIRECTORIES_MAX_SIZE):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._directories: OrderedDict[Path, None] = OrderedDict()
+        self.created = 0
+
+    def __contains__(self, directory: Path) -> bool:
+        with self._lock:
+            return directory in self._directories
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._directories)
+
+    def ensure(self, directory: Path):
+        """Create directory unless it is known to exist. Raises OSError."""
+        with self._lock:
+            if directory in self._directories:
+                self._directories.move_to_end(directory)
+                return
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self.created += 1
+            self._directories[directory] = None
+            while len(self._directories) > self.max_size:
+                self._directories.popitem(last=False)
+
+    def forget(self, directory: Path):
+        with self._lock:
+            self._directories.pop(directory, None)
+
+
+class FilePlacer:
+    """Moves or copies files into the library and makes them durable in batches.
+
+    Safe to use from several threads at once; each placement only holds the
+    lock to record what sync() has to do.
+    """
+
+    def __init__(
+        self,
+        keep_sources: bool,
+        allow_hardlinks: bool = False,
+        directories: KnownDirectories | None = None,
+    ):
+        self.keep_sources = keep_sources
+        self.allow_hardlinks = allow_hardlinks
+        self.directories = directories if directories is not None else KnownDirectories()
+        self._lock = threading.Lock()
+        # Held for a whole sync(), so one that finds nothing left to do still
+        # waits for the directories another thread is syncing.
+        self._sync_lock = threading.Lock()
+        self._dirty_dirs: Set[Path] = set()
+        # Sources of cross-device moves, left for remove_sources().
+        self._copied_sources: Set[Path] = set()
+        self._counts = {method: 0 for method in PlaceMethod}
+        self._failed = 0
+        self._directory_syncs = 0
+
+    def place(self, source: Path, destination: Path) -> bool:
+        """Put source at destination, creating its directory if needed and
+        failing if a different file is already there.
+
+        The file is only durable after sync(), and a moved source only gone
+        after remove_sources().
+        """
+        method = None
+        try:
+            try:
+                self.directories.ensure(destination.parent)
+                method = self._place(source, destination)
+            except FileNotFoundError:
+                # The directory may have been removed since it was created.
+                self.directories.forget(destination.parent)
+                self.directories.ensure(destination.parent)
+                method = self._place(source, destination)
+        except FileExistsError as e:
+            if same_contents(source, destination):
+                # Placed by a run that stopped before recording it. A moved
+                # source is then removed like that of a cross-device move.
+                print(f"{destination} already holds {source}, so it counts as placed")
+                method = PlaceMethod.COPY
+            else:
+                # The destination, or a file where its directory should be.
+                print(f"Destination {destination} already exists. {e}")
+        except OSError as e:
+            self.directories.forget(destination.parent)
+            print(f"Exception trying to place {source} at {destination}: {e}")
+
+        with self._lock:
+            if method is None:
+                self._failed += 1
+                return False
+            self._counts[method] += 1
+            self._dirty_dirs.add(destination.parent)
+            if not self.keep_sources and method is not PlaceMethod.RENAME:
+                self._copied_sources.add(source)
+        return True
+
+    def sync(self):
+        """fsync every directory placed into since the last sync."""
+        with self._sync_lock:
+            with self._lock:
+                dirty_dirs, self._dirty_dirs = self._dirty_dirs, set()
+            for directory in dirty_dirs:
+                fsync_directory(directory)
+            with self._lock:
+                self._directory_syncs += len(dirty_dirs)
+
+    def remove_sources(self, sources: Iterable[Path]):
+        """Remove those of sources that place() copied rather than renamed
+        while moving. Call once their copies are synced and recorded."""
+        with self._lock:
+            removable = [source for source in sources if source in self._copied_sources]
+            self._copied_sources.difference_update(removable)
+        for source in removable:
+            try:
+                source.unlink()
+            except OSError as e:
+                print(f"Could not remove {source} after copying it. {e}")
+
+    def stats(self) -> PlacementStats:
+        with self._lock:
+            return PlacementStats(
+                renamed=self._counts[PlaceMethod.RENAME],
+                hardlinked=self._counts[PlaceMethod.HARDLINK],
+                reflinked=self._counts[PlaceMethod.REFLINK],
+                copied=self._counts[PlaceMethod.COPY],
+                failed=self._failed,
+                directory_syncs=self._directory_syncs,
+                directories_created=self.directories.created,
+            )
+
+    def _place(self, source: Path, destination: Path) -> PlaceMethod:
+        if not self.keep_sources:
+            try:
+                rename_no_replace(source, destination)
+                return PlaceMethod.RENAME
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        elif self.allow_hardlinks:
+            try:
+                os.link(source, destination)
+                return PlaceMethod.HARDLINK
+            except OSError as e:
+                if e.errno != errno.EXDEV and e.errno not in NO_HARDLINK_ERRNOS:
+                    raise
+
+        return copy_into_place(source, destination)
+
+
+def rename_no_replace(source: Path, destination: Path):
+    """Rename, raising FileExistsError instead of replacing destination.
+
+    Link and unlink, since link refuses to replace a file atomically. Only on
+    filesystems without hardlinks is it check-then-rename. If the source
+    cannot be unlinked, the new link is removed again, so a failed rename
+    leaves nothing behind at destination.
+    """
+    try:
+        os.link(source, destination)
+    except OSError as e:
+        if e.errno not in NO_HARDLINK_ERRNOS:
+            raise
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "File exists", str(destination))
+        os.rename(source, destination)
+        return
+    try:
+        os.unlink(source)
+    except OSError:
+        try:
+            os.unlink(destination)
+        except OSError as e:
+            print(f"Could not remove {destination} after failing to move {source}. {e}")
+        raise
+
+
+def same_contents(first: Path, second: Path) -> bool:
+    """Whether both are regular files with the same bytes."""
+    try:
+        first_stat = os.stat(first)
+        second_stat = os.stat(second)
+        if not (stat.S_ISREG(first_stat.st_mode) and stat.S_ISREG(second_stat.st_mode)):
+            return False
+        if os.path.samestat(first_stat, second_stat):
+            return True
+        if first_stat.st_size != second_stat.st_size:
+            return False
+        with open(first, "rb") as first_file, open(second, "rb") as second_file:
+            while chunk := first_file.read(COPY_CHUNK_BYTES):
+                if chunk != second_file.read(len(chunk)):
+                    return False
+        return True
+    except OSError:
+        return False
+
+
+def copy_into_place(source: Path, destination: Path) -> PlaceMethod:
+    """Copy source to destination through an fsynced temporary file."""
+    temporary = destination.with_name(
+        f".{destination.name}.{os.getpid()}.{threading.get_ident()}.partial"
+    )
+    source_fd = os.open(source, os.O_RDONLY)
+    temporary_fd = None
+    try:
+        source_stat = os.fstat(source_fd)
+        temporary_fd = os.open(
+            temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, source_stat.st_mode & 0o777
+        )
+        try:
+            method = _clone_or_copy(source_fd, temporary_fd, source_stat.st_size)
+            os.fsync(temporary_fd)
+        finally:
+            os.close(temporary_fd)
+        os.utime(temporary, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        rename_no_replace(temporary, destination)
+        return method
+    finally:
+        os.close(source_fd)
+        if temporary_fd is not None:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+
+
+def _clone_or_copy(source_fd: int, destination_fd: int, size: int) -> PlaceMethod:
+    try:
+        fcntl.ioctl(destination_fd, FICLONE, source_fd)
+        return PlaceMethod.REFLINK
+    except OSError:
+        pass
+
+    for copy in (_copy_file_range, _sendfile):
+        try:
+            copied = copy(source_fd, destination_fd, size)
+            break
+        except OSError as e:
+            # Not supported between these filesystems; try the next way.
+            if e.errno not in COPY_FALLBACK_ERRNOS:
+                raise
+            # It may have failed part way, so the next way starts over on an
+            # empty file.
+            os.lseek(destination_fd, 0, os.SEEK_SET)
+            os.ftruncate(destination_fd, 0)
+    else:
+        copied = _read_write(source_fd, destination_fd, size)
+    # The source shrank while it was copied.
+    if copied != size:
+        raise OSError(errno.EIO, f"Copied {copied} of {size} bytes")
+    return PlaceMethod.COPY
+
+
+def _copy_file_range(source_fd: int, destination_fd: int, size: int) -> int:
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(
+            source_fd, destination_fd, min(COPY_CHUNK_BYTES, size - copied)
+        )
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _sendfile(source_fd: int, destination_fd: int, size: int) -> int:
+    copied = 0
+    while copied < size:
+        count = os.sendfile(
+            destination_fd, source_fd, copied, min(COPY_CHUNK_BYTES, size - copied)
+        )
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _read_write(source_fd: int, destination_fd: int, size: int) -> int:
+    os.lseek(source_fd, 0, os.SEEK_SET)
+    copied = 0
+    while copied < size:
+        chunk = os.read(source_fd, min(COPY_CHUNK_BYTES, size - copied))
+        if not chunk:
+            break
+        copied += len(chunk)
+        while chunk:
+            chunk = chunk[os.write(destination_fd, chunk) :]
+    return copied
+
+
+def fsync_directory(directory: Path):
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError as e:
+        print(f"Could not open {directory} to sync it. {e}")
+        return
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        print(f"Could not sync {directory}. {e}")
+    finally:
+        os.close(fd)
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+from app.database import FileSnapshot
+from app.services.ingestion import is_archive, is_music_file
+
+# On startup the Reconciler catches up with whatever happened while the server
+# was down. Both trees are walked with os.scandir and compared against the
+# snapshot the previous scan stored:
+#
+#   import_dir         new or changed files are submitted for ingestion
+#   music_library_dir  tracks whose file is gone are deleted
+#
+# Only the difference is written back to the snapshot, so a scan of an
+# unchanged tree costs the walk and one read of the snapshot.
+
+
+@dataclass(frozen=True)
+class ReconcileContext:
+    import_dir: Path
+    music_library_dir: Path
+    get_file_snapshot: Callable[[Path], Dict[str, FileSnapshot] | None]
+    update_file_snapshot: Callable[[Sequence[FileSnapshot], Sequence[str]], bool]
+    get_track_file_paths: Callable[[], Dict[str, str] | None]
+    delete_tracks: Callable[[Sequence[str]], int | None]
+    submit: Callable[[Path], None]
+    # False only reports tracks whose file is gone instead of deleting them.
+    purge_missing: bool = True
+
+
+@dataclass(frozen=True)
+class ReconcileStats:
+    import_files: int
+    library_files: int
+    submitted: int
+    changed_library_files: int
+    missing_tracks: int
+    deleted_tracks: int
+    seconds: float
+
+
+def scan_files(root: Path, errors: List[str] | None = None) -> Iterator[FileSnapshot]:
+    """Every regular file under root, without following symlinked directories.
+
+    Paths that could not be scanned or stat'ed are appended to errors.
+    """
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            yield FileSnapshot(
+                                entry.path, stat.st_size, stat.st_mtime_ns
+                            )
+                    except OSError as e:
+                        print(f"Could not stat {entry.path}. {e}")
+                        if errors is not None:
+                            errors.append(entry.path)
+        except OSError as e:
+            print(f"Could not scan {directory}. {e}")
+            if errors is not None:
+                errors.append(directory)
+
+
+def _resolved_paths(paths: Iterable[str]) -> Dict[str, str]:
+    """Each path made absolute with symlinks resolved, one realpath() per
+    directory rather than per file."""
+    directories: Dict[str, str] = {}
+    resolved = {}
+    for path in paths:
+        directory, name = os.path.split(os.path.abspath(path))
+        real_directory = directories.get(directory)
+        if real_directory is None:
+            real_directory = directories[directory] = os.path.realpath(directory)
+        resolved[path] = os.path.join(real_directory, name)
+    return resolved
+
+
+class Reconciler:
+    def __init__(self, ctx: ReconcileContext):
+        self.ctx = ctx
+        self.thread: threading.Thread | None = None
+        self.last_stats: ReconcileStats | None = None
+
+    def start(self):
+        """Reconcile on a background thread, so startup does not wait for it."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(
+            target=self.reconcile, name="reconcile", daemon=True
+        )
+        self.thread.start()
+
+    def reconcile(self) -> ReconcileStats | None:
+        started = time.perf_counter()
+        try:
+            library = self._reconcile_library_dir()
+            import_files, submitted = self._reconcile_import_dir()
+        except Exception as e:
+            print(f"Reconciliation failed. {e}")
+            return None
+        library_files, changed, missing, deleted = library or (0, 0, 0, 0)
+
+        stats = ReconcileStats(
+            import_files=import_files,
+            library_files=library_files,
+            submitted=submitted,
+            changed_library_files=changed,
+            missing_tracks=missing,
+            deleted_tracks=deleted,
+            seconds=time.perf_counter() - started,
+        )
+        print(f"Reconciliation finished: {stats}")
+        self.last_stats = stats
+        return stats
+
+    def _diff(
+        self, root: Path, errors: List[str]
+    ) -> tuple[Dict[str, FileSnapshot], List[FileSnapshot], List[str]] | None:
+        """(files on disk, new or changed files, files gone) under root.
+
+        When part of root could not be scanned (see errors), nothing counts
+        as gone, since it cannot be told apart from what was not seen.
+        """
+        snapshot = self.ctx.get_file_snapshot(root)
+        if snapshot is None:
+            return None
+        current = {entry.path: entry for entry in scan_files(root, errors)}
+        changed = [
+            entry for path, entry in current.items() if snapshot.get(path) != entry
+        ]
+        removed = [] if errors else [path for path in snapshot if path not in current]
+        return current, changed, removed
+
+    def _reconcile_import_dir(self) -> tuple[int, int]:
+        diff = self._diff(self.ctx.import_dir, [])
+        if diff is None:
+            return 0, 0
+        current, changed, removed = diff
+
+        submitted = 0
+        for entry in changed:
+            path = Path(entry.path)
+            if is_music_file(path) or is_archive(path):
+                self.ctx.submit(path)
+                submitted += 1
+        self.ctx.update_file_snapshot(changed, removed)
+        return len(current), submitted
+
+    def _reconcile_library_dir(self) -> tuple[int, int, int, int] | None:
+        root = self.ctx.music_library_dir
+        if not root.is_dir():
+            print(f"Library {root} is not there, so not reconciling it")
+            return None
+        # Tracks first: a track written after this point may have been moved
+        # into the library after the walk below passed its directory.
+        track_paths = self.ctx.get_track_file_paths()
+        if track_paths is None:
+            return None
+        errors: List[str] = []
+        diff = self._diff(root, errors)
+        if diff is None:
+            return None
+        current, changed, removed = diff
+
+        # Tracks may have been stored under another spelling of the library
+        # (relative, or through a symlink), so both sides are compared
+        # resolved, and tracks outside the library are left alone.
+        real_root = os.path.realpath(root)
+        real_prefix = os.path.join(real_root, "")
+        on_disk = {real_root + path[len(str(root)) :] for path in current}
+        real_track_paths = _resolved_paths(track_paths)
+        missing = [
+            uuid_id
+            for file_path, uuid_id in track_paths.items()
+            if real_track_paths[file_path].startswith(real_prefix)
+            and real_track_paths[file_path] not in on_disk
+        ]
+        deleted = 0
+        if missing and not current:
+            # An unmounted library must not look like every file was deleted.
+            print(f"Library {root} is empty, so not deleting {len(missing)} tracks")
+        elif missing and errors:
+            # Nor may an unreadable or unmounted part of it.
+            print(
+                f"Could not scan all of library {root}, so not deleting "
+                f"{len(missing)} tracks"
+            )
+        elif self.ctx.purge_missing:
+            deleted = self.ctx.delete_tracks(missing) or 0
+        else:
+            for uuid_id in missing:
+                print(f"File of track {uuid_id} is gone")
+
+        self.ctx.update_file_snapshot(changed, removed)
+        return len(current), len(changed), len(missing), deleted
@@ -0,0 +1,853 @@
+import re
+import struct
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+# Pure Python reader for the containers in AUDIO_EXTENSIONS. It only reads the
+# header bytes it needs and returns the same shape ffprobe's
+# "-show_streams -show_format -of json" output has (the parts
+# build_track_metadata looks at), so both paths share one builder.
+#
+# Every parser returns None when it meets something it does not understand, and
+# the caller falls back to ffprobe for that file.
+
+ID3V1_SIZE = 128
+MPEG_SYNC_SEARCH_BYTES = 64 * 1024
+# Largest moov we are willing to read into memory before giving up on a file.
+MP4_MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+ID3V1_GENRES: Tuple[str, ...] = (
+    "Blues", "Classic Rock", "Country", "Dance", "Disco", "Funk", "Grunge",
+    "Hip-Hop", "Jazz", "Metal", "New Age", "Oldies", "Other", "Pop", "R&B",
+    "Rap", "Reggae", "Rock", "Techno", "Industrial", "Alternative", "Ska",
+    "Death Metal", "Pranks", "Soundtrack", "Euro-Techno", "Ambient",
+    "Trip-Hop", "Vocal", "Jazz+Funk", "Fusion", "Trance", "Classical",
+    "Instrumental", "Acid", "House", "Game", "Sound Clip", "Gospel", "Noise",
+    "AlternRock", "Bass", "Soul", "Punk", "Space", "Meditative",
+    "Instrumental Pop", "Instrumental Rock", "Ethnic", "Gothic", "Darkwave",
+    "Techno-Industrial", "Electronic", "Pop-Folk", "Eurodance", "Dream",
+    "Southern Rock", "Comedy", "Cult", "Gangsta", "Top 40", "Christian Rap",
+    "Pop/Funk", "Jungle", "Native American", "Cabaret", "New Wave",
+    "Psychadelic", "Rave", "Showtunes", "Trailer", "Lo-Fi", "Tribal",
+    "Acid Punk", "Acid Jazz", "Polka", "Retro", "Musical", "Rock & Roll",
+    "Hard Rock", "Folk", "Folk-Rock", "National Folk", "Swing",
+    "Fast Fusion", "Bebob", "Latin", "Revival", "Celtic", "Bluegrass",
+    "Avantgarde", "Gothic Rock", "Progressive Rock", "Psychedelic Rock",
+    "Symphonic Rock", "Slow Rock", "Big Band", "Chorus", "Easy Listening",
+    "Acoustic", "Humour", "Speech", "Chanson", "Opera", "Chamber Music",
+    "Sonata", "Symphony", "Booty Bass", "Primus", "Porn Groove", "Satire",
+    "Slow Jam", "Club", "Tango", "Samba", "Folklore", "Ballad",
+    "Power Ballad", "Rhythmic Soul", "Freestyle", "Duet", "Punk Rock",
+    "Drum Solo", "A capella", "Euro-House", "Dance Hall", "Goa",
+    "Drum & Bass", "Club-House", "Hardcore", "Terror", "Indie", "BritPop",
+    "Negerpunk", "Polsk Punk", "Beat", "Christian Gangsta", "Heavy Metal",
+    "Black Metal", "Crossover", "Contemporary Christian", "Christian Rock",
+    "Merengue", "Salsa", "Thrash Metal", "Anime", "JPop", "SynthPop",
+)  # fmt: skip
+
+# Frame id -> ffprobe tag name, restricted to the tags TrackMetaData uses.
+_ID3V22_TAGS = {
+    "TT2": "title",
+    "TP1": "artist",
+    "TP2": "album_artist",
+    "TAL": "album",
+    "TCO": "genre",
+    "TRK": "track",
+}
+_ID3V2_TAGS = {
+    "TIT2": "title",
+    "TPE1": "artist",
+    "TPE2": "album_artist",
+    "TALB": "album",
+    "TCON": "genre",
+    "TRCK": "track",
+    "TPOS": "disc",
+    "TDRC": "date",
+}
+_VORBIS_TAGS = {
+    "TITLE": "title",
+    "ARTIST": "artist",
+    "ALBUMARTIST": "album_artist",
+    "ALBUM": "album",
+    "DATE": "date",
+    "GENRE": "genre",
+    "TRACKNUMBER": "track",
+    "DISCNUMBER": "disc",
+}
+_RIFF_INFO_TAGS = {
+    "INAM": "title",
+    "IART": "artist",
+    "IPRD": "album",
+    "ICRD": "date",
+    "IGNR": "genre",
+    "IPRT": "track",
+    "ITRK": "track",
+}
+_MP4_TEXT_TAGS = {
+    b"\xa9nam": "title",
+    b"\xa9ART": "artist",
+    b"aART": "album_artist",
+    b"\xa9alb": "album",
+    b"\xa9day": "date",
+    b"\xa9gen": "genre",
+}
+
+# (MPEG version, layer) -> bitrate table in kbps, indexed by the header field.
+_MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+_MPEG_CODECS = {1: "mp1", 2: "mp2", 3: "mp3"}
+
+_AAC_SAMPLE_RATES = (
+    96000, 88200, 64000, 48000, 44100, 32000, 24000,
+    22050, 16000, 12000, 11025, 8000, 7350,
+)  # fmt: skip
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_ALAW = 0x0006
+_WAVE_FORMAT_MULAW = 0x0007
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class _Unsupported(Exception):
+    """Raised inside a parser when the file has to go to ffprobe instead."""
+
+
+def read_probe_data(file_path: Path) -> dict | None:
+    """Read stream info and tags without spawning ffprobe.
+
+    Returns a dict shaped like ffprobe's JSON output, or None when the file
+    is not one this reader can fully parse.
+    """
+    try:
+        with open(file_path, "rb") as file:
+            return _read_probe_data(file)
+    except (OSError, _Unsupported, struct.error, IndexError, ValueError, zlib.error):
+        return None
+
+
+def _read_probe_data(file: BinaryIO) -> dict | None:
+    head = file.read(12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return _read_wave(file)
+    if head[4:8] == b"ftyp":
+        return _read_mp4(file)
+
+    id3_tags: Dict[str, str] = {}
+    id3_has_picture = False
+    audio_start = 0
+    if head[:3] == b"ID3":
+        file.seek(0)
+        id3_tags, id3_has_picture, audio_start = _read_id3v2(file)
+
+    file.seek(audio_start)
+    if file.read(4) == b"fLaC":
+        return _read_flac(file, audio_start + 4, id3_has_picture)
+    return _read_mpeg(file, audio_start, id3_tags, id3_has_picture)
+
+
+def _probe_result(
+    codec: str,
+    sample_rate: int,
+    channels: int,
+    duration: float,
+    bit_rate: int | None,
+    tags: Dict[str, str],
+    has_picture: bool,
+) -> dict:
+    audio_stream = {
+        "codec_type": "audio",
+        "codec_name": codec,
+        "sample_rate": str(sample_rate),
+        "channels": channels,
+        "duration": f"{duration:.6f}",
+    }
+    if bit_rate:
+        audio_stream["bit_rate"] = str(bit_rate)
+    streams: List[dict] = [audio_stream]
+    if has_picture:
+        streams.append({"codec_type": "video", "disposition": {"attached_pic": 1}})
+    return {"streams": streams, "format": {"tags": tags}}
+
+
+def _genre_name(value: str) -> str:
+    match = re.match(r"\s*\(?(\d+)\)?", value)
+    if match is not None and int(match.group(1)) < len(ID3V1_GENRES):
+        return ID3V1_GENRES[int(match.group(1))]
+    return value
+
+
+# --- ID3 ---------------------------------------------------------------------
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _read_id3v2(file: BinaryIO) -> Tuple[Dict[str, str], bool, int]:
+    """Parse the ID3v2 tag at the current position.
+
+    Returns (tags, has_picture, offset of the first byte after the tag).
+    """
+    start = file.tell()
+    header = file.read(10)
+    if len(header) < 10 or header[:3] not in (b"ID3", b"id3"):
+        raise _Unsupported("no ID3v2 header")
+    major = header[3]
+    flags = header[5]
+    size = _syncsafe(header[6:10])
+    end = start + 10 + size + (10 if flags & 0x10 else 0)
+    if major not in (2, 3, 4):
+        return {}, False, end
+
+    data = file.read(size)
+    if len(data) < size:
+        raise _Unsupported("truncated ID3v2 tag")
+    if flags & 0x80 and major < 4:
+        data = data.replace(b"\xff\x00", b"\xff")
+
+    offset = 0
+    if flags & 0x40 and major == 3:
+        offset = 4 + struct.unpack(">I", data[:4])[0]
+    elif flags & 0x40 and major == 4:
+        offset = _syncsafe(data[:4])
+
+    raw: Dict[str, str] = {}
+    has_picture = False
+    header_size = 6 if major == 2 else 10
+    while offset + header_size <= len(data):
+        if major == 2:
+            frame_id = data[offset : offset + 3]
+            frame_size = int.from_bytes(data[offset + 3 : offset + 6], "big")
+            frame_flags = 0
+        else:
+            frame_id = data[offset : offset + 4]
+            if major == 4:
+                frame_size = _syncsafe(data[offset + 4 : offset + 8])
+            else:
+                frame_size = struct.unpack(">I", data[offset + 4 : offset + 8])[0]
+            frame_flags = struct.unpack(">H", data[offset + 8 : offset + 10])[0]
+        if not frame_id.strip(b"\x00") or not frame_id.isalnum():
+            break
+        body = data[offset + header_size : offset + header_size + frame_size]
+        offset += header_size + frame_size
+
+        name = frame_id.decode("ascii")
+        if name in ("APIC", "PIC"):
+            has_picture = True
+            continue
+        if not name.startswith("T"):
+            continue
+        body = _id3_frame_body(major, frame_flags, body)
+        if body is None:
+            continue
+        value = _id3_text(body)
+        if value is not None and name not in raw:
+            raw[name] = value
+
+    return _id3v2_tags(major, raw), has_picture, end
+
+
+def _id3_frame_body(major: int, frame_flags: int, body: bytes) -> bytes | None:
+    if major == 3:
+        if frame_flags & 0x0040:
+            return None
+        if frame_flags & 0x0020:
+            body = body[1:]
+        if frame_flags & 0x0080:
+            body = zlib.decompress(body[4:])
+    elif major == 4:
+        if frame_flags & 0x0004:
+            return None
+        if frame_flags & 0x0040:
+            body = body[1:]
+        if frame_flags & 0x0001:
+            body = body[4:]
+        if frame_flags & 0x0002:
+            body = body.replace(b"\xff\x00", b"\xff")
+        if frame_flags & 0x0008:
+            body = zlib.decompress(body)
+    return body
+
+
+def _id3_text(body: bytes) -> str | None:
+    if not body:
+        return None
+    encoding, text = body[0], body[1:]
+    if encoding == 0:
+        value = text.split(b"\x00", 1)[0].decode("latin-1")
+    elif encoding == 3:
+        value = text.split(b"\x00", 1)[0].decode("utf-8", errors="replace")
+    elif encoding in (1, 2):
+        # UTF-16 strings end on a double null that sits on a character boundary.
+        for index in range(0, len(text) - 1, 2):
+            if text[index : index + 2] == b"\x00\x00":
+                text = text[:index]
+                break
+        codec = "utf-16" if encoding == 1 else "utf-16-be"
+        value = text.decode(codec, errors="replace") if text else ""
+    else:
+        return None
+    return value or None
+
+
+def _id3v2_tags(major: int, raw: Dict[str, str]) -> Dict[str, str]:
+    names = _ID3V22_TAGS if major == 2 else _ID3V2_TAGS
+    tags = {names[frame]: value for frame, value in raw.items() if frame in names}
+    if "genre" in tags:
+        tags["genre"] = _genre_name(tags["genre"])
+    # Before v2.4 the date is split into a year and a DDMM frame, which ffmpeg
+    # merges into one date tag.
+    year_frame, day_month_frame = ("TYE", "TDA") if major == 2 else ("TYER", "TDAT")
+    if major < 4 and year_frame in raw:
+        date = raw[year_frame]
+        day_month = raw.get(day_month_frame, "")
+        if len(day_month) == 4 and day_month.isdigit():
+            date = f"{date}-{day_month[2:4]}-{day_month[0:2]}"
+        tags["date"] = date
+    return tags
+
+
+def _read_id3v1(file: BinaryIO, file_size: int) -> Dict[str, str] | None:
+    if file_size < ID3V1_SIZE:
+        return None
+    file.seek(file_size - ID3V1_SIZE)
+    data = file.read(ID3V1_SIZE)
+    if data[:3] != b"TAG":
+        return None
+
+    def text(raw: bytes) -> str:
+        return raw.split(b"\x00", 1)[0].decode("latin-1").rstrip(" ")
+
+    tags: Dict[str, str] = {}
+    for name, raw in (
+        ("title", data[3:33]),
+        ("artist", data[33:63]),
+        ("album", data[63:93]),
+        ("date", data[93:97]),
+    ):
+        value = text(raw)
+        if value:
+            tags[name] = value
+    if data[125] == 0 and data[126] != 0:
+        tags["track"] = str(data[126])
+    if data[127] < len(ID3V1_GENRES):
+        tags["genre"] = ID3V1_GENRES[data[127]]
+    return tags
+
+
+# --- MPEG audio --------------------------------------------------------------
+
+
+def _parse_mpeg_header(header: bytes) -> Tuple[float, int, int, int, int, int] | None:
+    """Return (version, layer, bitrate kbps, sample rate, channels, frame length)."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header[1] >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version is None or layer is None:
+        return None
+    if bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = _MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = _MPEG_SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    channels = 1 if header[3] >> 6 == 3 else 2
+    if layer == 1:
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        frame_length = 72 * bitrate * 1000 // sample_rate + padding
+    else:
+        frame_length = 144 * bitrate * 1000 // sample_rate + padding
+    return version, layer, bitrate, sample_rate, channels, frame_length
+
+
+def _read_mpeg(
+    file: BinaryIO, audio_start: int, tags: Dict[str, str], has_picture: bool
+) -> dict | None:
+    file.seek(0, 2)
+    file_size = file.tell()
+    file.seek(audio_start)
+    window = file.read(MPEG_SYNC_SEARCH_BYTES)
+
+    # The first plausible header only counts if another one with the same
+    # version and layer follows right after it (or the file ends there),
+    # otherwise random bytes in a non-MPEG file would pass as audio.
+    header = None
+    frame_offset = window.find(b"\xff")
+    while frame_offset != -1:
+        header = _parse_mpeg_header(window[frame_offset : frame_offset + 4])
+        if header is not None:
+            next_offset = audio_start + frame_offset + header[5]
+            if next_offset >= file_size:
+                break
+            file.seek(next_offset)
+            next_header = file.read(4)
+            if (
+                _parse_mpeg_header(next_header) is not None
+                and next_header[1] & 0xFE == window[frame_offset + 1] & 0xFE
+            ):
+                break
+        header = None
+        frame_offset = window.find(b"\xff", frame_offset + 1)
+    if header is None:
+        return None
+
+    version, layer, bitrate, sample_rate, channels, _ = header
+    samples_per_frame = 384 if layer == 1 else 576 if layer == 3 and version != 1 else 1152
+    frame = window[frame_offset : frame_offset + 192]
+
+    frame_count, vbr_bytes, is_cbr = _read_vbr_header(frame, version, channels)
+    bit_rate = bitrate * 1000
+    if frame_count:
+        duration = frame_count * samples_per_frame / sample_rate
+        if vbr_bytes and not is_cbr:
+            bit_rate = vbr_bytes * 8 * sample_rate // (frame_count * samples_per_frame)
+    else:
+        # Same estimate ffprobe makes for files without a Xing/VBRI header.
+        duration = (file_size - audio_start) * 8 / bit_rate
+
+    if not tags:
+        tags = _read_id3v1(file, file_size) or {}
+    return _probe_result(
+        codec=_MPEG_CODECS[layer],
+        sample_rate=sample_rate,
+        channels=channels,
+        duration=duration,
+        bit_rate=bit_rate,
+        tags=tags,
+        has_picture=has_picture,
+    )
+
+
+def _read_vbr_header(frame: bytes, version: float, channels: int) -> Tuple[int, int, bool]:
+    """Return (frame count, byte count, is the Info/CBR variant) from Xing or VBRI."""
+    if version == 1:
+        xing_offset = 4 + (32 if channels == 2 else 17)
+    else:
+        xing_offset = 4 + (17 if channels == 2 else 9)
+    tag = frame[xing_offset : xing_offset + 4]
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", frame[xing_offset + 4 : xing_offset + 8])[0]
+        offset = xing_offset + 8
+        frame_count = vbr_bytes = 0
+        if flags & 0x1:
+            frame_count = struct.unpack(">I", frame[offset : offset + 4])[0]
+            offset += 4
+        if flags & 0x2:
+            vbr_bytes = struct.unpack(">I", frame[offset : offset + 4])[0]
+        return frame_count, vbr_bytes, tag == b"Info"
+    if frame[36:40] == b"VBRI":
+        vbr_bytes, frame_count = struct.unpack(">II", frame[46:54])
+        return frame_count, vbr_bytes, False
+    return 0, 0, False
+
+
+# --- FLAC --------------------------------------------------------------------
+
+
+def _read_flac(file: BinaryIO, offset: int, has_picture: bool) -> dict | None:
+    file.seek(offset)
+    stream_info = None
+    tags: Dict[str, str] = {}
+    while True:
+        block_header = file.read(4)
+        if len(block_header) < 4:
+            raise _Unsupported("truncated FLAC metadata")
+        is_last = block_header[0] & 0x80
+        block_type = block_header[0] & 0x7F
+        block_size = int.from_bytes(block_header[1:4], "big")
+        if block_type == 0:
+            stream_info = file.read(block_size)
+        elif block_type == 4:
+            tags = _vorbis_comment_tags(file.read(block_size))
+        elif block_type == 6:
+            has_picture = True
+            file.seek(block_size, 1)
+        elif block_type == 127:
+            raise _Unsupported("invalid FLAC metadata block")
+        else:
+            file.seek(block_size, 1)
+        if is_last:
+            break
+
+    if stream_info is None or len(stream_info) < 18:
+        return None
+    packed = int.from_bytes(stream_info[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if sample_rate == 0:
+        return None
+
+    # ffprobe reports no bit_rate on FLAC streams, only on the format.
+    return _probe_result(
+        codec="flac",
+        sample_rate=sample_rate,
+        channels=channels,
+        duration=total_samples / sample_rate,
+        bit_rate=None,
+        tags=tags,
+        has_picture=has_picture,
+    )
+
+
+def _vorbis_comment_tags(block: bytes) -> Dict[str, str]:
+    vendor_length = struct.unpack_from("<I", block, 0)[0]
+    offset = 4 + vendor_length
+    count = struct.unpack_from("<I", block, offset)[0]
+    offset += 4
+    values: Dict[str, List[str]] = {}
+    for _ in range(count):
+        length = struct.unpack_from("<I", block, offset)[0]
+        offset += 4
+        comment = block[offset : offset + length].decode("utf-8", errors="replace")
+        offset += length
+        key, separator, value = comment.partition("=")
+        name = _VORBIS_TAGS.get(key.upper())
+        if separator and name is not None:
+            values.setdefault(name, []).append(value)
+    # ffprobe joins repeated Vorbis comments with ';'.
+    return {name: ";".join(items) for name, items in values.items()}
+
+
+# --- RIFF/WAVE ---------------------------------------------------------------
+
+
+def _wave_codec(format_tag: int, bits: int) -> str | None:
+    if format_tag == _WAVE_FORMAT_PCM:
+        return {8: "pcm_u8", 16: "pcm_s16le", 24: "pcm_s24le", 32: "pcm_s32le"}.get(bits)
+    if format_tag == _WAVE_FORMAT_IEEE_FLOAT:
+        return {32: "pcm_f32le", 64: "pcm_f64le"}.get(bits)
+    if format_tag == _WAVE_FORMAT_ALAW:
+        return "pcm_alaw"
+    if format_tag == _WAVE_FORMAT_MULAW:
+        return "pcm_mulaw"
+    return None
+
+
+def _read_wave(file: BinaryIO) -> dict | None:
+    file.seek(0, 2)
+    file_size = file.tell()
+    offset = 12
+    fmt = None
+    data_size = None
+    tags: Dict[str, str] = {}
+    has_picture = False
+
+    while offset + 8 <= file_size:
+        file.seek(offset)
+        chunk_id, chunk_size = struct.unpack("<4sI", file.read(8))
+        body_offset = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = file.read(min(chunk_size, 40))
+        elif chunk_id == b"data":
+            data_size = min(chunk_size, file_size - body_offset)
+        elif chunk_id == b"LIST" and file.read(4) == b"INFO":
+            tags.update(_riff_info_tags(file.read(chunk_size - 4)))
+        elif chunk_id in (b"id3 ", b"ID3 "):
+            id3_tags, id3_picture, _ = _read_id3v2(file)
+            tags.update(id3_tags)
+            has_picture = has_picture or id3_picture
+        offset = body_offset + chunk_size + (chunk_size & 1)
+
+    if fmt is None or data_size is None or len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack(
+        "<HHIIHH", fmt[:16]
+    )
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    codec = _wave_codec(format_tag, bits)
+    if codec is None or not channels or not sample_rate or not block_align:
+        return None
+
+    return _probe_result(
+        codec=codec,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration=(data_size // block_align) / sample_rate,
+        bit_rate=sample_rate * channels * bits,
+        tags=tags,
+        has_picture=has_picture,
+    )
+
+
+def _riff_info_tags(info: bytes) -> Dict[str, str]:
+    tags: Dict[str, str] = {}
+    offset = 0
+    while offset + 8 <= len(info):
+        sub_id, sub_size = struct.unpack_from("<4sI", info, offset)
+        raw = info[offset + 8 : offset + 8 + sub_size]
+        offset += 8 + sub_size + (sub_size & 1)
+        name = _RIFF_INFO_TAGS.get(sub_id.decode("latin-1"))
+        if name is None:
+            continue
+        raw = raw.split(b"\x00", 1)[0]
+        try:
+            value = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            value = raw.decode("latin-1")
+        if value:
+            tags[name] = value
+    return tags
+
+
+# --- MP4 ---------------------------------------------------------------------
+
+
+def _iter_boxes(data: bytes, start: int, end: int):
+    """Yield (type, payload start, payload end) for the boxes in data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise _Unsupported("malformed MP4 box")
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(data: bytes, start: int, end: int, path: Tuple[bytes, ...]):
+    for box_type, payload_start, payload_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload_start, payload_end
+            return _find_box(data, payload_start, payload_end, path[1:])
+    return None
+
+
+def _read_moov(file: BinaryIO) -> bytes | None:
+    file.seek(0, 2)
+    file_size = file.tell()
+    offset = 0
+    while offset + 8 <= file_size:
+        file.seek(offset)
+        size, box_type = struct.unpack(">I4s", file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return None
+        if box_type == b"moov":
+            if size > MP4_MAX_MOOV_BYTES:
+                return None
+            return file.read(size - header_size)
+        offset += size
+    return None
+
+
+def _read_mp4(file: BinaryIO) -> dict | None:
+    moov = _read_moov(file)
+    if moov is None:
+        return None
+
+    audio = None
+    for box_type, start, end in _iter_boxes(moov, 0, len(moov)):
+        if box_type == b"trak":
+            audio = _mp4_audio_track(moov, start, end)
+            if audio is not None:
+                break
+    if audio is None:
+        return None
+    codec, sample_rate, channels, duration, bit_rate = audio
+
+    tags: Dict[str, str] = {}
+    has_picture = False
+    meta = _find_box(moov, 0, len(moov), (b"udta", b"meta"))
+    if meta is not None:
+        meta_start, meta_end = meta
+        # ISO meta is a full box; QuickTime style meta has no version/flags.
+        if moov[meta_start + 4 : meta_start + 8] != b"hdlr":
+            meta_start += 4
+        ilst = _find_box(moov, meta_start, meta_end, (b"ilst",))
+        if ilst is not None:
+            tags, has_picture = _ilst_tags(moov, *ilst)
+
+    return _probe_result(
+        codec=codec,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration=duration,
+        bit_rate=bit_rate,
+        tags=tags,
+        has_picture=has_picture,
+    )
+
+
+def _mp4_audio_track(moov: bytes, start: int, end: int):
+    mdia = _find_box(moov, start, end, (b"mdia",))
+    if mdia is None:
+        return None
+    hdlr = _find_box(moov, *mdia, (b"hdlr",))
+    if hdlr is None or moov[hdlr[0] + 8 : hdlr[0] + 12] != b"soun":
+        return None
+
+    mdhd = _find_box(moov, *mdia, (b"mdhd",))
+    if mdhd is None:
+        return None
+    if moov[mdhd[0]] == 1:
+        timescale, track_duration = struct.unpack_from(">IQ", moov, mdhd[0] + 20)
+    else:
+        timescale, track_duration = struct.unpack_from(">II", moov, mdhd[0] + 12)
+    if not timescale:
+        return None
+    duration = track_duration / timescale
+
+    stbl = _find_box(moov, *mdia, (b"minf", b"stbl"))
+    if stbl is None:
+        return None
+    stsd = _find_box(moov, *stbl, (b"stsd",))
+    if stsd is None:
+        return None
+    entry = next(_iter_boxes(moov, stsd[0] + 8, stsd[1]), None)
+    if entry is None:
+        return None
+    entry_type, entry_start, entry_end = entry
+
+    sound_version = struct.unpack_from(">H", moov, entry_start + 8)[0]
+    channels = struct.unpack_from(">H", moov, entry_start + 16)[0]
+    sample_rate = struct.unpack_from(">I", moov, entry_start + 24)[0] >> 16
+    children_start = entry_start + {0: 28, 1: 44}.get(sound_version, -1)
+    if children_start < entry_start:
+        raise _Unsupported("unsupported sound sample description version")
+
+    bit_rate = 0
+    if entry_type == b"mp4a":
+        esds = _find_box(moov, children_start, entry_end, (b"esds",))
+        if esds is None:
+            return None
+        codec, esds_rate, esds_channels, bit_rate = _parse_esds(moov[esds[0] + 4 : esds[1]])
+        sample_rate = sample_rate or esds_rate
+        channels = esds_channels or channels
+    elif entry_type == b"alac":
+        cookie = _find_box(moov, children_start, entry_end, (b"alac",))
+        codec = "alac"
+        if cookie is not None and cookie[1] - cookie[0] >= 28:
+            channels = moov[cookie[0] + 13]
+            sample_rate = struct.unpack_from(">I", moov, cookie[0] + 24)[0]
+    else:
+        return None
+    if codec is None:
+        return None
+    sample_rate = sample_rate or timescale
+
+    # ffprobe derives the stream bit rate from the sample table when it can.
+    stsz = _find_box(moov, *stbl, (b"stsz",))
+    if stsz is not None and duration > 0:
+        sample_size, sample_count = struct.unpack_from(">II", moov, stsz[0] + 4)
+        if sample_size:
+            total_bytes = sample_size * sample_count
+        else:
+            sizes = moov[stsz[0] + 12 : stsz[0] + 12 + 4 * sample_count]
+            total_bytes = sum(struct.unpack(f">{sample_count}I", sizes))
+        bit_rate = int(total_bytes * 8 / duration)
+    return codec, sample_rate, channels, duration, bit_rate
+
+
+def _read_descriptor(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """Return (tag, payload offset, payload length) for an MPEG-4 descriptor."""
+    tag = data[offset]
+    offset += 1
+    length = 0
+    for _ in range(4):
+        byte = data[offset]
+        offset += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, offset, length
+
+
+def _parse_esds(data: bytes) -> Tuple[str | None, int, int, int]:
+    """Return (codec, sample rate, channels, average bit rate) from an esds payload."""
+    tag, offset, _ = _read_descriptor(data, 0)
+    if tag != 0x03:
+        raise _Unsupported("esds without ES descriptor")
+    es_flags = data[offset + 2]
+    offset += 3
+    if es_flags & 0x80:
+        offset += 2
+    if es_flags & 0x40:
+        offset += 1 + data[offset]
+    if es_flags & 0x20:
+        offset += 2
+
+    tag, offset, _ = _read_descriptor(data, offset)
+    if tag != 0x04:
+        raise _Unsupported("esds without decoder config")
+    object_type = data[offset]
+    average_bit_rate = struct.unpack_from(">I", data, offset + 9)[0]
+    codec = {0x40: "aac", 0x66: "aac", 0x67: "aac", 0x68: "aac", 0x69: "mp3", 0x6B: "mp3"}.get(
+        object_type
+    )
+    offset += 13
+
+    sample_rate = channels = 0
+    if codec == "aac" and offset < len(data):
+        tag, offset, length = _read_descriptor(data, offset)
+        if tag == 0x05 and length >= 2:
+            config = int.from_bytes(data[offset : offset + length], "big")
+            bits = length * 8
+            audio_object_type = config >> (bits - 5)
+            position = bits - 5
+            if audio_object_type == 31:
+                position -= 6
+            frequency_index = (config >> (position - 4)) & 0x0F
+            position -= 4
+            if frequency_index == 15:
+                sample_rate = (config >> (position - 24)) & 0xFFFFFF
+                position -= 24
+            elif frequency_index < len(_AAC_SAMPLE_RATES):
+                sample_rate = _AAC_SAMPLE_RATES[frequency_index]
+            channel_config = (config >> (position - 4)) & 0x0F
+            channels = {7: 8}.get(channel_config, channel_config if channel_config < 7 else 0)
+    return codec, sample_rate, channels, average_bit_rate
+
+
+def _ilst_tags(moov: bytes, start: int, end: int) -> Tuple[Dict[str, str], bool]:
+    tags: Dict[str, str] = {}
+    has_picture = False
+    for item_type, item_start, item_end in _iter_boxes(moov, start, end):
+        data_box = _find_box(moov, item_start, item_end, (b"data",))
+        if data_box is None:
+            continue
+        value = moov[data_box[0] + 8 : data_box[1]]
+        if item_type == b"covr":
+            has_picture = True
+        elif item_type in _MP4_TEXT_TAGS:
+            text = value.decode("utf-8", errors="replace")
+            if text:
+                tags[_MP4_TEXT_TAGS[item_type]] = text
+        elif item_type in (b"trkn", b"disk") and len(value) >= 6:
+            number, total = struct.unpack_from(">HH", value, 2)
+            name = "track" if item_type == b"trkn" else "disc"
+            tags[name] = f"{number}/{total}" if total else str(number)
+        elif item_type == b"gnre" and len(value) >= 2 and "genre" not in tags:
+            index = struct.unpack_from(">H", value, 0)[0] - 1
+            if 0 <= index < len(ID3V1_GENRES):
+                tags["genre"] = ID3V1_GENRES[index]
+    return tags, has_picture
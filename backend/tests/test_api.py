@@ -1,6 +1,7 @@
 import importlib
 import json
 import sys
+import threading
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import List, Optional, Set
@@ -19,6 +20,8 @@ from app.models import (
     TrackMetaData,
 )
 from app.models.client_track import ClientTrack
+from app.services.file_watcher import FileWatcher
+from app.services.pipeline import IngestionPipeline, PipelineContext
 
 
 @pytest.fixture
@@ -417,6 +420,50 @@ class TestGetTracks:
         assert gettracksresponse.nextCursor is None
 
 
+    def test_tracks__exact_page__no_next_cursor(self, client):
+        add_tracks_to_client(client=client, amount_to_add=5)
+
+        r = client.get("/tracks?limit=5")
+        assert r.status_code == 200, r.text
+
+        gettracksresponse = GetTracksResponse.model_validate(r.json())
+        assert len(gettracksresponse.data) == 5
+        assert gettracksresponse.nextCursor is None
+        assert gettracksresponse.totalCount is None
+
+    def test_tracks__include_total__returns_total_count(self, client):
+        add_tracks_to_client(client=client, amount_to_add=5)
+
+        r = client.get("/tracks", params={"limit": 2, "include_total": True})
+        assert r.status_code == 200, r.text
+        gettracksresponse = GetTracksResponse.model_validate(r.json())
+        assert gettracksresponse.totalCount == 5
+        assert gettracksresponse.nextCursor is not None
+
+        r = client.get(
+            "/tracks",
+            params={
+                "limit": 2,
+                "cursor": gettracksresponse.nextCursor,
+                "include_total": True,
+            },
+        )
+        assert r.status_code == 200, r.text
+        gettracksresponse = GetTracksResponse.model_validate(r.json())
+        assert gettracksresponse.totalCount == 5
+
+    def test_artists_albums__include_total__returns_total_count(self, client):
+        add_tracks_to_client(client=client, amount_to_add=3)
+
+        r = client.get("/artists", params={"limit": 1, "include_total": True})
+        assert r.status_code == 200, r.text
+        assert GetArtistsResponse.model_validate(r.json()).totalCount == 3
+
+        r = client.get("/albums", params={"limit": 1, "include_total": True})
+        assert r.status_code == 200, r.text
+        assert GetAlbumsResponse.model_validate(r.json()).totalCount == 3
+
+
 class TestGetTracksStream:
     def test_tracks_stream__invalid_uuid__fails(self, client):
         add_tracks_to_client(client=client, amount_to_add=5)
@@ -473,6 +520,163 @@ class TestGetTracksStream:
 
         assert body == data[10:20]
 
+    def test_tracks_stream__file_removed__fails(self, client, tmp_path: Path):
+        track_path = tmp_path / "track.mp3"
+        track_path.write_bytes(b"track")
+        track = Track(file_path=track_path, metadata=TrackMetaData(duration=1.0))
+        assert client.app.state.database.add_track(track=track)
+
+        track_path.unlink()
+
+        r = client.get(f"/tracks/{track.uuid_id}/stream")
+        assert r.status_code == 404, r.text
+
+
+    def test_tracks_stream__seeking__hits_database_once(
+        self, client, tmp_path: Path, monkeypatch
+    ):
+        track_path = tmp_path / "track.flac"
+        data = b"track" * 1000
+        track_path.write_bytes(data)
+        track = Track(
+            file_path=track_path, metadata=TrackMetaData(codec="flac", duration=1.0)
+        )
+        database = client.app.state.database
+        assert database.add_track(track=track)
+
+        lookups = []
+        get_stream_info = database.get_stream_info
+
+        def counting_get_stream_info(uuid_id):
+            lookups.append(uuid_id)
+            return get_stream_info(uuid_id)
+
+        monkeypatch.setattr(database, "get_stream_info", counting_get_stream_info)
+
+        for start in range(0, 5000, 1000):
+            headers = {"Range": f"bytes={start}-{start + 99}"}
+            r = client.get(f"/tracks/{track.uuid_id}/stream", headers=headers)
+            assert r.status_code == 206, r.text
+            assert r.headers["content-type"] == "audio/flac"
+            assert "last-modified" in r.headers
+            assert r.content == data[start : start + 100]
+
+        assert lookups == [track.uuid_id]
+
+    def test_tracks_stream__file_removed_after_cached__fails(self, client, tmp_path: Path):
+        track_path = tmp_path / "track.flac"
+        track_path.write_bytes(b"track" * 1000)
+        track = Track(
+            file_path=track_path, metadata=TrackMetaData(codec="flac", duration=1.0)
+        )
+        assert client.app.state.database.add_track(track=track)
+        r = client.get(
+            f"/tracks/{track.uuid_id}/stream", headers={"Range": "bytes=0-99"}
+        )
+        assert r.status_code == 206, r.text
+
+        track_path.unlink()
+
+        r = client.get(
+            f"/tracks/{track.uuid_id}/stream", headers={"Range": "bytes=100-199"}
+        )
+        assert r.status_code == 404, r.text
+
+
+class TestDatabaseExecutor:
+    def test_endpoints__database_calls__run_on_db_executor(self, client, monkeypatch):
+        add_tracks_to_client(client=client, amount_to_add=3)
+        database = client.app.state.database
+        thread_names = []
+
+        def record(function):
+            def wrapper(*args, **kwargs):
+                thread_names.append(threading.current_thread().name)
+                return function(*args, **kwargs)
+
+            return wrapper
+
+        for name in [
+            "get_track_rows_page",
+            "get_artists_page",
+            "get_albums_page",
+            "get_search_results",
+        ]:
+            monkeypatch.setattr(database, name, record(getattr(database, name)))
+
+        for url in ["/tracks", "/artists", "/albums", "/search?q=song"]:
+            r = client.get(url)
+            assert r.status_code == 200, r.text
+
+        assert len(thread_names) == 4
+        assert all(name.startswith("db") for name in thread_names)
+
+    def test_endpoints__many_requests__reader_connections_bounded(self, client):
+        add_tracks_to_client(client=client, amount_to_add=3)
+
+        for _ in range(20):
+            r = client.get("/tracks")
+            assert r.status_code == 200, r.text
+
+        executor = client.app.state.db_executor
+        stats = client.app.state.database.pool_stats()
+        # The test thread opened one reader for add_track's setup queries.
+        assert stats.reader_connections <= executor._max_workers + 1
+
+
+class TestIngestionStats:
+    def test_ingestion_stats__file_watcher_disabled__no_stages(self, client):
+        r = client.get("/ingestion/stats")
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body.pop("database")["writer_checkouts"] >= 1
+        assert body == {
+            "stages": [],
+            "dedup": None,
+            "watcher": None,
+            "placement": None,
+        }
+
+    def test_ingestion_stats__file_watcher__reports_processed_size(self, client, tmp_path):
+        watcher = FileWatcher(tmp_path, lambda path: True, quiet_seconds=1)
+        watcher.processed.add(tmp_path / "song.mp3")
+        client.app.state.file_watcher = watcher
+
+        r = client.get("/ingestion/stats")
+
+        assert r.status_code == 200, r.text
+        assert r.json()["watcher"]["size"] == 1
+        assert r.json()["watcher"]["evicted"] == 0
+
+    def test_ingestion_stats__pipeline__reports_every_stage(self, client, tmp_path):
+        pipeline = IngestionPipeline(
+            PipelineContext(
+                workspace_dir=tmp_path,
+                wait_until_ready=lambda path: True,
+                probe_function=lambda path: None,
+                place_function=lambda probed_file: None,
+                write_function=lambda tracks: [],
+                queue_size=16,
+            )
+        )
+        client.app.state.ingestion_pipeline = pipeline
+
+        r = client.get("/ingestion/stats")
+
+        assert r.status_code == 200, r.text
+        stages = r.json()["stages"]
+        assert [stage["name"] for stage in stages] == [
+            "discover",
+            "stabilize",
+            "hash",
+            "probe",
+            "organize",
+            "write",
+        ]
+        assert stages[0]["queue_capacity"] == 16
+        assert stages[0]["processed"] == 0
+        assert r.json()["dedup"] is None
+
 
 # TODO: Refactor tests to also include album_artist songs.
 # Although, I suppose I already test that functionality in test_database.py::TestGetArtists
@@ -584,6 +788,34 @@ class TestGetArtists:
         r = client.get(f"/artists?cursor={json.dumps(bad_cursor)}")
         assert r.status_code == 400, r.text
 
+    def test_artists__tampered_cursor__returns_error(self, client):
+        add_tracks_to_client(client=client, amount_to_add=5)
+
+        r = client.get("/artists?limit=1")
+        assert r.status_code == 200, r.text
+        nextCursor = GetArtistsResponse.model_validate(r.json()).nextCursor
+        assert nextCursor is not None
+
+        middle = len(nextCursor) // 2
+        tampered = (
+            nextCursor[:middle]
+            + ("A" if nextCursor[middle] != "A" else "B")
+            + nextCursor[middle + 1 :]
+        )
+        r = client.get("/artists", params={"limit": 1, "cursor": tampered})
+        assert r.status_code == 400, r.text
+
+    def test_artists__cursor_from_other_endpoint__returns_error(self, client):
+        add_tracks_to_client(client=client, amount_to_add=5)
+
+        r = client.get("/albums?limit=1")
+        assert r.status_code == 200, r.text
+        nextCursor = GetAlbumsResponse.model_validate(r.json()).nextCursor
+        assert nextCursor is not None
+
+        r = client.get("/artists", params={"limit": 1, "cursor": nextCursor})
+        assert r.status_code == 400, r.text
+
     def test_artists__json_cursor__paginates_correctly(self, client):
         add_tracks_to_client(client=client, amount_to_add=10)
 
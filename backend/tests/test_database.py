@@ -1,4 +1,6 @@
 import sqlite3
+import threading
+import time
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import List
@@ -12,13 +14,19 @@ from app.database.database import (
     AlbumRowFilterParameter,
     ArtistOrderParameter,
     ArtistRowFilterParameter,
+    CompiledQuery,
     Database,
     DatabaseContext,
+    FileSnapshot,
     OrderParameter,
+    QueryCache,
     RowFilterParameter,
     SearchEntityType,
+    KeysetColumn,
     SearchParameter,
+    keyset_predicate,
     prepare_fts_query,
+    _add_ordering_indexes,
 )
 from app.models.album import Album
 from app.models.artist import Artist
@@ -145,6 +153,254 @@ class TestDatabaseInitialize:
             assert not database_path.exists()
 
 
+class TestConnectionPool:
+    def test_connection_pool__same_thread__reuses_reader(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        database.get_tracks_count()
+        database.get_tracks()
+
+        stats = database.pool_stats()
+        assert stats.reader_connections == 1
+        assert stats.reader_checkouts == 2
+
+    def test_connection_pool__different_threads__get_own_readers(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        readers = []
+
+        def read():
+            readers.append(database.pool.reader())
+
+        threads = [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(conn) for conn in readers}) == 3
+        # Each reader was closed when its thread exited.
+        assert database.pool_stats().reader_connections == 0
+        with pytest.raises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+
+    def test_connection_pool__reader_threads__checkouts_all_counted(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        done = threading.Event()
+        started = threading.Barrier(4)
+
+        def read():
+            started.wait()
+            for _ in range(500):
+                database.pool.reader()
+            done.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(500):
+            if database.pool_stats().reader_checkouts == 2000:
+                break
+            time.sleep(0.01)
+        assert database.pool_stats().reader_connections == 4
+        done.set()
+        for thread in threads:
+            thread.join()
+
+        assert database.pool_stats().reader_checkouts == 2000
+
+    def test_connection_pool__writes__share_one_writer(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        for i in range(3):
+            assert database.add_track(create_track(tmp_path / f"{i}.mp3", f"s{i}", "a"))
+
+        stats = database.pool_stats()
+        # initialize() + three add_track calls
+        assert stats.writer_checkouts == 4
+        assert database.get_tracks_count() == 3
+
+    def test_connection_pool__writer_held__times_out(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        with database.pool.writer():
+            with pytest.raises(sqlite3.OperationalError):
+                with database.pool.writer(timeout=0.01):
+                    pass
+
+    def test_connection_pool__close__reopens_on_next_use(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.get_tracks_count() == 0
+
+        database.close()
+        assert database.pool_stats().reader_connections == 0
+
+        assert database.add_track(create_track(tmp_path / "t.mp3", "song", "artist"))
+        assert database.get_tracks_count() == 1
+
+
+class TestQueryCache:
+    def test_query_cache__same_shape__hits(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        for i in range(3):
+            assert database.add_track(create_track(tmp_path / f"{i}.mp3", f"s{i}", f"a{i}"))
+
+        order = [OrderParameter(column="artist"), OrderParameter(column="uuid_id")]
+        first = database.get_tracks(order_parameters=order, limit=1)
+        second = database.get_tracks(
+            order_parameters=order,
+            row_filter_parameters=[
+                RowFilterParameter(column="artist", value=first[0].metadata.artist),
+                RowFilterParameter(column="uuid_id", value=first[0].uuid_id),
+            ],
+            limit=1,
+        )
+        third = database.get_tracks(
+            order_parameters=order,
+            row_filter_parameters=[
+                RowFilterParameter(column="artist", value=second[0].metadata.artist),
+                RowFilterParameter(column="uuid_id", value=second[0].uuid_id),
+            ],
+            limit=1,
+        )
+
+        assert [t[0].metadata.artist for t in (first, second, third)] == ["a0", "a1", "a2"]
+        stats = database.query_cache_stats()
+        # The first page has no cursor, the next two share one shape.
+        assert stats.misses == 2
+        assert stats.hits == 1
+        assert stats.entries == 2
+
+    def test_query_cache__null_cursor_value__compiles_new_shape(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        order = [OrderParameter(column="album")]
+        database.get_tracks(
+            order_parameters=order,
+            row_filter_parameters=[RowFilterParameter(column="album", value="x")],
+        )
+        database.get_tracks(
+            order_parameters=order,
+            row_filter_parameters=[RowFilterParameter(column="album", value=None)],
+        )
+
+        assert database.query_cache_stats().misses == 2
+
+    def test_query_cache__invalid_shape__not_cached(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                database.get_tracks(album_id=1)
+
+        stats = database.query_cache_stats()
+        assert stats.misses == 2
+        assert stats.entries == 0
+
+    def test_query_cache__full__evicts_least_recently_used(self):
+        cache = QueryCache(max_entries=2)
+
+        def compiled(sql):
+            return lambda: CompiledQuery(sql=sql, slots=())
+
+        cache.get(("a",), compiled("a"))
+        cache.get(("b",), compiled("b"))
+        cache.get(("a",), compiled("a"))
+        cache.get(("c",), compiled("c"))
+
+        assert cache.get(("a",), compiled("new a")).sql == "a"
+        assert cache.get(("b",), compiled("new b")).sql == "new b"
+        stats = cache.stats()
+        assert stats.entries == 2
+        assert stats.evictions == 2
+
+
+def album_track(path: Path, title: str, album: str, year=None, artist="artist"):
+    track = create_track(path, title, artist)
+    track.metadata.album = album
+    track.metadata.year = year
+    return track
+
+
+class TestIdCache:
+    def test_add_track__same_album_again__ids_from_cache(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.add_track(album_track(tmp_path / "1.mp3", "one", "Album"))
+        statements = []
+
+        with database.pool.writer() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            assert database.add_track(album_track(tmp_path / "2.mp3", "two", "Album"))
+        finally:
+            with database.pool.writer() as conn:
+                conn.set_trace_callback(None)
+
+        # Only the aggregate columns of the two are touched.
+        assert not any(
+            ("artists" in sql or "albums" in sql) and not sql.startswith("UPDATE")
+            for sql in statements
+        )
+        assert database.id_cache_stats().hits == 2
+        assert len({track.metadata.album_id for track in database.get_tracks()}) == 1
+
+    def test_add_track__cached_album_higher_year__year_raised(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        for i, (album, year) in enumerate(
+            [("Album", 2000), ("ALBUM", 2005), ("Album", 2003), ("Album", None)]
+        ):
+            assert database.add_track(album_track(tmp_path / f"{i}.mp3", f"s{i}", album, year))
+
+        [album] = database.get_albums(artist_id=get_artist_id(database, "artist"))
+        assert album.year == 2005
+
+    def test_delete_track__orphaned_artist_and_album__not_resolved_from_cache(
+        self, tmp_path: Path
+    ):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        first = album_track(tmp_path / "1.mp3", "one", "Album")
+        assert database.add_track(first)
+        assert database.delete_track(first.uuid_id)
+
+        assert database.add_tracks([album_track(tmp_path / "2.mp3", "two", "Album")]) == [True]
+
+        [track] = database.get_tracks()
+        artist_id = get_artist_id(database, "artist")
+        assert track.metadata.artist_id == artist_id
+        assert track.metadata.album_id == get_album_id(database, "Album", artist_id)
+        assert len(database.get_search_results("Album").albums) == 1
+
+    def test_add_track__rolled_back__new_ids_not_cached(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        existing = create_track(tmp_path / "1.mp3", "one", "old artist")
+        assert database.add_track(existing)
+        duplicate = album_track(tmp_path / "2.mp3", "two", "Album", artist="new artist")
+        duplicate.uuid_id = existing.uuid_id
+
+        assert not database.add_track(duplicate)
+        assert database.add_track(
+            album_track(tmp_path / "3.mp3", "three", "Album", artist="new artist")
+        )
+
+        artist_id = get_artist_id(database, "new artist")
+        assert artist_id is not None
+        assert get_album_id(database, "Album", artist_id) is not None
+
+
 class TestDatabaseAddTrack:
     def test_add_track__empty__returns_false(self, tmp_path: Path):
         file_path = tmp_path / "fake_track"
@@ -451,6 +707,288 @@ class TestDatabaseAddTrack:
         assert regular[0].year == 2020
 
 
+class TestDatabaseAddTracks:
+    def test_add_tracks__valid_tracks__adds_all(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        tracks = [
+            create_track(tmp_path / f"{i}.mp3", f"song_{i}", f"artist_{i % 3}")
+            for i in range(10)
+        ]
+
+        assert database.add_tracks(tracks, chunk_size=4) == [True] * 10
+        assert database.get_tracks_count() == 10
+        artists = database.get_artists(limit=1000)
+        assert artists is not None
+        assert len(artists) == 3
+
+        returned = database.get_tracks(limit=1000)
+        assert sorted(t.uuid_id for t in returned) == sorted(t.uuid_id for t in tracks)
+        assert all(t.metadata.artist_id is not None for t in returned)
+        assert all(t.metadata.album_id is not None for t in returned)
+
+    def test_add_tracks__bad_rows__only_bad_rows_fail(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        good_1 = create_track(tmp_path / "1.mp3", "one", "artist")
+        duplicate = create_track(tmp_path / "2.mp3", "two", "artist")
+        duplicate.uuid_id = good_1.uuid_id
+        empty = Track(file_path=tmp_path / "3.mp3", metadata=TrackMetaData())
+        good_2 = create_track(tmp_path / "4.mp3", "four", "other artist")
+
+        results = database.add_tracks([good_1, duplicate, empty, good_2])
+
+        assert results == [True, False, False, True]
+        assert database.get_tracks_count() == 2
+        assert len(database.get_search_results("two").tracks) == 0
+        assert len(database.get_search_results("four").tracks) == 1
+
+    def test_add_tracks__same_album_different_years__keeps_highest_year(
+        self, tmp_path: Path
+    ):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        tracks = []
+        for i, year in enumerate([2001, None, 2005, 2003]):
+            track = create_track(tmp_path / f"{i}.mp3", f"song_{i}", "artist")
+            track.metadata.album = "Album"
+            track.metadata.year = year
+            tracks.append(track)
+
+        assert all(database.add_tracks(tracks))
+
+        artist_id = get_artist_id(database, "artist")
+        albums = database.get_albums(artist_id=artist_id)
+        assert albums is not None
+        assert len(albums) == 1
+        assert albums[0].year == 2005
+
+    def test_add_tracks__invalid_chunk_size__raises(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        with pytest.raises(ValueError):
+            database.add_tracks([], chunk_size=0)
+
+
+class TestHashCandidates:
+    def _add(self, database, tmp_path: Path, name: str, file_hash: str) -> Track:
+        track = create_track(tmp_path / name, name, "artist")
+        track.file_hash = file_hash
+        assert database.add_track(track)
+        return track
+
+    def test_find_hash_candidates__key_and_full_forms__both_returned(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        self._add(database, tmp_path, "a.mp3", "b2:10:aa")
+        self._add(database, tmp_path, "b.mp3", "b2:10:aa:ff")
+        self._add(database, tmp_path, "c.mp3", "b2:10:aab")
+        self._add(database, tmp_path, "d.mp3", "b2:10:ab")
+
+        candidates = database.find_hash_candidates("b2:10:aa")
+
+        assert sorted(c.file_hash for c in candidates) == ["b2:10:aa", "b2:10:aa:ff"]
+        assert {c.file_path.name for c in candidates} == {"a.mp3", "b.mp3"}
+
+    def test_find_hash_candidates__no_match__returns_empty(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        assert database.find_hash_candidates("b2:10:aa") == []
+
+    def test_set_file_hash__existing_track__updated(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        track = self._add(database, tmp_path, "a.mp3", "b2:10:aa")
+
+        assert database.set_file_hash(track.uuid_id, "b2:10:aa:ff")
+        assert not database.set_file_hash("missing", "b2:10:bb")
+
+        [candidate] = database.find_hash_candidates("b2:10:aa")
+        assert candidate.file_hash == "b2:10:aa:ff"
+
+
+class TestFileSnapshot:
+    def test_get_file_snapshot__other_roots__excluded(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        entries = [
+            FileSnapshot(path="/data/music/a.mp3", size=1, mtime_ns=10),
+            FileSnapshot(path="/data/music/x/b.mp3", size=2, mtime_ns=20),
+            FileSnapshot(path="/data/music2/c.mp3", size=3, mtime_ns=30),
+        ]
+        assert database.update_file_snapshot(entries, [])
+
+        snapshot = database.get_file_snapshot(Path("/data/music"))
+
+        assert snapshot == {entry.path: entry for entry in entries[:2]}
+
+    def test_update_file_snapshot__changed_and_removed__applied(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.update_file_snapshot(
+            [
+                FileSnapshot(path="/music/a.mp3", size=1, mtime_ns=10),
+                FileSnapshot(path="/music/b.mp3", size=2, mtime_ns=20),
+            ],
+            [],
+        )
+
+        assert database.update_file_snapshot(
+            [FileSnapshot(path="/music/a.mp3", size=5, mtime_ns=50)], ["/music/b.mp3"]
+        )
+
+        assert database.get_file_snapshot(Path("/music")) == {
+            "/music/a.mp3": FileSnapshot(path="/music/a.mp3", size=5, mtime_ns=50)
+        }
+
+    def test_initialize__existing_database_without_table__table_created(self, tmp_path: Path):
+        database_path = tmp_path / "database.db"
+        sqlite3.connect(database_path).close()
+        database = set_up_database(database_path)
+
+        assert database.initialize()
+        assert database.get_file_snapshot(Path("/music")) == {}
+
+
+class TestIngestJobs:
+    def test_ingest_jobs__full_lifecycle__pruned_when_indexed(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        assert database.add_ingest_jobs(["/import/a.mp3", "/import/b.mp3"])
+        assert database.set_ingest_jobs_probed([("/import/a.mp3", "/music/a.mp3", "h")])
+        assert database.set_ingest_jobs_moved([("/import/a.mp3", "/music/a.mp3")])
+        assert database.set_ingest_jobs_indexed(["/music/a.mp3"])
+
+        [job] = database.get_unfinished_ingest_jobs()
+        assert job.source_path == Path("/import/b.mp3")
+        assert job.state == "discovered"
+        assert database.prune_ingest_jobs() == 1
+
+    def test_ingest_jobs__transition_replayed__never_goes_back(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.add_ingest_jobs(["/import/a.mp3"])
+        assert database.set_ingest_jobs_moved([("/import/a.mp3", "/music/a.mp3")])
+
+        assert database.add_ingest_jobs(["/import/a.mp3"])
+        assert database.set_ingest_jobs_probed([("/import/a.mp3", "/music/b.mp3", None)])
+
+        [job] = database.get_unfinished_ingest_jobs()
+        assert job.state == "moved"
+        assert job.library_path == Path("/music/a.mp3")
+
+    def test_set_ingest_jobs_probed__no_job_yet__created(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        assert database.set_ingest_jobs_probed([("/ws/a.mp3", "/music/a.mp3", "h")])
+
+        [job] = database.get_unfinished_ingest_jobs()
+        assert job.state == "probed"
+        assert job.file_hash == "h"
+
+    def test_delete_ingest_jobs__unfinished_job__deleted(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.add_ingest_jobs(["/import/a.mp3"])
+
+        assert database.delete_ingest_jobs(["/import/a.mp3"])
+
+        assert database.get_unfinished_ingest_jobs() == []
+
+
+class TestGetStreamInfo:
+    def test_get_stream_info__unknown_uuid__returns_none(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        assert database.get_stream_info("missing") is None
+
+    def test_get_stream_info__existing_file__returns_info(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        track_path = tmp_path / "song.mp3"
+        track_path.write_bytes(b"x" * 123)
+        track = create_track(track_path, "song", "artist")
+        assert database.add_track(track)
+
+        info = database.get_stream_info(track.uuid_id)
+
+        assert info is not None
+        assert info.file_path == track_path
+        assert info.codec == "test"
+        assert info.file_size == 123
+        assert info.mtime == track_path.stat().st_mtime
+
+    def test_get_stream_info__second_call__served_from_cache(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        track_path = tmp_path / "song.mp3"
+        track_path.write_bytes(b"x")
+        track = create_track(track_path, "song", "artist")
+        assert database.add_track(track)
+
+        first = database.get_stream_info(track.uuid_id)
+        checkouts = database.pool_stats().reader_checkouts
+        second = database.get_stream_info(track.uuid_id)
+
+        assert second == first
+        assert database.peek_stream_info(track.uuid_id) == first
+        assert database.pool_stats().reader_checkouts == checkouts
+
+    def test_get_stream_info__missing_file__not_cached(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        track_path = tmp_path / "song.mp3"
+        track = create_track(track_path, "song", "artist")
+        assert database.add_track(track)
+
+        info = database.get_stream_info(track.uuid_id)
+
+        assert info is not None
+        assert info.file_size is None
+        assert database.peek_stream_info(track.uuid_id) is None
+
+    def test_get_stream_info__track_deleted__invalidated(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        track_path = tmp_path / "song.mp3"
+        track_path.write_bytes(b"x")
+        track = create_track(track_path, "song", "artist")
+        assert database.add_track(track)
+        assert database.get_stream_info(track.uuid_id) is not None
+
+        assert database.delete_track(track.uuid_id)
+
+        assert database.peek_stream_info(track.uuid_id) is None
+        assert database.get_stream_info(track.uuid_id) is None
+
+    def test_get_stream_info__track_re_added__returns_new_path(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        old_path = tmp_path / "old.mp3"
+        new_path = tmp_path / "new.mp3"
+        old_path.write_bytes(b"old")
+        new_path.write_bytes(b"newer")
+        track = create_track(old_path, "song", "artist")
+        assert database.add_track(track)
+        assert database.get_stream_info(track.uuid_id).file_path == old_path
+
+        assert database.delete_track(track.uuid_id)
+        moved = track.model_copy(update={"file_path": new_path})
+        assert database.add_tracks([moved]) == [True]
+
+        info = database.get_stream_info(track.uuid_id)
+        assert info.file_path == new_path
+        assert info.file_size == 5
+
+
 class TestDatabaseDeleteTrack:
     def test_delete_track__db_not_initialized__returns_false(self, tmp_path: Path):
         database_path = tmp_path / "database.db"
@@ -587,6 +1125,160 @@ class TestDatabaseDeleteTrack:
         conn.close()
 
 
+class TestDatabaseDeleteTracks:
+    def _database(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        return database
+
+    def test_delete_tracks__whole_and_partial_albums__only_orphans_removed(
+        self, tmp_path: Path
+    ):
+        database = self._database(tmp_path)
+        gone = [album_track(tmp_path / f"g{i}.mp3", f"gone{i}", "Gone", artist="a") for i in range(3)]
+        kept = [album_track(tmp_path / f"k{i}.mp3", f"kept{i}", "Kept", artist="a") for i in range(2)]
+        lonely = album_track(tmp_path / "l.mp3", "lonely", "Lonely", artist="b")
+        assert all(database.add_tracks(gone + kept + [lonely]))
+
+        deleted = database.delete_tracks(
+            [track.uuid_id for track in gone] + [kept[0].uuid_id, lonely.uuid_id, "missing"]
+        )
+
+        assert deleted == 5
+        assert [track.uuid_id for track in database.get_tracks()] == [kept[1].uuid_id]
+        assert [artist.name for artist in database.get_artists()] == ["a"]
+        assert [album.name for album in database.get_albums()] == ["Kept"]
+        results = database.get_search_results("gone lonely")
+        assert (results.tracks, results.artists, results.albums) == ([], [], [])
+        assert len(database.get_search_results("kept").albums) == 1
+
+    def test_delete_tracks__more_tracks__same_statement_count(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        tracks = [
+            album_track(tmp_path / f"{i}.mp3", f"s{i}", f"album{i % 5}", artist=f"a{i % 3}")
+            for i in range(100)
+        ]
+        assert all(database.add_tracks(tracks))
+        statement_counts = []
+
+        for batch in (tracks[:10], tracks[10:]):
+            statements = []
+            with database.pool.writer() as conn:
+                conn.set_trace_callback(statements.append)
+            try:
+                assert database.delete_tracks([track.uuid_id for track in batch]) == len(batch)
+            finally:
+                with database.pool.writer() as conn:
+                    conn.set_trace_callback(None)
+            # executemany traces one statement per FTS 'delete' and aggregate
+            # row; FTS5 traces its own shadow table statements as comments.
+            statement_counts.append(
+                sum(
+                    not sql.startswith(("--", "INSERT INTO fts_", "UPDATE"))
+                    for sql in statements
+                )
+            )
+
+        # 10 and 90 tracks, the second with every album and artist orphaned.
+        assert statement_counts[0] <= statement_counts[1] <= 10
+        assert database.get_artists() == []
+
+    def test_delete_tracks__empty__nothing_deleted(self, tmp_path: Path):
+        database = self._database(tmp_path)
+
+        assert database.delete_tracks([]) == 0
+
+
+class TestAggregates:
+    def _database(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        return database
+
+    def _tracks(self, tmp_path: Path) -> List[Track]:
+        tracks = []
+        for i, (album, year, duration, art) in enumerate(
+            [("A", 2001, 10.0, False), ("A", 2003, 20.0, True), ("B", 1999, 5.0, False)]
+        ):
+            track = album_track(tmp_path / f"{i}.mp3", f"s{i}", album, year)
+            track.metadata.duration = duration
+            track.metadata.has_album_art = art
+            tracks.append(track)
+        return tracks
+
+    def test_add_tracks__batch_and_single__aggregates_counted(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        tracks = self._tracks(tmp_path)
+
+        assert all(database.add_tracks(tracks[:2]))
+        assert database.add_track(tracks[2])
+
+        [artist] = database.get_artists()
+        assert (artist.track_count, artist.total_duration, artist.max_year) == (3, 35.0, 2003)
+        albums = {album.name: album for album in database.get_albums()}
+        assert (albums["A"].track_count, albums["A"].total_duration) == (2, 30.0)
+        assert albums["A"].has_album_art
+        assert (albums["B"].track_count, albums["B"].has_album_art) == (1, False)
+        assert database.get_search_results("A").albums[0].track_count == 2
+
+    def test_delete_tracks__fractional_durations__total_duration_exact(
+        self, tmp_path: Path
+    ):
+        database = self._database(tmp_path)
+        tracks = []
+        for i, duration in enumerate([0.1, 0.2, 0.3]):
+            track = album_track(tmp_path / f"{i}.mp3", f"s{i}", "A", 2001)
+            track.metadata.duration = duration
+            tracks.append(track)
+        assert all(database.add_tracks(tracks))
+
+        assert database.delete_tracks([tracks[0].uuid_id]) == 1
+        assert database.delete_tracks([tracks[1].uuid_id]) == 1
+
+        [artist] = database.get_artists()
+        assert (artist.track_count, artist.total_duration) == (1, 0.3)
+        [album] = database.get_albums()
+        assert (album.track_count, album.total_duration) == (1, 0.3)
+
+    def test_delete_tracks__art_and_max_year_track__recomputed(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        tracks = self._tracks(tmp_path)
+        assert all(database.add_tracks(tracks))
+
+        assert database.delete_tracks([tracks[1].uuid_id]) == 1
+
+        [artist] = database.get_artists()
+        assert (artist.track_count, artist.total_duration, artist.max_year) == (2, 15.0, 2001)
+        albums = {album.name: album for album in database.get_albums()}
+        assert (albums["A"].track_count, albums["A"].total_duration) == (1, 10.0)
+        assert not albums["A"].has_album_art
+
+    def test_initialize__database_without_aggregates__backfilled(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        assert all(database.add_tracks(self._tracks(tmp_path)))
+        database.close()
+        conn = sqlite3.connect(tmp_path / "database.db")
+        for table, column in [
+            ("artists", "track_count"),
+            ("artists", "total_duration"),
+            ("artists", "max_year"),
+            ("albums", "track_count"),
+            ("albums", "total_duration"),
+            ("albums", "has_album_art"),
+        ]:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        conn.commit()
+        conn.close()
+
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+
+        [artist] = database.get_artists()
+        assert (artist.track_count, artist.total_duration, artist.max_year) == (3, 35.0, 2003)
+        albums = {album.name: album for album in database.get_albums()}
+        assert (albums["A"].track_count, albums["A"].has_album_art) == (2, True)
+
+
 class TestDatabaseGetTracks:
     def test_get_tracks__db_not_initialized__returns_empty_list(self, tmp_path: Path):
         database_path = tmp_path / "database.db"
@@ -1042,6 +1734,72 @@ class TestGetTracksCount:
         assert returned_count == expected_count
 
 
+class TestGetPages:
+    def test_get_tracks_page__more_rows__has_more(self, tmp_path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        for i in range(5):
+            assert database.add_track(create_track(tmp_path / f"{i}.mp3", f"s{i}", "a"))
+
+        page = database.get_tracks_page(limit=3)
+        assert page is not None
+        assert len(page.items) == 3
+        assert page.has_more
+
+        page = database.get_tracks_page(limit=3, offset=3)
+        assert page is not None
+        assert len(page.items) == 2
+        assert not page.has_more
+
+    def test_get_tracks_page__exact_fit__no_more(self, tmp_path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        for i in range(3):
+            assert database.add_track(create_track(tmp_path / f"{i}.mp3", f"s{i}", "a"))
+
+        page = database.get_tracks_page(limit=3)
+        assert page is not None
+        assert len(page.items) == 3
+        assert not page.has_more
+
+    def test_get_artists_and_albums_page__has_more(self, tmp_path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        for i in range(3):
+            assert database.add_track(create_track(tmp_path / f"{i}.mp3", f"s{i}", f"a{i}"))
+
+        artists_page = database.get_artists_page(limit=2)
+        assert artists_page is not None
+        assert len(artists_page.items) == 2
+        assert artists_page.has_more
+
+        albums_page = database.get_albums_page(limit=3)
+        assert albums_page is not None
+        assert len(albums_page.items) == 3
+        assert not albums_page.has_more
+
+    def test_get_totals__cached_until_next_write(self, tmp_path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        assert database.add_track(create_track(tmp_path / "0.mp3", "s0", "a0"))
+
+        assert database.get_tracks_total() == 1
+        assert database.get_artists_total() == 1
+        assert database.get_albums_total() == 1
+
+        with patch.object(database, "get_tracks_count") as get_tracks_count:
+            assert database.get_tracks_total() == 1
+            get_tracks_count.assert_not_called()
+
+        assert database.add_track(create_track(tmp_path / "1.mp3", "s1", "a1"))
+
+        assert database.get_tracks_total() == 2
+        assert database.get_artists_total() == 2
+        assert database.get_albums_total() == 2
+        artist_id = get_artist_id(database, "a1")
+        assert database.get_albums_total(artist_id=artist_id) == 1
+
+
 class TestGetArtists:
     def test_get_artists__empty_db__returns_empty(self, tmp_path):
         database = set_up_database(database_path=tmp_path / "database.db")
@@ -2598,3 +3356,258 @@ class TestPrepareFtsQuery:
 
     def test_prepare_fts_query__double_quotes__escapes_correctly(self):
         assert prepare_fts_query('say "hi"') == '"say"* """hi"""*'
+
+
+class TestKeysetPredicate:
+    def test_keyset_predicate__ascending_non_null_values__uses_row_value(self):
+        keys = [
+            KeysetColumn(col_ref='tm."artist"', value="a"),
+            KeysetColumn(col_ref='tm."uuid_id"', value="u", nullable=False),
+        ]
+
+        clause, values = keyset_predicate(keys)
+
+        assert clause == '(tm."artist", tm."uuid_id") > (?, ?)'
+        assert values == ["a", "u"]
+
+    def test_keyset_predicate__null_cursor_value__falls_back_to_or_expansion(self):
+        keys = [
+            KeysetColumn(col_ref='tm."artist"', value=None),
+            KeysetColumn(col_ref='tm."uuid_id"', value="u", nullable=False),
+        ]
+
+        clause, values = keyset_predicate(keys)
+
+        assert clause == 'tm."artist" IS NOT NULL OR (tm."artist" IS NULL AND tm."uuid_id" > ?)'
+        assert values == ["u"]
+
+    def test_keyset_predicate__nullable_descending__falls_back_to_or_expansion(self):
+        keys = [
+            KeysetColumn(col_ref='a."year"', value="2000", isAscending=False),
+            KeysetColumn(col_ref='a."id"', value="1", isAscending=False, nullable=False),
+        ]
+
+        clause, _ = keyset_predicate(keys)
+
+        assert " OR " in clause
+        assert not clause.startswith("(a.")
+
+    def test_keyset_predicate__non_nullable_first_key__adds_seek_bound(self):
+        keys = [
+            KeysetColumn(col_ref='ar."name"', value="b", nullable=False, collate=" COLLATE NOCASE"),
+            KeysetColumn(col_ref='a."year"', value="2000", isAscending=False, nullsLast=True),
+        ]
+
+        clause, values = keyset_predicate(keys)
+
+        assert clause.startswith('ar."name" COLLATE NOCASE >= ? AND (')
+        assert values[0] == "b"
+
+
+ORDERING_INDEXES = [
+    "idx_artists_name_nocase",
+    "idx_albums_artist_order",
+    "idx_tm_default_order",
+    "idx_tm_album_order",
+]
+
+
+class TestPaginationQueryPlans:
+    """Deep pages of the default orderings in main.py must not sort in a temp B-tree."""
+
+    def _plans(self, database, database_path, fetch):
+        statements: List[str] = []
+        database.pool.reader().set_trace_callback(statements.append)
+        fetch()
+        database.pool.reader().set_trace_callback(None)
+
+        conn = sqlite3.connect(database_path)
+        plans = [
+            " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement))
+            for statement in statements
+        ]
+        conn.close()
+        return plans
+
+    def _seed(self, tmp_path, upgraded=False):
+        """Seed a library. upgraded: from a database made before the ordering
+        indexes existed, reopened so initialize() adds them."""
+        database_path = tmp_path / "database.db"
+        database = set_up_database(database_path)
+        assert database.initialize()
+        tracks = []
+        for i in range(60):
+            track = create_track(tmp_path / f"{i}.mp3", f"song_{i}", f"artist_{i // 20}")
+            track.metadata.album = f"album_{i // 5}" if i % 7 else None
+            track.metadata.year = 2000 + i % 3
+            track.metadata.disc_number = 1
+            track.metadata.track_number = i % 5
+            tracks.append(track)
+        assert all(database.add_tracks(tracks))
+        if upgraded:
+            database.close()
+            conn = sqlite3.connect(database_path)
+            for index in ORDERING_INDEXES:
+                conn.execute(f"DROP INDEX {index}")
+            conn.commit()
+            conn.close()
+            database = set_up_database(database_path)
+            assert database.initialize()
+        return database, database_path
+
+    def test_tracks_default_order__keyset_pages__match_full_ordering(self, tmp_path):
+        database, _ = self._seed(tmp_path)
+        # Some rows with NULL sort keys force the OR fallback mid-walk.
+        for i in range(3):
+            track = create_track(tmp_path / f"n{i}.mp3", f"null_{i}", "artist_1")
+            assert database.add_track(track)
+
+        columns = ["artist", "album", "disc_number", "track_number", "uuid_id"]
+        order_parameters = [OrderParameter(column=c) for c in columns]
+        expected = [
+            t.uuid_id
+            for t in database.get_tracks(order_parameters=order_parameters, limit=1000)
+        ]
+
+        walked: List[str] = []
+        row_filter_parameters: List[RowFilterParameter] = []
+        while True:
+            page = database.get_tracks_page(
+                order_parameters=order_parameters,
+                row_filter_parameters=row_filter_parameters,
+                limit=4,
+            )
+            assert page is not None
+            walked.extend(t.uuid_id for t in page.items)
+            if not page.has_more:
+                break
+            last = page.items[-1]
+            values = [
+                last.metadata.artist,
+                last.metadata.album,
+                last.metadata.disc_number,
+                last.metadata.track_number,
+                last.uuid_id,
+            ]
+            row_filter_parameters = [
+                RowFilterParameter(column=c, value=str(v) if v is not None else None)
+                for c, v in zip(columns, values)
+            ]
+
+        assert walked == expected
+
+    @pytest.mark.parametrize("upgraded", [False, True])
+    def test_tracks_default_order__page_n__uses_index(self, tmp_path, upgraded):
+        database, database_path = self._seed(tmp_path, upgraded)
+        columns = ["artist", "album", "disc_number", "track_number", "uuid_id"]
+        order_parameters = [OrderParameter(column=c) for c in columns]
+        row_filter_parameters = [
+            RowFilterParameter(column=c, value=v)
+            for c, v in zip(columns, ["artist_1", "album_5", "1", "2", "x"])
+        ]
+
+        for artist_id, album_id in [(None, None), (1, 1)]:
+            plans = self._plans(
+                database,
+                database_path,
+                lambda: database.get_tracks_page(
+                    order_parameters=order_parameters,
+                    row_filter_parameters=row_filter_parameters,
+                    artist_id=artist_id,
+                    album_id=album_id,
+                    limit=5,
+                ),
+            )
+            assert len(plans) == 1
+            assert "TEMP B-TREE" not in plans[0]
+            assert "idx_tm_" in plans[0]
+
+    @pytest.mark.parametrize("upgraded", [False, True])
+    def test_albums_default_orders__page_n__no_temp_b_tree(self, tmp_path, upgraded):
+        database, database_path = self._seed(tmp_path, upgraded)
+        artist_order = [
+            AlbumOrderParameter(column="year", isAscending=False, nullsLast=True),
+            AlbumOrderParameter(column="is_single_grouping", isAscending=True),
+            AlbumOrderParameter(column="name", isAscending=True, nullsLast=True),
+        ]
+        library_order = [
+            AlbumOrderParameter(column="artist", isAscending=True, nullsLast=True)
+        ] + artist_order
+
+        plans = self._plans(
+            database,
+            database_path,
+            lambda: database.get_albums_page(
+                artist_id=1,
+                order_parameters=artist_order,
+                row_filter_parameters=[
+                    AlbumRowFilterParameter(column=o.column, value=v)
+                    for o, v in zip(artist_order, ["2001", "0", "album_1"])
+                ],
+                limit=2,
+            ),
+        )
+        plans += self._plans(
+            database,
+            database_path,
+            lambda: database.get_albums_page(
+                order_parameters=library_order,
+                row_filter_parameters=[
+                    AlbumRowFilterParameter(column=o.column, value=v)
+                    for o, v in zip(library_order, ["artist_1", "2001", "0", "album_5"])
+                ],
+                limit=2,
+            ),
+        )
+
+        assert len(plans) == 2
+        for plan in plans:
+            assert "TEMP B-TREE" not in plan
+            assert "idx_albums_artist_order" in plan
+
+    @pytest.mark.parametrize("upgraded", [False, True])
+    def test_artists_default_order__page_n__seeks_index(self, tmp_path, upgraded):
+        database, database_path = self._seed(tmp_path, upgraded)
+
+        plans = self._plans(
+            database,
+            database_path,
+            lambda: database.get_artists_page(
+                order_parameters=[ArtistOrderParameter(column="name")],
+                row_filter_parameters=[
+                    ArtistRowFilterParameter(column="name", value="artist_0")
+                ],
+                limit=1,
+            ),
+        )
+
+        assert len(plans) == 1
+        assert "TEMP B-TREE" not in plans[0]
+        # Not covering: the page's rows are read for their aggregate columns.
+        assert "SEARCH artists USING INDEX idx_artists_name_nocase" in plans[0]
+
+    def test_add_ordering_indexes__duplicate_nocase_artist_names__index_not_unique(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.executescript(
+            """
+            CREATE TABLE artists (id INTEGER PRIMARY KEY, name TEXT);
+            CREATE TABLE albums (
+                id INTEGER PRIMARY KEY, name TEXT, artist_id INTEGER,
+                "year" INTEGER, is_single_grouping INTEGER
+            );
+            CREATE TABLE trackmetadata (
+                artist TEXT, album TEXT, artist_id INTEGER, album_id INTEGER,
+                disc_number INTEGER, track_number INTEGER, uuid_id TEXT
+            );
+            INSERT INTO artists (name) VALUES ('Artist'), ('ARTIST');
+            """
+        )
+
+        _add_ordering_indexes(conn)
+
+        sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'idx_artists_name_nocase'"
+        ).fetchone()[0]
+        conn.close()
+        assert sql.startswith("CREATE INDEX")
@@ -0,0 +1,118 @@
+import threading
+from pathlib import Path
+
+from app.services.dedup import (
+    PARTIAL_HASH_BYTES,
+    DedupContext,
+    Deduplicator,
+    full_digest,
+    prefilter_key,
+    split_file_hash,
+)
+from tests.test_database import create_track, set_up_database
+
+
+def write_file(path: Path, middle: bytes = b"m") -> Path:
+    """A file larger than both prefilter windows, differing only in the middle."""
+    path.write_bytes(b"h" * PARTIAL_HASH_BYTES + middle + b"t" * PARTIAL_HASH_BYTES)
+    return path
+
+
+def make_deduplicator(tmp_path: Path):
+    database = set_up_database(tmp_path / "database.db")
+    assert database.initialize()
+    deduplicator = Deduplicator(
+        DedupContext(
+            find_hash_candidates=database.find_hash_candidates,
+            set_file_hash=database.set_file_hash,
+        )
+    )
+    return database, deduplicator
+
+
+def add_library_file(database, path: Path, file_hash: str):
+    track = create_track(path, path.stem, "artist")
+    track.file_hash = file_hash
+    assert database.add_track(track)
+    return track
+
+
+class TestPrefilterKey:
+    def test_prefilter_key__same_content__same_key(self, tmp_path: Path):
+        assert prefilter_key(write_file(tmp_path / "a.mp3")) == prefilter_key(
+            write_file(tmp_path / "b.mp3")
+        )
+
+    def test_prefilter_key__middle_differs__same_key(self, tmp_path: Path):
+        first = write_file(tmp_path / "a.mp3", middle=b"1")
+        second = write_file(tmp_path / "b.mp3", middle=b"2")
+
+        assert prefilter_key(first) == prefilter_key(second)
+        assert full_digest(first) != full_digest(second)
+
+    def test_prefilter_key__head_differs__different_key(self, tmp_path: Path):
+        first = tmp_path / "a.mp3"
+        first.write_bytes(b"a" + b"x" * 10)
+        second = tmp_path / "b.mp3"
+        second.write_bytes(b"b" + b"x" * 10)
+
+        assert prefilter_key(first) != prefilter_key(second)
+        assert prefilter_key(first).startswith("b2:11:")
+
+    def test_split_file_hash__both_forms__split(self):
+        assert split_file_hash("b2:1:aa") == ("b2:1:aa", None)
+        assert split_file_hash("b2:1:aa:ff") == ("b2:1:aa", "ff")
+
+
+class TestDeduplicator:
+    def test_file_hash_for__new_key__prefilter_only(self, tmp_path: Path):
+        _, deduplicator = make_deduplicator(tmp_path)
+        path = write_file(tmp_path / "a.mp3")
+
+        assert deduplicator.file_hash_for(path) == prefilter_key(path)
+        assert deduplicator.stats().full_hashes == 0
+
+    def test_file_hash_for__identical_library_file__duplicate(self, tmp_path: Path):
+        database, deduplicator = make_deduplicator(tmp_path)
+        library_file = write_file(tmp_path / "library.mp3")
+        key = prefilter_key(library_file)
+        track = add_library_file(database, library_file, key)
+
+        assert deduplicator.file_hash_for(write_file(tmp_path / "import.mp3")) is None
+
+        stats = deduplicator.stats()
+        assert stats.duplicates == 1
+        assert stats.full_hashes == 2
+        # The library file's full digest is stored, so it is not read again.
+        [candidate] = database.find_hash_candidates(key)
+        assert candidate.uuid_id == track.uuid_id
+        assert candidate.file_hash == f"{key}:{full_digest(library_file)}"
+
+    def test_file_hash_for__prefilter_collision__full_digest_kept(self, tmp_path: Path):
+        database, deduplicator = make_deduplicator(tmp_path)
+        library_file = write_file(tmp_path / "library.mp3", middle=b"1")
+        key = prefilter_key(library_file)
+        add_library_file(database, library_file, f"{key}:{full_digest(library_file)}")
+        path = write_file(tmp_path / "import.mp3", middle=b"2")
+
+        assert deduplicator.file_hash_for(path) == f"{key}:{full_digest(path)}"
+        # Only the new file needed hashing; the library digest was stored.
+        assert deduplicator.stats().full_hashes == 1
+
+    def test_file_hash_for__same_key_in_flight__waits_for_release(self, tmp_path: Path):
+        _, deduplicator = make_deduplicator(tmp_path)
+        first = deduplicator.file_hash_for(write_file(tmp_path / "a.mp3"))
+        results = []
+        waiter = threading.Thread(
+            target=lambda: results.append(
+                deduplicator.file_hash_for(write_file(tmp_path / "b.mp3"))
+            )
+        )
+        waiter.start()
+
+        waiter.join(timeout=0.2)
+        assert waiter.is_alive()
+
+        deduplicator.release(first)
+        waiter.join(timeout=5)
+        assert results == [first]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -199,7 +200,7 @@ class TestOnCreated:
             watcher.on_created(event)
 
         submit.assert_not_called()
-        assert watcher.processed == set()
+        assert len(watcher.processed) == 0
 
     def test_on_created__already_processed_path__ignored(self, tmp_path: Path):
         watcher = FileWatcher(tmp_path, lambda path: True)
@@ -214,7 +215,7 @@ class TestOnCreated:
             watcher.on_created(event)
 
         submit.assert_not_called()
-        assert watcher.processed == {already}
+        assert len(watcher.processed) == 1
 
     def test_on_created__new_file__scheduled_and_marked_processed(self, tmp_path: Path):
         watcher = FileWatcher(tmp_path, lambda path: True)
@@ -230,4 +231,156 @@ class TestOnCreated:
         assert expected_path in watcher.processed
         submit.assert_called_once()
         assert submit.call_args[0][0] == watcher.process_file_after_stable
-        assert submit.call_args[0][1] == expected_path
\ No newline at end of file
+        assert submit.call_args[0][1] == expected_path
+    def test_on_created__wait_for_stable_disabled__hands_path_to_callback(self, tmp_path: Path):
+        on_file = MagicMock()
+        watcher = FileWatcher(tmp_path, on_file, wait_for_stable=False)
+
+        event = MagicMock()
+        event.is_directory = False
+        event.src_path = "/some/new_file.mp3"
+
+        watcher.on_created(event)
+
+        assert watcher.executor is None
+        on_file.assert_called_once_with(Path("/some/new_file.mp3"))
+
+
+def file_event(src_path: str, dest_path: str | None = None, is_directory: bool = False):
+    event = MagicMock()
+    event.is_directory = is_directory
+    event.src_path = src_path
+    event.dest_path = dest_path
+    return event
+
+
+class TestQuietTimer:
+    def test_touch__quiet_period_passes__released_in_one_batch(self):
+        batches = []
+        timer = file_watcher.QuietTimer(0.05, batches.append, tick_seconds=0.01)
+        timer.start()
+        try:
+            for index in range(3):
+                timer.touch(Path(f"/import/{index}.mp3"))
+            time.sleep(0.3)
+        finally:
+            timer.stop()
+
+        assert len(batches) == 1
+        assert sorted(batches[0]) == [Path(f"/import/{index}.mp3") for index in range(3)]
+        assert timer.pending() == 0
+
+    def test_touch__touched_again__deadline_pushed_back(self):
+        batches = []
+        timer = file_watcher.QuietTimer(0.3, batches.append, tick_seconds=0.01)
+        timer.start()
+        try:
+            timer.touch(Path("/import/a.mp3"))
+            time.sleep(0.15)
+            timer.touch(Path("/import/a.mp3"))
+            time.sleep(0.15)
+            assert batches == []
+            time.sleep(0.4)
+        finally:
+            timer.stop()
+
+        assert batches == [[Path("/import/a.mp3")]]
+
+    def test_forget__pending_path__never_released(self):
+        batches = []
+        timer = file_watcher.QuietTimer(0.05, batches.append, tick_seconds=0.01)
+        timer.start()
+        try:
+            timer.touch(Path("/import/a.mp3"))
+            timer.forget(Path("/import/a.mp3"))
+            time.sleep(0.15)
+        finally:
+            timer.stop()
+
+        assert batches == []
+
+
+class TestQuietFileWatcher:
+    def test_events__coalesced__on_file_called_once(self, tmp_path: Path):
+        on_file = MagicMock()
+        watcher = FileWatcher(tmp_path, on_file, quiet_seconds=0.05)
+        watcher.quiet_timer.tick_seconds = 0.01
+        watcher.quiet_timer.start()
+        try:
+            watcher.on_created(file_event("/import/a.mp3"))
+            for _ in range(5):
+                watcher.on_modified(file_event("/import/a.mp3"))
+            watcher.on_closed(file_event("/import/a.mp3"))
+            time.sleep(0.2)
+        finally:
+            watcher.quiet_timer.stop()
+
+        assert watcher.executor is None
+        on_file.assert_called_once_with(Path("/import/a.mp3"))
+
+    def test_on_moved__temporary_name__destination_handed_over(self, tmp_path: Path):
+        on_file = MagicMock()
+        watcher = FileWatcher(tmp_path, on_file, quiet_seconds=0.05)
+        watcher.quiet_timer.tick_seconds = 0.01
+        watcher.quiet_timer.start()
+        try:
+            watcher.on_created(file_event("/import/.a.mp3.tmp"))
+            watcher.on_moved(file_event("/import/.a.mp3.tmp", "/import/a.mp3"))
+            time.sleep(0.2)
+        finally:
+            watcher.quiet_timer.stop()
+
+        on_file.assert_called_once_with(Path("/import/a.mp3"))
+
+    def test_handle_quiet_files__already_processed__skipped(self, tmp_path: Path):
+        on_file = MagicMock()
+        watcher = FileWatcher(tmp_path, on_file, quiet_seconds=1)
+        watcher.processed.add(Path("/import/a.mp3"))
+
+        watcher.handle_quiet_files([Path("/import/a.mp3"), Path("/import/b.mp3")])
+
+        on_file.assert_called_once_with(Path("/import/b.mp3"))
+
+
+class TestProcessedPaths:
+    def test_add__same_file_twice__second_rejected(self, tmp_path: Path):
+        path = tmp_path / "a.mp3"
+        path.write_bytes(b"x")
+        processed = file_watcher.ProcessedPaths()
+
+        assert processed.add(path) is True
+        assert processed.add(path) is False
+        assert path in processed
+
+    def test_add__name_reused_by_new_file__accepted(self, tmp_path: Path):
+        path = tmp_path / "a.mp3"
+        path.write_bytes(b"old")
+        processed = file_watcher.ProcessedPaths()
+        assert processed.add(path)
+
+        path.unlink()
+        path.write_bytes(b"new")
+        os.utime(path, ns=(0, 123))
+
+        assert path not in processed
+        assert processed.add(path) is True
+
+    def test_add__over_max_size__oldest_evicted(self, tmp_path: Path):
+        processed = file_watcher.ProcessedPaths(max_size=2)
+        for index in range(3):
+            processed.add(tmp_path / f"{index}.mp3")
+
+        assert len(processed) == 2
+        assert tmp_path / "0.mp3" not in processed
+        assert processed.stats().evicted == 1
+
+    def test_add__ttl_passed__entry_expired(self, tmp_path: Path):
+        processed = file_watcher.ProcessedPaths(ttl_seconds=60)
+        with patch("app.services.file_watcher.time.monotonic", return_value=1000.0):
+            processed.add(tmp_path / "a.mp3")
+        with patch("app.services.file_watcher.time.monotonic", return_value=1061.0):
+            stats = processed.stats()
+            assert processed.add(tmp_path / "a.mp3") is True
+
+        assert stats.size == 0
+        assert stats.evicted == 1
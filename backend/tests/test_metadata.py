@@ -8,6 +8,7 @@ from unittest.mock import patch
 import pytest
 
 import app.services.metadata as metadata
+from tests.test_tag_reader import wave
 
 
 class TestGetTrackMetadata:
@@ -96,6 +97,47 @@ class TestGetTrackMetadata:
             assert track_metadata.has_album_art is True
 
 
+class TestProbeFile:
+    def test_probe_file__audio_stream__runs_ffprobe_once(self, tmp_path: Path):
+        ffprobe_response = {
+            "streams": [
+                {"codec_type": "audio", "codec_name": "mp3", "duration": "3.5"}
+            ],
+            "format": {"tags": {"title": "Song"}},
+        }
+        with patch(
+            "app.services.metadata.ffprobe_for_metadata", return_value=ffprobe_response
+        ) as ffprobe:
+            probed_file = metadata.probe_file(tmp_path / "song.mp3")
+
+        ffprobe.assert_called_once_with(tmp_path / "song.mp3")
+        assert probed_file is not None
+        assert probed_file.file_path == tmp_path / "song.mp3"
+        assert probed_file.metadata.title == "Song"
+        assert probed_file.metadata.duration == 3.5
+
+    def test_probe_file__no_audio_stream__returns_none(self, tmp_path: Path):
+        with patch(
+            "app.services.metadata.ffprobe_for_metadata",
+            return_value={"streams": [{"codec_type": "video"}], "format": {}},
+        ):
+            assert metadata.probe_file(tmp_path / "video.mp4") is None
+
+
+class TestProbeRecords:
+    def test_probe_records__real_files__round_trip_to_probed_files(self, tmp_path: Path):
+        path = tmp_path / "song.wav"
+        path.write_bytes(wave(info={b"INAM": "Title"}))
+
+        records = metadata.probe_records([str(path), str(tmp_path / "missing.wav")])
+
+        assert records[1] is None
+        probed_file = metadata.probed_file_from_record(records[0])
+        assert probed_file.file_path == path
+        assert probed_file.metadata == metadata.get_track_metadata(path)
+        assert probed_file.metadata.title == "Title"
+
+
 class TestFfprobeForMetadata:
     def test_ffprobe_for_metadata__ffprobe_missing__returns_none(self):
         with patch(
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import errno
+import os
 from operator import add
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 import app.services.organizer as organizer
 from app.models.track_meta_data import TrackMetaData
+from app.services.metadata import ProbedFile
 
 class TestMoveFile:
     def test_move_file__source_does_not_exist__does_not_move_file(self, tmp_path: Path):
@@ -34,6 +37,25 @@ class TestMoveFile:
         assert result is True
         assert destination_dir.is_dir()
         assert destination_path.is_file()
+
+    def test_move_file__different_filesystem__copies_then_removes_source(self, tmp_path: Path):
+        file_path = tmp_path / "file.mp3"
+        file_path.write_bytes(b"fake")
+        destination_path = tmp_path / "music" / "file.mp3"
+
+        real_link = os.link
+
+        def cross_device_link(source, destination):
+            if Path(source) == file_path:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_link(source, destination)
+
+        with patch("app.services.placement.os.link", cross_device_link):
+            result = organizer.move_file(file_path, destination_path)
+
+        assert result is True
+        assert destination_path.read_bytes() == b"fake"
+        assert not file_path.exists()
     
 class TestOrganizer:
     def _create_organizing_moving_organizer(self, music_dir: Path):
@@ -123,3 +145,100 @@ class TestOrganizer:
             assert Path(organized_dir).is_dir()
             organized_file_path = Path(organized_dir / "file.mp3")
             assert organized_file_path.is_file()
+
+    def test_organize_probed_file__probed_metadata__does_not_probe_again(self, tmp_path: Path):
+        music_dir = Path(tmp_path / "music")
+        added = []
+        ctx = organizer.OrganizerContext(
+            music_library_dir=music_dir,
+            should_organize_files=True,
+            should_copy_files=False,
+            add_to_database=lambda track: added.append(track) or True,
+        )
+        organize = organizer.Organizer(ctx)
+
+        file_path = tmp_path / "file.mp3"
+        file_path.write_bytes(b"data")
+        probed_file = ProbedFile(
+            file_path=file_path,
+            metadata=TrackMetaData(duration=1.0, artist="artist", album="album"),
+        )
+
+        with patch("app.services.organizer.get_track_metadata") as get_track_metadata:
+            result = organize.organize_probed_file(probed_file)
+
+            get_track_metadata.assert_not_called()
+
+        assert result is True
+        assert (music_dir / "artist" / "album" / "file.mp3").is_file()
+        assert added[0].metadata == probed_file.metadata
+
+    def test_place_probed_file__moves_file__returns_track_without_database_write(self, tmp_path: Path):
+        music_dir = Path(tmp_path / "music")
+        add_to_database = MagicMock()
+        ctx = organizer.OrganizerContext(
+            music_library_dir=music_dir,
+            should_organize_files=True,
+            should_copy_files=False,
+            add_to_database=add_to_database,
+        )
+        organize = organizer.Organizer(ctx)
+
+        file_path = tmp_path / "file.mp3"
+        file_path.write_bytes(b"data")
+        probed_file = ProbedFile(
+            file_path=file_path, metadata=TrackMetaData(duration=1.0, artist="artist")
+        )
+
+        track = organize.place_probed_file(probed_file)
+
+        add_to_database.assert_not_called()
+        assert track.file_path == music_dir / "artist" / "file.mp3"
+        assert track.file_path.is_file()
+
+    def test_place_probed_file__already_at_destination__left_in_place(self, tmp_path: Path):
+        music_dir = Path(tmp_path / "music")
+        ctx = organizer.OrganizerContext(
+            music_library_dir=music_dir,
+            should_organize_files=True,
+            should_copy_files=False,
+            add_to_database=MagicMock(),
+        )
+        organize = organizer.Organizer(ctx)
+
+        file_path = music_dir / "artist" / "file.mp3"
+        file_path.parent.mkdir(parents=True)
+        file_path.write_bytes(b"data")
+        probed_file = ProbedFile(
+            file_path=file_path, metadata=TrackMetaData(duration=1.0, artist="artist")
+        )
+
+        assert organize.destination_for(probed_file) == file_path
+        track = organize.place_probed_file(probed_file)
+
+        assert track.file_path == file_path
+        assert file_path.is_file()
+
+    def test_place_probed_file__copy_mode__keeps_source(self, tmp_path: Path):
+        music_dir = Path(tmp_path / "music")
+        ctx = organizer.OrganizerContext(
+            music_library_dir=music_dir,
+            should_organize_files=True,
+            should_copy_files=True,
+            add_to_database=MagicMock(),
+        )
+        organize = organizer.Organizer(ctx)
+
+        file_path = tmp_path / "file.mp3"
+        file_path.write_bytes(b"data")
+        probed_file = ProbedFile(
+            file_path=file_path, metadata=TrackMetaData(duration=1.0, artist="artist")
+        )
+
+        track = organize.place_probed_file(probed_file)
+        organize.sync_placements()
+
+        assert track.file_path == music_dir / "artist" / "file.mp3"
+        assert track.file_path.read_bytes() == b"data"
+        assert file_path.is_file()
+        assert organize.placement_stats().renamed == 0
@@ -0,0 +1,588 @@
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import zipfile
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from tests.test_database import create_track, set_up_database
+
+from app.database import HashCandidate
+from app.models.track import Track
+from app.services.dedup import DedupContext, Deduplicator
+from app.models.track_meta_data import TrackMetaData
+from app.services.metadata import ProbedFile, ProbeRecord
+from app.services.pipeline import IngestionPipeline, IngestJobsContext, PipelineContext
+from app.services.placement import FilePlacer
+
+
+def probed(path: Path) -> ProbedFile:
+    return ProbedFile(file_path=path, metadata=TrackMetaData(duration=1.0))
+
+
+def place(probed_file: ProbedFile) -> Track:
+    return Track(
+        file_path=probed_file.file_path,
+        metadata=probed_file.metadata,
+        file_hash=probed_file.file_hash,
+    )
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.batches: List[List[Track]] = []
+
+    def write(self, tracks: List[Track]) -> List[bool]:
+        with self.lock:
+            self.batches.append(list(tracks))
+        return [True] * len(tracks)
+
+    @property
+    def paths(self) -> set:
+        return {track.file_path.name for batch in self.batches for track in batch}
+
+
+def make_pipeline(tmp_path: Path, recorder: Recorder, **overrides) -> IngestionPipeline:
+    values = dict(
+        workspace_dir=tmp_path / "workspace",
+        wait_until_ready=lambda path: True,
+        probe_function=probed,
+        place_function=place,
+        write_function=recorder.write,
+        write_batch_wait=0.05,
+    )
+    values.update(overrides)
+    return IngestionPipeline(PipelineContext(**values))
+
+
+def stage_stats(pipeline: IngestionPipeline) -> dict:
+    return {stats.name: stats for stats in pipeline.stats()}
+
+
+class TestPipelineContext:
+    def test_pipeline_context__zero_workers__raises_value_error(self, tmp_path: Path):
+        with pytest.raises(ValueError):
+            make_pipeline(tmp_path, Recorder(), probe_workers=0)
+
+
+class TestIngestionPipeline:
+    def test_submit__music_files__written_in_batches(self, tmp_path: Path):
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder, write_batch_size=10, write_batch_wait=1)
+        pipeline.start()
+        try:
+            for index in range(25):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert recorder.paths == {f"{index}.mp3" for index in range(25)}
+        assert len(recorder.batches) < 25
+        assert max(len(batch) for batch in recorder.batches) <= 10
+        assert stage_stats(pipeline)["write"].processed == 25
+
+    def test_submit__sync_function__called_before_tracks_are_written(self, tmp_path: Path):
+        recorder = Recorder()
+        synced_before_write = []
+        syncs = []
+
+        def write(tracks: List[Track]) -> List[bool]:
+            synced_before_write.append(bool(syncs))
+            return recorder.write(tracks)
+
+        pipeline = make_pipeline(
+            tmp_path, recorder, write_function=write, sync_function=lambda: syncs.append(1)
+        )
+        pipeline.start()
+        try:
+            for index in range(5):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert recorder.paths == {f"{index}.mp3" for index in range(5)}
+        assert 1 <= len(syncs) <= 5
+        assert all(synced_before_write)
+
+    def test_submit__remove_sources_function__called_after_moved_recorded(
+        self, tmp_path: Path
+    ):
+        recorder = Recorder()
+        events = []
+
+        def set_moved(moved) -> bool:
+            events.extend(("moved", source) for source, _ in moved)
+            return True
+
+        jobs = IngestJobsContext(
+            add_jobs=lambda paths: True,
+            set_probed=lambda planned: True,
+            set_moved=set_moved,
+            set_indexed=lambda paths: True,
+            delete_jobs=lambda paths: True,
+            get_unfinished=lambda: [],
+            prune=lambda: 0,
+            get_track_file_paths=lambda: {},
+        )
+
+        pipeline = make_pipeline(
+            tmp_path,
+            recorder,
+            jobs=jobs,
+            remove_sources_function=lambda sources: events.extend(
+                ("removed", str(source)) for source in sources
+            ),
+        )
+        pipeline.start()
+        try:
+            for index in range(5):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        for index in range(5):
+            source = str(tmp_path / f"{index}.mp3")
+            assert events.index(("moved", source)) < events.index(("removed", source))
+
+    def test_submit__not_audio_or_archive__dropped_at_discover(self, tmp_path: Path):
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder)
+        pipeline.start()
+        try:
+            pipeline.submit(tmp_path / "cover.jpg")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        stats = stage_stats(pipeline)
+        assert stats["discover"].failed == 1
+        assert stats["stabilize"].processed == 0
+        assert recorder.batches == []
+
+    def test_submit__file_never_ready__dropped_at_stabilize(self, tmp_path: Path):
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder, wait_until_ready=lambda path: False)
+        pipeline.start()
+        try:
+            pipeline.submit(tmp_path / "song.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert stage_stats(pipeline)["stabilize"].failed == 1
+        assert recorder.batches == []
+
+    def test_submit__probe_fails_or_raises__counted_as_failed(self, tmp_path: Path):
+        def probe(path: Path):
+            if path.name == "raises.mp3":
+                raise RuntimeError("boom")
+            return None
+
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder, probe_function=probe)
+        pipeline.start()
+        try:
+            pipeline.submit(tmp_path / "none.mp3")
+            pipeline.submit(tmp_path / "raises.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        probe_stats = stage_stats(pipeline)["probe"]
+        assert probe_stats.processed == 2
+        assert probe_stats.failed == 2
+        assert recorder.batches == []
+
+    def test_submit__archive__members_fan_out_to_probe(self, tmp_path: Path):
+        archive_path = tmp_path / "album.zip"
+        with zipfile.ZipFile(archive_path, "w") as z:
+            for index in range(5):
+                z.writestr(f"disc/{index}.flac", b"audio")
+            z.writestr("disc/cover.jpg", b"image")
+
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder, probe_workers=3)
+        pipeline.start()
+        try:
+            pipeline.submit(archive_path)
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert recorder.paths == {f"{index}.flac" for index in range(5)}
+        assert stage_stats(pipeline)["probe"].processed == 5
+
+    def test_submit__probe_stage_blocked__queues_stay_bounded(self, tmp_path: Path):
+        release = threading.Event()
+
+        def slow_probe(path: Path):
+            release.wait(timeout=5)
+            return probed(path)
+
+        recorder = Recorder()
+        pipeline = make_pipeline(
+            tmp_path,
+            recorder,
+            probe_function=slow_probe,
+            probe_workers=1,
+            stabilize_workers=1,
+            queue_size=2,
+        )
+        pipeline.start()
+        submitted = []
+
+        def submit_all():
+            for index in range(20):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+                submitted.append(index)
+
+        submitter = threading.Thread(target=submit_all)
+        submitter.start()
+        try:
+            submitter.join(timeout=0.5)
+            # One item in each worker plus two in each queue on the way to probe.
+            assert submitter.is_alive()
+            assert len(submitted) < 20
+            for stats in pipeline.stats():
+                assert stats.queue_depth <= stats.queue_capacity
+        finally:
+            release.set()
+            submitter.join(timeout=5)
+            assert pipeline.join(timeout=5)
+            pipeline.stop()
+
+        assert len(recorder.paths) == 20
+
+    def test_stop__queued_work__finished_before_workers_exit(self, tmp_path: Path):
+        recorder = Recorder()
+        pipeline = make_pipeline(tmp_path, recorder, write_batch_wait=5)
+        pipeline.start()
+        for index in range(3):
+            pipeline.submit(tmp_path / f"{index}.mp3")
+        pipeline.stop()
+
+        assert len(recorder.paths) == 3
+        assert all(not stage.threads for stage in pipeline.stages)
+
+    def test_submit__identical_files__second_dropped_before_probe(self, tmp_path: Path):
+        written = {}
+
+        def write(tracks: List[Track]) -> List[bool]:
+            for track in tracks:
+                written[track.file_hash] = track
+            return [True] * len(tracks)
+
+        deduplicator = Deduplicator(
+            DedupContext(
+                find_hash_candidates=lambda key: [
+                    HashCandidate(track.uuid_id, track.file_path, file_hash)
+                    for file_hash, track in written.items()
+                    if file_hash.startswith(key)
+                ],
+                set_file_hash=lambda uuid_id, file_hash: True,
+            )
+        )
+        probed_paths = []
+
+        def probe(path: Path):
+            probed_paths.append(path.name)
+            return probed(path)
+
+        for name in ("a.mp3", "b.mp3"):
+            (tmp_path / name).write_bytes(b"same audio")
+        (tmp_path / "c.mp3").write_bytes(b"other audio")
+
+        pipeline = make_pipeline(
+            tmp_path,
+            Recorder(),
+            probe_function=probe,
+            write_function=write,
+            deduplicator=deduplicator,
+        )
+        pipeline.start()
+        try:
+            for name in ("a.mp3", "b.mp3", "c.mp3"):
+                pipeline.submit(tmp_path / name)
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert len(written) == 2
+        assert len(probed_paths) == 2
+        assert "c.mp3" in probed_paths
+        assert deduplicator.stats().duplicates == 1
+        assert stage_stats(pipeline)["hash"].failed == 0
+
+
+def probe_names_ending_in_mp3(file_paths: List[str]) -> List[ProbeRecord | None]:
+    """Chunk probe for the process pool tests; module level so it pickles."""
+    return [
+        ProbeRecord(path, *([None] * 9), "mp3", 1.0, 128.0, 44100, 2, False)
+        if path.endswith(".mp3")
+        else None
+        for path in file_paths
+    ]
+
+
+class TestIngestionPipelineProcessPool:
+    def test_submit__probe_processes__records_become_probed_files(self, tmp_path: Path):
+        recorder = Recorder()
+        pipeline = make_pipeline(
+            tmp_path,
+            recorder,
+            probe_processes=2,
+            probe_chunk_size=4,
+            probe_chunk_function=probe_names_ending_in_mp3,
+        )
+        pipeline.start()
+        try:
+            for index in range(10):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+            pipeline.submit(tmp_path / "broken.flac")
+            assert pipeline.join(timeout=30)
+        finally:
+            pipeline.stop()
+
+        assert recorder.paths == {f"{index}.mp3" for index in range(10)}
+        track = recorder.batches[0][0]
+        assert track.metadata == TrackMetaData(
+            codec="mp3", duration=1.0, bitrate_kbps=128.0, sample_rate_hz=44100, channels=2
+        )
+        probe_stats = stage_stats(pipeline)["probe"]
+        assert probe_stats.processed == 11
+        assert probe_stats.failed == 1
+        assert pipeline._probe_pool is None
+
+
+def jobs_context(database) -> IngestJobsContext:
+    return IngestJobsContext(
+        add_jobs=database.add_ingest_jobs,
+        set_probed=database.set_ingest_jobs_probed,
+        set_moved=database.set_ingest_jobs_moved,
+        set_indexed=database.set_ingest_jobs_indexed,
+        delete_jobs=database.delete_ingest_jobs,
+        get_unfinished=database.get_unfinished_ingest_jobs,
+        prune=database.prune_ingest_jobs,
+        get_track_file_paths=database.get_track_file_paths,
+    )
+
+
+def move_to_library(library_dir: Path):
+    def destination(probed_file: ProbedFile) -> Path:
+        return library_dir / probed_file.file_path.name
+
+    def place(probed_file: ProbedFile) -> Track | None:
+        destination_path = destination(probed_file)
+        if probed_file.file_path != destination_path:
+            probed_file.file_path.replace(destination_path)
+        return Track(
+            file_path=destination_path,
+            metadata=TrackMetaData(title=probed_file.file_path.stem, duration=1.0),
+        )
+
+    return destination, place
+
+
+class TestIngestionPipelineJobs:
+    def _pipeline(self, tmp_path: Path, database, **overrides) -> IngestionPipeline:
+        library_dir = tmp_path / "music"
+        library_dir.mkdir(exist_ok=True)
+        destination, place = move_to_library(library_dir)
+        values = dict(
+            jobs=jobs_context(database),
+            destination_function=destination,
+            place_function=place,
+            write_function=database.add_tracks,
+        )
+        values.update(overrides)
+        return make_pipeline(tmp_path, Recorder(), **values)
+
+    def _database(self, tmp_path: Path):
+        database = set_up_database(tmp_path / "database.db")
+        assert database.initialize()
+        return database
+
+    def test_submit__files_indexed__no_unfinished_jobs(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        for index in range(5):
+            (tmp_path / f"{index}.mp3").write_bytes(b"audio")
+        (tmp_path / "bad.mp3").write_bytes(b"audio")
+
+        def probe(path: Path):
+            return None if path.name == "bad.mp3" else probed(path)
+
+        pipeline = self._pipeline(tmp_path, database, probe_function=probe)
+        pipeline.start()
+        try:
+            for index in range(5):
+                pipeline.submit(tmp_path / f"{index}.mp3")
+            pipeline.submit(tmp_path / "bad.mp3")
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert database.get_unfinished_ingest_jobs() == []
+        assert database.prune_ingest_jobs() == 5
+        assert len(database.get_track_file_paths()) == 5
+
+    def test_resume__moved_but_not_written__probed_in_place_and_written(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        library_path = tmp_path / "music" / "song.mp3"
+        library_path.parent.mkdir()
+        library_path.write_bytes(b"audio")
+        source = str(tmp_path / "song.mp3")
+        assert database.set_ingest_jobs_probed([(source, str(library_path), None)])
+        assert database.set_ingest_jobs_moved([(source, str(library_path))])
+
+        pipeline = self._pipeline(tmp_path, database)
+        pipeline.start()
+        try:
+            assert pipeline.resume() == 1
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert list(database.get_track_file_paths()) == [str(library_path)]
+        assert database.get_unfinished_ingest_jobs() == []
+
+    def test_resume__moved_job_hash_claimed_by_other_file__claim_kept(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        deduplicator = Deduplicator(
+            DedupContext(
+                find_hash_candidates=lambda key: [],
+                set_file_hash=lambda uuid_id, file_hash: True,
+            )
+        )
+        other = tmp_path / "other.mp3"
+        other.write_bytes(b"audio")
+        file_hash = deduplicator.file_hash_for(other)
+        library_path = tmp_path / "music" / "song.mp3"
+        library_path.parent.mkdir()
+        library_path.write_bytes(b"audio")
+        source = str(tmp_path / "song.mp3")
+        assert database.set_ingest_jobs_probed([(source, str(library_path), file_hash)])
+        assert database.set_ingest_jobs_moved([(source, str(library_path))])
+
+        _, move = move_to_library(library_path.parent)
+
+        def place_with_hash(probed_file: ProbedFile) -> Track:
+            track = move(probed_file)
+            track.file_hash = probed_file.file_hash
+            return track
+
+        pipeline = self._pipeline(
+            tmp_path, database, deduplicator=deduplicator, place_function=place_with_hash
+        )
+        pipeline.start()
+        try:
+            assert pipeline.resume() == 1
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        copy = tmp_path / "copy.mp3"
+        copy.write_bytes(b"audio")
+        checked = threading.Event()
+        thread = threading.Thread(
+            target=lambda: (deduplicator.file_hash_for(copy), checked.set())
+        )
+        thread.start()
+        # other.mp3 still holds the claim, so the copy waits for it.
+        assert not checked.wait(0.2)
+        deduplicator.release(file_hash)
+        assert checked.wait(5)
+        thread.join()
+
+    @pytest.mark.parametrize("keep_sources", [True, False])
+    def test_resume__placed_but_moved_not_recorded__written(
+        self, tmp_path: Path, keep_sources: bool
+    ):
+        database = self._database(tmp_path)
+        source = tmp_path / "import" / "song.mp3"
+        source.parent.mkdir()
+        source.write_bytes(b"audio")
+        library_dir = tmp_path / "music"
+        library_dir.mkdir()
+        placer = FilePlacer(keep_sources=keep_sources)
+
+        def place_in_library(probed_file: ProbedFile) -> Track | None:
+            destination = library_dir / probed_file.file_path.name
+            if not placer.place(probed_file.file_path, destination):
+                return None
+            return Track(file_path=destination, metadata=probed_file.metadata)
+
+        # The previous run placed the file (a copy, or in move mode the link
+        # before the unlink), then stopped before recording it as moved.
+        if keep_sources:
+            shutil.copy2(source, library_dir / "song.mp3")
+        else:
+            os.link(source, library_dir / "song.mp3")
+        assert database.add_ingest_jobs([str(source)])
+        assert database.set_ingest_jobs_probed(
+            [(str(source), str(library_dir / "song.mp3"), None)]
+        )
+
+        pipeline = self._pipeline(
+            tmp_path,
+            database,
+            place_function=place_in_library,
+            sync_function=placer.sync,
+            remove_sources_function=placer.remove_sources,
+        )
+        pipeline.start()
+        try:
+            assert pipeline.resume() == 1
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert list(database.get_track_file_paths()) == [str(library_dir / "song.mp3")]
+        assert database.get_unfinished_ingest_jobs() == []
+        assert source.exists() == keep_sources
+
+    def test_resume__track_already_written__only_marked_indexed(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        library_path = tmp_path / "music" / "song.mp3"
+        library_path.parent.mkdir()
+        library_path.write_bytes(b"audio")
+        assert database.add_track(create_track(library_path, "song", "artist"))
+        source = str(tmp_path / "song.mp3")
+        assert database.set_ingest_jobs_moved([(source, str(library_path))])
+
+        pipeline = self._pipeline(tmp_path, database)
+        pipeline.start()
+        try:
+            assert pipeline.resume() == 0
+        finally:
+            pipeline.stop()
+
+        assert len(database.get_track_file_paths()) == 1
+        assert database.get_unfinished_ingest_jobs() == []
+
+    def test_resume__source_still_there__submitted_again(self, tmp_path: Path):
+        database = self._database(tmp_path)
+        source = tmp_path / "song.mp3"
+        source.write_bytes(b"audio")
+        gone = tmp_path / "gone.mp3"
+        assert database.add_ingest_jobs([str(source), str(gone)])
+
+        pipeline = self._pipeline(tmp_path, database)
+        pipeline.start()
+        try:
+            assert pipeline.resume() == 1
+            assert pipeline.join(timeout=5)
+        finally:
+            pipeline.stop()
+
+        assert list(database.get_track_file_paths()) == [
+            str(tmp_path / "music" / "song.mp3")
+        ]
+        assert database.get_unfinished_ingest_jobs() == []
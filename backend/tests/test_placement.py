@@ -0,0 +1,335 @@
+import errno
+import os
+import shutil
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.services.placement import (
+    FilePlacer,
+    KnownDirectories,
+    PlaceMethod,
+    copy_into_place,
+    rename_no_replace,
+)
+
+real_link = os.link
+
+
+def cross_device_link(source, destination):
+    """os.link as if import/ were on a different filesystem from the library."""
+    if Path(source).parent.name == "import":
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    return real_link(source, destination)
+
+
+def write_source(tmp_path: Path, name: str = "file.mp3", data: bytes = b"data") -> Path:
+    source = tmp_path / "import" / name
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_bytes(data)
+    return source
+
+
+def library_dir(tmp_path: Path) -> Path:
+    destination_dir = tmp_path / "music" / "artist" / "album"
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    return destination_dir
+
+
+class TestKnownDirectories:
+    def test_ensure__same_directory_twice__created_once(self, tmp_path: Path):
+        directories = KnownDirectories()
+
+        with patch.object(Path, "mkdir", autospec=True) as mkdir:
+            directories.ensure(tmp_path / "album")
+            directories.ensure(tmp_path / "album")
+
+        assert mkdir.call_count == 1
+        assert directories.created == 1
+
+    def test_ensure__over_max_size__least_recent_forgotten(self, tmp_path: Path):
+        directories = KnownDirectories(max_size=2)
+
+        for name in ("a", "b", "a", "c"):
+            directories.ensure(tmp_path / name)
+
+        assert len(directories) == 2
+        assert tmp_path / "a" in directories
+        assert tmp_path / "b" not in directories
+
+
+class TestRenameNoReplace:
+    def test_rename_no_replace__destination_exists__raises(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        destination.write_bytes(b"already here")
+
+        with pytest.raises(FileExistsError):
+            rename_no_replace(source, destination)
+
+        assert source.exists()
+        assert destination.read_bytes() == b"already here"
+
+    def test_rename_no_replace__no_hardlinks__renamed(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+
+        with patch(
+            "app.services.placement.os.link",
+            side_effect=OSError(errno.EPERM, "Operation not permitted"),
+        ):
+            rename_no_replace(source, destination)
+
+        assert not source.exists()
+        assert destination.read_bytes() == b"data"
+
+    def test_rename_no_replace__source_not_removable__destination_removed(
+        self, tmp_path: Path
+    ):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        real_unlink = os.unlink
+
+        def unlink(path, *args, **kwargs):
+            if Path(path) == source:
+                raise OSError(errno.EROFS, "Read-only file system")
+            return real_unlink(path, *args, **kwargs)
+
+        with patch("app.services.placement.os.unlink", unlink):
+            with pytest.raises(OSError):
+                rename_no_replace(source, destination)
+
+        assert source.read_bytes() == b"data"
+        assert not destination.exists()
+
+
+class TestCopyIntoPlace:
+    def test_copy_into_place__file__same_content_and_mtime(self, tmp_path: Path):
+        source = write_source(tmp_path, data=b"x" * 100_000)
+        os.utime(source, ns=(1_000_000_000, 2_000_000_000))
+        destination = library_dir(tmp_path) / "file.mp3"
+
+        method = copy_into_place(source, destination)
+
+        assert method in (PlaceMethod.COPY, PlaceMethod.REFLINK)
+        assert destination.read_bytes() == source.read_bytes()
+        assert destination.stat().st_mtime_ns == 2_000_000_000
+        assert sorted(path.name for path in destination.parent.iterdir()) == ["file.mp3"]
+
+    def test_copy_into_place__copy_file_range_unsupported__falls_back(self, tmp_path: Path):
+        source = write_source(tmp_path, data=b"y" * 4096)
+        destination = library_dir(tmp_path) / "file.mp3"
+
+        with patch(
+            "app.services.placement.os.copy_file_range",
+            side_effect=OSError(errno.EXDEV, "cross-device"),
+        ), patch(
+            "app.services.placement.fcntl.ioctl",
+            side_effect=OSError(errno.EOPNOTSUPP, "no reflink"),
+        ):
+            assert copy_into_place(source, destination) is PlaceMethod.COPY
+
+        assert destination.read_bytes() == b"y" * 4096
+
+    def test_copy_into_place__copy_file_range_fails_part_way__copied_from_start(
+        self, tmp_path: Path
+    ):
+        data = bytes(range(256)) * 64
+        source = write_source(tmp_path, data=data)
+        destination = library_dir(tmp_path) / "file.mp3"
+        real_copy_file_range = os.copy_file_range
+        calls = []
+
+        def copy_file_range_once(source_fd, destination_fd, count):
+            calls.append(count)
+            if len(calls) > 1:
+                raise OSError(errno.EINVAL, "Invalid argument")
+            return real_copy_file_range(source_fd, destination_fd, 1000)
+
+        with patch("app.services.placement.COPY_CHUNK_BYTES", 4096), patch(
+            "app.services.placement.os.copy_file_range", copy_file_range_once
+        ), patch(
+            "app.services.placement.fcntl.ioctl",
+            side_effect=OSError(errno.EOPNOTSUPP, "no reflink"),
+        ):
+            assert copy_into_place(source, destination) is PlaceMethod.COPY
+
+        assert destination.read_bytes() == data
+
+    def test_copy_into_place__short_copy__raises_and_places_nothing(self, tmp_path: Path):
+        source = write_source(tmp_path, data=b"z" * 4096)
+        destination = library_dir(tmp_path) / "file.mp3"
+
+        with patch(
+            "app.services.placement.os.copy_file_range", return_value=0
+        ), patch(
+            "app.services.placement.fcntl.ioctl",
+            side_effect=OSError(errno.EOPNOTSUPP, "no reflink"),
+        ):
+            with pytest.raises(OSError):
+                copy_into_place(source, destination)
+
+        assert list(destination.parent.iterdir()) == []
+
+
+class TestFilePlacer:
+    def test_place__same_filesystem__renamed(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        placer = FilePlacer(keep_sources=False)
+
+        assert placer.place(source, destination)
+
+        assert not source.exists()
+        assert destination.read_bytes() == b"data"
+        assert placer.stats().renamed == 1
+
+    def test_place__cross_device__source_removed_by_remove_sources(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        placer = FilePlacer(keep_sources=False)
+
+        with patch("app.services.placement.os.link", cross_device_link):
+            assert placer.place(source, destination)
+
+        assert destination.read_bytes() == b"data"
+        placer.sync()
+        assert source.exists()
+        placer.remove_sources([source])
+        assert not source.exists()
+        stats = placer.stats()
+        assert stats.renamed == 0
+        assert stats.copied + stats.reflinked == 1
+
+    def test_remove_sources__not_copied_by_place__kept(self, tmp_path: Path):
+        copied = write_source(tmp_path, "copied.mp3")
+        other = write_source(tmp_path, "other.mp3")
+        placer = FilePlacer(keep_sources=False)
+
+        with patch("app.services.placement.os.link", cross_device_link):
+            assert placer.place(copied, library_dir(tmp_path) / "copied.mp3")
+        placer.remove_sources([copied, other])
+
+        assert not copied.exists()
+        assert other.exists()
+
+    def test_place__copy_mode__keeps_source(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        placer = FilePlacer(keep_sources=True)
+
+        assert placer.place(source, destination)
+        placer.sync()
+
+        assert source.read_bytes() == b"data"
+        assert destination.read_bytes() == b"data"
+        assert not os.path.samefile(source, destination)
+
+    def test_place__copy_mode_with_hardlinks__linked(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        placer = FilePlacer(keep_sources=True, allow_hardlinks=True)
+
+        assert placer.place(source, destination)
+
+        assert os.path.samefile(source, destination)
+        assert placer.stats().hardlinked == 1
+
+    def test_place__identical_destination__counts_as_placed(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        shutil.copy2(source, destination)
+        placer = FilePlacer(keep_sources=False)
+
+        assert placer.place(source, destination)
+        placer.sync()
+        placer.remove_sources([source])
+
+        assert not source.exists()
+        assert destination.read_bytes() == b"data"
+        assert placer.stats().failed == 0
+
+    def test_place__same_size_different_destination__fails(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        destination.write_bytes(b"DATA")
+        placer = FilePlacer(keep_sources=False)
+
+        assert not placer.place(source, destination)
+
+        assert source.exists()
+        assert destination.read_bytes() == b"DATA"
+
+    def test_place__destination_exists__not_overwritten(self, tmp_path: Path):
+        source = write_source(tmp_path)
+        destination = library_dir(tmp_path) / "file.mp3"
+        destination.write_bytes(b"already here")
+        placer = FilePlacer(keep_sources=False)
+
+        with patch("app.services.placement.os.link", cross_device_link):
+            assert not placer.place(source, destination)
+        placer.sync()
+
+        assert destination.read_bytes() == b"already here"
+        assert source.exists()
+        assert placer.stats().failed == 1
+
+    def test_sync__many_files_one_album__one_directory_sync(self, tmp_path: Path):
+        destination_dir = library_dir(tmp_path)
+        placer = FilePlacer(keep_sources=False)
+        sources = [write_source(tmp_path, f"{i}.mp3") for i in range(10)]
+
+        with patch("app.services.placement.os.link", cross_device_link):
+            threads = [
+                threading.Thread(
+                    target=placer.place, args=(source, destination_dir / source.name)
+                )
+                for source in sources
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        placer.sync()
+        placer.remove_sources(sources)
+
+        assert sorted(path.name for path in destination_dir.iterdir()) == sorted(
+            source.name for source in sources
+        )
+        assert not any(source.exists() for source in sources)
+        assert placer.stats().directory_syncs == 1
+
+    def test_place__directory_removed_after_creation__created_again(self, tmp_path: Path):
+        placer = FilePlacer(keep_sources=False)
+        destination_dir = tmp_path / "music" / "artist"
+        assert placer.place(write_source(tmp_path, "1.mp3"), destination_dir / "1.mp3")
+        shutil.rmtree(destination_dir)
+
+        assert placer.place(write_source(tmp_path, "2.mp3"), destination_dir / "2.mp3")
+
+        assert (destination_dir / "2.mp3").is_file()
+        assert placer.stats().directories_created == 2
+
+    def test_place__concurrent_same_destination__one_wins(self, tmp_path: Path):
+        destination = tmp_path / "music" / "file.mp3"
+        placer = FilePlacer(keep_sources=False)
+        sources = [write_source(tmp_path, f"{i}.mp3", data=bytes([i])) for i in range(8)]
+        results = []
+
+        threads = [
+            threading.Thread(
+                target=lambda source=source: results.append(
+                    placer.place(source, destination)
+                )
+            )
+            for source in sources
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results) == [False] * 7 + [True]
+        assert sum(source.exists() for source in sources) == 7
@@ -0,0 +1,181 @@
+import os
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+from app.services.reconcile import ReconcileContext, Reconciler, scan_files
+from tests.test_database import create_track, set_up_database
+
+
+def make_reconciler(tmp_path: Path, submitted: List[Path], **overrides):
+    database = set_up_database(tmp_path / "database.db")
+    assert database.initialize()
+    import_dir = tmp_path / "import"
+    library_dir = tmp_path / "music"
+    import_dir.mkdir()
+    library_dir.mkdir()
+    values = dict(
+        import_dir=import_dir,
+        music_library_dir=library_dir,
+        get_file_snapshot=database.get_file_snapshot,
+        update_file_snapshot=database.update_file_snapshot,
+        get_track_file_paths=database.get_track_file_paths,
+        delete_tracks=database.delete_tracks,
+        submit=submitted.append,
+    )
+    values.update(overrides)
+    return database, Reconciler(ReconcileContext(**values))
+
+
+def add_library_track(database, path: Path, title: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"audio")
+    track = create_track(path, title, "artist")
+    assert database.add_track(track)
+    return track
+
+
+class TestScanFiles:
+    def test_scan_files__nested_tree__every_file_found(self, tmp_path: Path):
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        (tmp_path / "top.mp3").write_bytes(b"1")
+        (tmp_path / "a" / "b" / "deep.flac").write_bytes(b"22")
+
+        entries = {Path(entry.path).name: entry for entry in scan_files(tmp_path)}
+
+        assert set(entries) == {"top.mp3", "deep.flac"}
+        assert entries["deep.flac"].size == 2
+
+    def test_scan_files__missing_root__nothing(self, tmp_path: Path):
+        assert list(scan_files(tmp_path / "missing")) == []
+
+
+class TestReconciler:
+    def test_reconcile__files_left_in_import_dir__submitted_once(self, tmp_path: Path):
+        submitted = []
+        _, reconciler = make_reconciler(tmp_path, submitted)
+        import_dir = tmp_path / "import"
+        (import_dir / "album").mkdir()
+        (import_dir / "album" / "song.mp3").write_bytes(b"audio")
+        (import_dir / "album.zip").write_bytes(b"zip")
+        (import_dir / "notes.txt").write_bytes(b"text")
+
+        stats = reconciler.reconcile()
+
+        assert sorted(path.name for path in submitted) == ["album.zip", "song.mp3"]
+        assert stats.import_files == 3
+        assert stats.submitted == 2
+
+        # Unchanged since the last scan: nothing to do.
+        submitted.clear()
+        assert reconciler.reconcile().submitted == 0
+        assert submitted == []
+
+    def test_reconcile__import_file_changed__submitted_again(self, tmp_path: Path):
+        submitted = []
+        _, reconciler = make_reconciler(tmp_path, submitted)
+        song = tmp_path / "import" / "song.mp3"
+        song.write_bytes(b"audio")
+        reconciler.reconcile()
+
+        song.write_bytes(b"longer audio")
+        submitted.clear()
+        reconciler.reconcile()
+
+        assert submitted == [song]
+
+    def test_reconcile__library_file_deleted__track_deleted(self, tmp_path: Path):
+        submitted = []
+        database, reconciler = make_reconciler(tmp_path, submitted)
+        kept = add_library_track(database, tmp_path / "music" / "artist" / "kept.mp3", "kept")
+        gone = add_library_track(database, tmp_path / "music" / "artist" / "gone.mp3", "gone")
+        reconciler.reconcile()
+        gone.file_path.unlink()
+
+        stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 1
+        assert stats.deleted_tracks == 1
+        assert set(database.get_track_file_paths().values()) == {kept.uuid_id}
+
+    def test_reconcile__purge_disabled__track_kept(self, tmp_path: Path):
+        submitted = []
+        database, reconciler = make_reconciler(tmp_path, submitted, purge_missing=False)
+        add_library_track(database, tmp_path / "music" / "kept.mp3", "kept")
+        gone = add_library_track(database, tmp_path / "music" / "gone.mp3", "gone")
+        gone.file_path.unlink()
+
+        stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 1
+        assert stats.deleted_tracks == 0
+        assert len(database.get_track_file_paths()) == 2
+
+    def test_reconcile__library_empty__nothing_deleted(self, tmp_path: Path):
+        submitted = []
+        database, reconciler = make_reconciler(tmp_path, submitted)
+        track = add_library_track(database, tmp_path / "music" / "song.mp3", "song")
+        track.file_path.unlink()
+
+        stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 1
+        assert stats.deleted_tracks == 0
+
+    def test_reconcile__directory_not_scannable__nothing_deleted(self, tmp_path: Path):
+        submitted = []
+        database, reconciler = make_reconciler(tmp_path, submitted)
+        add_library_track(database, tmp_path / "music" / "a" / "kept.mp3", "kept")
+        unreadable = tmp_path / "music" / "b"
+        add_library_track(database, unreadable / "hidden.mp3", "hidden")
+        gone = add_library_track(database, tmp_path / "music" / "a" / "gone.mp3", "gone")
+        gone.file_path.unlink()
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if Path(path) == unreadable:
+                raise PermissionError(13, "Permission denied", str(path))
+            return real_scandir(path)
+
+        with patch("app.services.reconcile.os.scandir", scandir):
+            stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 2
+        assert stats.deleted_tracks == 0
+        assert len(database.get_track_file_paths()) == 3
+
+    def test_reconcile__library_through_symlink__nothing_deleted(self, tmp_path: Path):
+        submitted = []
+        link = tmp_path / "library_link"
+        link.symlink_to(tmp_path / "music")
+        database, reconciler = make_reconciler(
+            tmp_path, submitted, music_library_dir=link
+        )
+        add_library_track(database, tmp_path / "music" / "artist" / "song.mp3", "song")
+
+        stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 0
+        assert len(database.get_track_file_paths()) == 1
+
+    def test_reconcile__track_outside_library__not_deleted(self, tmp_path: Path):
+        submitted = []
+        database, reconciler = make_reconciler(tmp_path, submitted)
+        add_library_track(database, tmp_path / "music" / "song.mp3", "song")
+        outside = add_library_track(database, tmp_path / "elsewhere" / "other.mp3", "other")
+        outside.file_path.unlink()
+
+        stats = reconciler.reconcile()
+
+        assert stats.missing_tracks == 0
+        assert len(database.get_track_file_paths()) == 2
+
+    def test_start__background_thread__finishes(self, tmp_path: Path):
+        submitted = []
+        _, reconciler = make_reconciler(tmp_path, submitted)
+        (tmp_path / "import" / "song.mp3").write_bytes(b"audio")
+
+        reconciler.start()
+        reconciler.thread.join(timeout=5)
+
+        assert reconciler.last_stats.submitted == 1
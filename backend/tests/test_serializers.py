@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+from app.core.serializers import client_tracks_from_rows, tracks_response_json
+from app.database.database import Database, DatabaseContext, _row_to_track
+from app.models import ClientTrack, GetTracksResponse, Track, TrackMetaData
+
+
+def set_up_database(tmp_path: Path) -> Database:
+    context = DatabaseContext(
+        database_path=tmp_path / "database.db",
+        init_sql_path=Path(__file__).parent.parent / "app" / "database" / "init.sql",
+    )
+    database = Database(context=context)
+    assert database.initialize()
+    return database
+
+
+def seed_tracks(database: Database, tmp_path: Path):
+    tracks = [
+        Track(
+            file_path=tmp_path / "full.flac",
+            metadata=TrackMetaData(
+                title="Señorita «live»",
+                artist="Björk",
+                album="Homogénic",
+                album_artist="Björk",
+                year=1997,
+                date="1997-09-22",
+                genre="Electronic",
+                track_number=3,
+                disc_number=1,
+                codec="flac",
+                duration=241.5,
+                bitrate_kbps=1011.2,
+                sample_rate_hz=44100,
+                channels=2,
+                has_album_art=True,
+            ),
+        ),
+        Track(
+            file_path=tmp_path / "sparse.mp3",
+            metadata=TrackMetaData(codec="mp3", duration=1.0),
+        ),
+    ]
+    assert all(database.add_tracks(tracks))
+
+
+class TestTracksResponseJson:
+    def test_tracks_response_json__rows__matches_pydantic_output(self, tmp_path):
+        database = set_up_database(tmp_path)
+        seed_tracks(database, tmp_path)
+
+        page = database.get_track_rows_page(limit=10)
+        assert page is not None
+
+        expected = GetTracksResponse(
+            data=[ClientTrack.from_track(_row_to_track(row)) for row in page.items],
+            nextCursor="abc",
+            totalCount=2,
+        ).model_dump(mode="json")
+        body = tracks_response_json(page.items, "abc", 2)
+
+        assert json.loads(body) == expected
+        assert list(json.loads(body)["data"][0]["metadata"]) == list(
+            TrackMetaData.model_fields
+        )
+
+    def test_tracks_response_json__rows__validates_as_response(self, tmp_path):
+        database = set_up_database(tmp_path)
+        seed_tracks(database, tmp_path)
+
+        page = database.get_track_rows_page(limit=10)
+        assert page is not None
+
+        response = GetTracksResponse.model_validate_json(
+            tracks_response_json(page.items, None, None)
+        )
+        assert len(response.data) == 2
+        assert response.nextCursor is None
+
+    def test_client_tracks_from_rows__no_rows__returns_empty(self):
+        assert client_tracks_from_rows([]) == []
@@ -0,0 +1,111 @@
+import asyncio
+from pathlib import Path
+
+import anyio
+
+from app.core.streaming import FileRangeResponse
+
+
+def run_response(response: FileRangeResponse, extensions=None) -> list:
+    messages = []
+    scope = {"type": "http", "method": "GET", "extensions": extensions or {}}
+
+    async def receive():
+        await anyio.sleep_forever()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response(scope, receive, send))
+    return messages
+
+
+def write_file(tmp_path: Path) -> tuple[Path, bytes]:
+    data = bytes(range(256)) * 40
+    path = tmp_path / "track.flac"
+    path.write_bytes(data)
+    return path, data
+
+
+class TestFileRangeResponse:
+    def test_file_range_response__no_extensions__reads_range_in_chunks(self, tmp_path):
+        path, data = write_file(tmp_path)
+        response = FileRangeResponse(path, offset=100, length=3000, status_code=206)
+        response.chunk_size = 1024
+
+        messages = run_response(response)
+
+        assert messages[0]["status"] == 206
+        assert (b"content-length", b"3000") in messages[0]["headers"]
+        bodies = [m for m in messages[1:] if m["type"] == "http.response.body"]
+        assert len(bodies) == 3
+        assert b"".join(m["body"] for m in bodies) == data[100:3100]
+        assert bodies[-1]["more_body"] is False
+
+    def test_file_range_response__zerocopy_extension__sends_file(self, tmp_path):
+        path, _ = write_file(tmp_path)
+        response = FileRangeResponse(path, offset=10, length=20, status_code=206)
+
+        messages = run_response(response, {"http.response.zerocopysend": {}})
+
+        assert [m["type"] for m in messages] == [
+            "http.response.start",
+            "http.response.zerocopysend",
+        ]
+        assert messages[1]["offset"] == 10
+        assert messages[1]["count"] == 20
+        assert messages[1]["file"].closed
+
+    def test_file_range_response__pathsend_whole_file__sends_path(self, tmp_path):
+        path, data = write_file(tmp_path)
+        response = FileRangeResponse(path, offset=0, length=len(data))
+
+        messages = run_response(response, {"http.response.pathsend": {}})
+
+        assert messages[1] == {"type": "http.response.pathsend", "path": str(path)}
+
+    def test_file_range_response__pathsend_range__reads_range(self, tmp_path):
+        path, data = write_file(tmp_path)
+        response = FileRangeResponse(path, offset=5, length=10, status_code=206)
+
+        messages = run_response(response, {"http.response.pathsend": {}})
+
+        assert messages[1]["body"] == data[5:15]
+
+    def test_file_range_response__file_shrank__ends_body(self, tmp_path):
+        path, data = write_file(tmp_path)
+        response = FileRangeResponse(path, offset=0, length=len(data) + 500)
+
+        messages = run_response(response)
+
+        assert b"".join(m.get("body", b"") for m in messages[1:]) == data
+        assert messages[-1] == {
+            "type": "http.response.body",
+            "body": b"",
+            "more_body": False,
+        }
+
+    def test_file_range_response__file_missing__not_found(self, tmp_path):
+        response = FileRangeResponse(tmp_path / "gone.flac", offset=0, length=100)
+
+        messages = run_response(response)
+
+        assert messages[0]["type"] == "http.response.start"
+        assert messages[0]["status"] == 404
+        assert (b"content-length", b"100") not in messages[0]["headers"]
+
+    def test_file_range_response__directory__not_found(self, tmp_path):
+        response = FileRangeResponse(tmp_path, offset=0, length=100)
+
+        messages = run_response(response)
+
+        assert messages[0]["status"] == 404
+
+    def test_file_range_response__content_length_given__not_duplicated(self, tmp_path):
+        path, data = write_file(tmp_path)
+        response = FileRangeResponse(
+            path, offset=0, length=len(data), headers={"Content-length": str(len(data))}
+        )
+
+        names = [name for name, _ in response.raw_headers]
+        assert names.count(b"content-length") == 1
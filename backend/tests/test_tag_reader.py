@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import app.services.metadata as metadata
+from app.models.track_meta_data import TrackMetaData
+from app.services.tag_reader import read_probe_data
+
+# Each builder writes a small but structurally complete file, and each test
+# checks the reader against the TrackMetaData build_track_metadata produces from
+# the ffprobe output for the same file.
+
+MP3_FRAME_HEADER = b"\xff\xfb\x90\x00"  # MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo
+MP3_FRAME_LENGTH = 417
+
+
+def syncsafe(value: int) -> bytes:
+    return bytes(
+        [(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F]
+    )
+
+
+def id3v2(frames: dict, major: int = 4, picture: bool = False) -> bytes:
+    body = b""
+    for frame_id, text in frames.items():
+        payload = b"\x03" + text.encode("utf-8")
+        size = syncsafe(len(payload)) if major == 4 else struct.pack(">I", len(payload))
+        body += frame_id.encode("ascii") + size + b"\x00\x00" + payload
+    if picture:
+        payload = b"\x00image/jpeg\x00\x03\x00" + b"\xff\xd8\xff\xe0"
+        size = syncsafe(len(payload)) if major == 4 else struct.pack(">I", len(payload))
+        body += b"APIC" + size + b"\x00\x00" + payload
+    body += b"\x00" * 32
+    return b"ID3" + bytes([major, 0, 0]) + syncsafe(len(body)) + body
+
+
+def mpeg_frames(count: int, xing_frames: int | None = None, xing_bytes: int = 0) -> bytes:
+    frames = []
+    for index in range(count):
+        frame = bytearray(MP3_FRAME_HEADER + b"\x00" * (MP3_FRAME_LENGTH - 4))
+        if index == 0 and xing_frames is not None:
+            frame[36:48] = b"Xing" + struct.pack(">II", 0x3, xing_frames)
+            frame[48:52] = struct.pack(">I", xing_bytes)
+        frames.append(bytes(frame))
+    return b"".join(frames)
+
+
+def id3v1(title: str, artist: str, year: str, track: int, genre: int) -> bytes:
+    return (
+        b"TAG"
+        + title.encode("latin-1").ljust(30, b"\x00")
+        + artist.encode("latin-1").ljust(30, b"\x00")
+        + b"".ljust(30, b"\x00")
+        + year.encode("latin-1")
+        + b"".ljust(28, b"\x00")
+        + bytes([0, track, genre])
+    )
+
+
+def flac(comments: list, picture: bool = False, sample_rate: int = 44100) -> bytes:
+    total_samples = sample_rate * 200
+    packed = (sample_rate << 44) | ((2 - 1) << 41) | ((16 - 1) << 36) | total_samples
+    stream_info = struct.pack(">HH", 4096, 4096) + b"\x00" * 6 + packed.to_bytes(8, "big")
+    stream_info += b"\x00" * 16
+
+    vendor = b"reference libFLAC 1.4.3"
+    vorbis = struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", len(comments))
+    for comment in comments:
+        encoded = comment.encode("utf-8")
+        vorbis += struct.pack("<I", len(encoded)) + encoded
+
+    blocks = [(0, stream_info), (4, vorbis)]
+    if picture:
+        blocks.append((6, b"\x00\x00\x00\x03" + b"\x00" * 28))
+    blocks.append((1, b"\x00" * 64))
+
+    out = b"fLaC"
+    for index, (block_type, body) in enumerate(blocks):
+        last = 0x80 if index == len(blocks) - 1 else 0
+        out += bytes([last | block_type]) + len(body).to_bytes(3, "big") + body
+    return out + b"\xff\xf8" + b"\x00" * 100
+
+
+def riff_chunk(chunk_id: bytes, body: bytes) -> bytes:
+    return chunk_id + struct.pack("<I", len(body)) + body + (b"\x00" if len(body) & 1 else b"")
+
+
+def wave(
+    bits: int = 16,
+    channels: int = 2,
+    sample_rate: int = 44100,
+    seconds: int = 2,
+    info: dict | None = None,
+    format_tag: int = 1,
+) -> bytes:
+    block_align = channels * bits // 8
+    fmt = struct.pack(
+        "<HHIIHH", format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits
+    )
+    chunks = riff_chunk(b"fmt ", fmt)
+    if info:
+        sub = b"".join(riff_chunk(key, value.encode("utf-8") + b"\x00") for key, value in info.items())
+        chunks += riff_chunk(b"LIST", b"INFO" + sub)
+    chunks += riff_chunk(b"data", b"\x00" * (sample_rate * block_align * seconds))
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def box(box_type: bytes, *children: bytes) -> bytes:
+    body = b"".join(children)
+    return struct.pack(">I", 8 + len(body)) + box_type + body
+
+
+def full_box(box_type: bytes, *children: bytes) -> bytes:
+    return box(box_type, b"\x00\x00\x00\x00", *children)
+
+
+def descriptor(tag: int, body: bytes) -> bytes:
+    return bytes([tag, len(body)]) + body
+
+
+def ilst_item(item_type: bytes, data_type: int, value: bytes) -> bytes:
+    return box(item_type, box(b"data", struct.pack(">II", data_type, 0), value))
+
+
+def mp4(items: list, codec: bytes = b"mp4a", timescale: int = 44100, seconds: int = 181) -> bytes:
+    sample_count = timescale * seconds // 1024
+    if codec == b"mp4a":
+        audio_specific_config = bytes([0x12, 0x10])  # AAC LC, 44.1 kHz, stereo
+        decoder_config = descriptor(
+            0x04,
+            bytes([0x40, 0x15]) + b"\x00\x00\x00" + struct.pack(">II", 256000, 256000)
+            + descriptor(0x05, audio_specific_config),
+        )
+        esds = full_box(
+            b"esds", descriptor(0x03, b"\x00\x01\x00" + decoder_config + descriptor(0x06, b"\x02"))
+        )
+        codec_box = esds
+        sample_size = 800
+    else:
+        codec_box = full_box(
+            b"alac",
+            struct.pack(">IBBBBBBHIII", 4096, 0, 24, 40, 10, 14, 2, 255, 0, 0, 96000),
+        )
+        sample_size = 4000
+    sample_entry = box(
+        codec,
+        b"\x00" * 6 + struct.pack(">H", 1) + b"\x00" * 8
+        + struct.pack(">HHHHI", 2, 16, 0, 0, (timescale << 16) & 0xFFFFFFFF),
+        codec_box,
+    )
+    stbl = box(
+        b"stbl",
+        full_box(b"stsd", struct.pack(">I", 1), sample_entry),
+        full_box(b"stsz", struct.pack(">II", sample_size, sample_count)),
+    )
+    mdia = box(
+        b"mdia",
+        full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, timescale * seconds), b"\x00" * 4),
+        full_box(b"hdlr", b"\x00" * 4 + b"soun" + b"\x00" * 13),
+        box(b"minf", stbl),
+    )
+    meta = full_box(
+        b"meta",
+        full_box(b"hdlr", b"\x00" * 4 + b"mdir" + b"\x00" * 13),
+        box(b"ilst", *items),
+    )
+    moov = box(b"moov", box(b"trak", mdia), box(b"udta", meta))
+    ftyp = box(b"ftyp", b"M4A \x00\x00\x00\x00M4A mp42isom")
+    return ftyp + box(b"mdat", b"\x00" * 64) + moov
+
+
+def read(tmp_path: Path, name: str, data: bytes) -> TrackMetaData | None:
+    path = tmp_path / name
+    path.write_bytes(data)
+    probe_data = read_probe_data(path)
+    assert probe_data is not None
+    return metadata.build_track_metadata(probe_data)
+
+
+def expected(**fields) -> TrackMetaData:
+    values = dict(
+        title="Test Title",
+        artist="Test Artist",
+        album="Test Album",
+        album_artist="Various Artists",
+        date="2021-06-01",
+        year=2021,
+        genre="Rock",
+        track_number=3,
+        disc_number=1,
+    )
+    values.update(fields)
+    return TrackMetaData(**values)
+
+
+class TestReadMp3:
+    def test_read_probe_data__id3v24_cbr__matches_ffprobe(self, tmp_path: Path):
+        tag = id3v2(
+            {
+                "TIT2": "Test Title",
+                "TPE1": "Test Artist",
+                "TALB": "Test Album",
+                "TPE2": "Various Artists",
+                "TDRC": "2021-06-01",
+                "TCON": "(17)",
+                "TRCK": "3/12",
+                "TPOS": "1/2",
+            },
+            picture=True,
+        )
+        audio = mpeg_frames(100)
+
+        result = read(tmp_path, "song.mp3", tag + audio)
+
+        assert result == expected(
+            codec="mp3",
+            duration=float(f"{len(audio) * 8 / 128000:.6f}"),
+            bitrate_kbps=128.0,
+            sample_rate_hz=44100,
+            channels=2,
+            has_album_art=True,
+        )
+
+    def test_read_probe_data__xing_header__uses_frame_count(self, tmp_path: Path):
+        tag = id3v2({"TIT2": "Test Title", "TYER": "2019", "TDAT": "0306"}, major=3)
+        audio = mpeg_frames(50, xing_frames=1000, xing_bytes=1000 * 300)
+
+        result = read(tmp_path, "song.mp3", tag + audio)
+
+        assert result == TrackMetaData(
+            title="Test Title",
+            date="2019-06-03",
+            year=2019,
+            codec="mp3",
+            duration=float(f"{1000 * 1152 / 44100:.6f}"),
+            bitrate_kbps=300 * 8 * 44100 // 1152 / 1000,
+            sample_rate_hz=44100,
+            channels=2,
+        )
+
+    def test_read_probe_data__id3v22__reads_three_letter_frames(self, tmp_path: Path):
+        body = b""
+        for frame_id, text in {
+            "TT2": "Test Title",
+            "TP1": "Test Artist",
+            "TAL": "Test Album",
+            "TYE": "2019",
+            "TDA": "0306",
+        }.items():
+            payload = b"\x00" + text.encode("latin-1")
+            body += frame_id.encode("ascii") + len(payload).to_bytes(3, "big") + payload
+        body += b"\x00" * 32
+        tag = b"ID3" + bytes([2, 0, 0]) + syncsafe(len(body)) + body
+
+        result = read(tmp_path, "song.mp3", tag + mpeg_frames(20))
+
+        assert result.title == "Test Title"
+        assert result.artist == "Test Artist"
+        assert result.album == "Test Album"
+        assert result.date == "2019-06-03"
+        assert result.year == 2019
+
+    def test_read_probe_data__only_id3v1__reads_id3v1(self, tmp_path: Path):
+        data = mpeg_frames(20) + id3v1("Old Title", "Old Artist", "1999", 7, 13)
+
+        result = read(tmp_path, "song.mp3", data)
+
+        assert result.title == "Old Title"
+        assert result.artist == "Old Artist"
+        assert result.year == 1999
+        assert result.track_number == 7
+        assert result.genre == "Pop"
+
+    def test_read_probe_data__id3v2_and_id3v1__id3v1_ignored(self, tmp_path: Path):
+        data = (
+            id3v2({"TIT2": "New Title"})
+            + mpeg_frames(20)
+            + id3v1("Old Title", "Old Artist", "1999", 7, 13)
+        )
+
+        result = read(tmp_path, "song.mp3", data)
+
+        assert result.title == "New Title"
+        assert result.artist is None
+
+
+class TestReadFlac:
+    def test_read_probe_data__vorbis_comments__matches_ffprobe(self, tmp_path: Path):
+        comments = [
+            "TITLE=Test Title",
+            "ARTIST=Test Artist",
+            "ALBUM=Test Album",
+            "ALBUMARTIST=Various Artists",
+            "DATE=2021-06-01",
+            "GENRE=Rock",
+            "TRACKNUMBER=3",
+            "DISCNUMBER=1",
+        ]
+
+        result = read(tmp_path, "song.flac", flac(comments, picture=True))
+
+        assert result == expected(
+            codec="flac",
+            duration=200.0,
+            bitrate_kbps=0.0,
+            sample_rate_hz=44100,
+            channels=2,
+            has_album_art=True,
+        )
+
+    def test_read_probe_data__repeated_comment__joined(self, tmp_path: Path):
+        result = read(tmp_path, "song.flac", flac(["ARTIST=One", "artist=Two"]))
+
+        assert result.artist == "One;Two"
+        assert result.has_album_art is False
+
+
+class TestReadWave:
+    def test_read_probe_data__list_info__matches_ffprobe(self, tmp_path: Path):
+        info = {
+            b"INAM": "Test Title",
+            b"IART": "Test Artist",
+            b"IPRD": "Test Album",
+            b"ICRD": "2021-06-01",
+            b"IGNR": "Rock",
+            b"ITRK": "3",
+        }
+
+        result = read(tmp_path, "song.wav", wave(info=info))
+
+        assert result == expected(
+            album_artist=None,
+            disc_number=None,
+            codec="pcm_s16le",
+            duration=2.0,
+            bitrate_kbps=1411.2,
+            sample_rate_hz=44100,
+            channels=2,
+        )
+
+    @pytest.mark.parametrize(
+        "bits, format_tag, codec",
+        [(8, 1, "pcm_u8"), (24, 1, "pcm_s24le"), (32, 3, "pcm_f32le")],
+    )
+    def test_read_probe_data__sample_formats(
+        self, tmp_path: Path, bits: int, format_tag: int, codec: str
+    ):
+        result = read(
+            tmp_path, "song.wav", wave(bits=bits, channels=1, format_tag=format_tag)
+        )
+
+        assert result.codec == codec
+        assert result.channels == 1
+        assert result.duration == 2.0
+
+    def test_read_probe_data__compressed_wave__returns_none(self, tmp_path: Path):
+        path = tmp_path / "song.wav"
+        path.write_bytes(wave(format_tag=0x0055))
+
+        assert read_probe_data(path) is None
+
+
+class TestReadMp4:
+    def test_read_probe_data__aac_ilst__matches_ffprobe(self, tmp_path: Path):
+        items = [
+            ilst_item(b"\xa9nam", 1, b"Test Title"),
+            ilst_item(b"\xa9ART", 1, b"Test Artist"),
+            ilst_item(b"\xa9alb", 1, b"Test Album"),
+            ilst_item(b"aART", 1, b"Various Artists"),
+            ilst_item(b"\xa9day", 1, b"2021-06-01"),
+            ilst_item(b"gnre", 0, struct.pack(">H", 18)),
+            ilst_item(b"trkn", 0, struct.pack(">HHHH", 0, 3, 12, 0)),
+            ilst_item(b"disk", 0, struct.pack(">HHH", 0, 1, 2)),
+            ilst_item(b"covr", 13, b"\xff\xd8\xff\xe0"),
+        ]
+
+        result = read(tmp_path, "song.m4a", mp4(items))
+
+        sample_count = 44100 * 181 // 1024
+        assert result == expected(
+            codec="aac",
+            duration=181.0,
+            bitrate_kbps=int(sample_count * 800 * 8 / 181) / 1000,
+            sample_rate_hz=44100,
+            channels=2,
+            has_album_art=True,
+        )
+
+    def test_read_probe_data__alac__reads_cookie(self, tmp_path: Path):
+        result = read(tmp_path, "song.m4a", mp4([], codec=b"alac", timescale=96000, seconds=10))
+
+        assert result.codec == "alac"
+        assert result.sample_rate_hz == 96000
+        assert result.channels == 2
+        assert result.duration == 10.0
+        assert result.has_album_art is False
+
+
+class TestReadProbeDataFallback:
+    def test_read_probe_data__missing_file__returns_none(self, tmp_path: Path):
+        assert read_probe_data(tmp_path / "missing.mp3") is None
+
+    def test_read_probe_data__not_audio__returns_none(self, tmp_path: Path):
+        path = tmp_path / "song.mp3"
+        path.write_bytes(b"fake audio" * 100)
+
+        assert read_probe_data(path) is None
+
+    def test_read_probe_data__truncated_flac__returns_none(self, tmp_path: Path):
+        path = tmp_path / "song.flac"
+        path.write_bytes(flac(["TITLE=x"])[:30])
+
+        assert read_probe_data(path) is None
+
+    def test_get_track_metadata__parsed_in_process__ffprobe_not_called(
+        self, tmp_path: Path
+    ):
+        path = tmp_path / "song.wav"
+        path.write_bytes(wave())
+
+        with patch("app.services.metadata.ffprobe_for_metadata") as ffprobe:
+            result = metadata.get_track_metadata(path)
+
+        ffprobe.assert_not_called()
+        assert result.codec == "pcm_s16le"
+
+    def test_get_track_metadata__unparseable__falls_back_to_ffprobe(
+        self, tmp_path: Path
+    ):
+        path = tmp_path / "song.mp3"
+        path.write_bytes(b"fake audio")
+        ffprobe_response = {
+            "streams": [{"codec_type": "audio", "codec_name": "mp3", "duration": "1.0"}],
+            "format": {},
+        }
+
+        with patch(
+            "app.services.metadata.ffprobe_for_metadata", return_value=ffprobe_response
+        ) as ffprobe:
+            result = metadata.get_track_metadata(path)
+
+        ffprobe.assert_called_once_with(path)
+        assert result.codec == "mp3"